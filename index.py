@@ -1,13 +1,4017 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, scrolledtext
+import tkinter.font as tkfont
+from tkinter import filedialog, messagebox, simpledialog, ttk, scrolledtext
 import shutil
 import os
 import platform
-from PIL import Image, ImageTk
+import stat
+import select
+import ctypes
+import ctypes.util
+from PIL import Image, ImageOps, ImageTk
 import threading
+import queue
+import json
+import hashlib
+import uuid
+import sqlite3
+import re
+import mmap
+import multiprocessing
+import struct
+import sys
 import time
+import abc
+import io
+import zlib
+import codecs
+import keyword
+import builtins
+import tokenize
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
 from datetime import datetime
 
+# عدد العناصر في كل دفعة يرسلها المسح إلى الواجهة
+DIRECTORY_PROGRESS_STEP = 500
+# الفاصل الزمني لاستطلاع نتائج المسح بالمللي ثانية
+DIRECTORY_POLL_INTERVAL = 15
+# ارتفاع الصف في شجرة العرض بالبكسل
+TREE_ROW_HEIGHT = 22
+# عدد الصفوف الإضافية المرسومة فوق وتحت الجزء الظاهر
+TREE_OVERSCAN = 10
+# الحد الأقصى لحجم الذاكرة المؤقتة لقوائم المجلدات بالبايت
+DIRECTORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# الحد الأقصى لطول سجل التنقل للخلف وللأمام
+NAVIGATION_HISTORY_LIMIT = 100
+# مدة تجميع أحداث التغيير قبل تطبيقها بالثواني
+WATCH_COALESCE_DELAY = 0.2
+# الفاصل الزمني لمراقبة المجلد بالاستطلاع عند عدم توفر inotify بالثواني
+WATCH_POLL_SECONDS = 2
+# الفاصل الزمني لاستلام التغييرات في الواجهة بالمللي ثانية
+WATCH_UI_INTERVAL = 250
+# عدد التغييرات المجمعة الذي يُفضَّل بعده إعادة المسح الكامل
+WATCH_MAX_INCREMENTAL = 2000
+# عدد التغييرات الذي يُعاد بعده بناء النموذج بتمريرة واحدة
+DIRECTORY_BULK_CHANGES = 64
+
+# حجم الجزء المنسوخ في كل استدعاء للنواة بالبايت
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# عدد الخيوط التي تنسخ الملفات بالتوازي
+COPY_WORKERS = 8
+# الفاصل الزمني لتحديث نافذة تقدم النسخ بالمللي ثانية
+COPY_PROGRESS_INTERVAL = 200
+# مجلد بيانات النظام في المجلد الرئيسي للمستخدم
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".zu_os")
+# مجلد سجلات النسخ غير المكتملة
+TRANSFER_JOURNAL_DIR = os.path.join(APP_DATA_DIR, "transfers")
+# المدة التي تنتظرها العملية قبل إظهار نافذة التقدم بالمللي ثانية
+JOB_WINDOW_DELAY = 300
+# سلة المهملات في المجلد الرئيسي وملف يسجل سلال الأقراص الأخرى
+TRASH_DIR = os.path.join(APP_DATA_DIR, "trash")
+TRASH_ROOTS_FILE = os.path.join(APP_DATA_DIR, "trash_roots.json")
+# الحد الأقصى لحجم سلة المهملات بالبايت ولعمر العناصر فيها بالثواني
+TRASH_MAX_BYTES = 10 * 1024 * 1024 * 1024
+TRASH_MAX_AGE = 30 * 24 * 60 * 60
+# الفاصل الزمني بين جولات تفريغ سلة المهملات بالثواني
+TRASH_RECLAIM_INTERVAL = 60
+# ملف فهرس أسماء الملفات للبحث
+SEARCH_INDEX_PATH = os.path.join(APP_DATA_DIR, "search_index.sqlite3")
+# المجلدات التي يشملها الفهرس
+SEARCH_INDEX_ROOTS = [os.path.expanduser("~")]
+# الفاصل الزمني بين جولات تحديث الفهرس بالثواني
+SEARCH_REINDEX_INTERVAL = 300
+# عدد المجلدات المعالجة بين كل حفظ للفهرس
+SEARCH_COMMIT_EVERY = 500
+# الحد الأقصى لنتائج البحث المعروضة
+SEARCH_MAX_RESULTS = 500
+# مهلة انتظار توقف الكتابة قبل تنفيذ البحث بالمللي ثانية
+SEARCH_DEBOUNCE = 150
+# عدد الملفات في كل مهمة ترسل إلى عمليات البحث في المحتوى
+CONTENT_SEARCH_BATCH = 64
+# الحد الأقصى لنتائج البحث في المحتوى ولنتائج الملف الواحد
+CONTENT_SEARCH_MAX_RESULTS = 1000
+CONTENT_SEARCH_PER_FILE = 50
+# عدد البايتات المفحوصة من بداية الملف لاكتشاف الملفات الثنائية
+CONTENT_SEARCH_SNIFF_SIZE = 8192
+# الحد الأقصى لطول مقتطف السطر المعروض
+CONTENT_SEARCH_SNIPPET = 200
+# امتدادات الصور التي يعرضها عارض الصور وعرض الشبكة
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff")
+# امتدادات الملفات التي تُفتح في المحرر النصي
+TEXT_EXTENSIONS = (".txt", ".py", ".html", ".css", ".js")
+# مجلد الصور المصغرة والحد الأقصى لحجمه بالبايت
+THUMBNAIL_DIR = os.path.join(APP_DATA_DIR, "thumbnails")
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# أبعاد الصورة المصغرة وخلية الشبكة بالبكسل
+THUMBNAIL_SIZE = 128
+GRID_TILE_WIDTH = 150
+GRID_TILE_HEIGHT = 170
+# عدد خيوط توليد الصور المصغرة
+THUMBNAIL_WORKERS = 4
+# عدد الصور المصغرة المحتفظ بها في الذاكرة
+THUMBNAIL_MEMORY_ITEMS = 600
+# مهلة استقرار شريط التكبير قبل إعادة التحجيم بجودة عالية (بالمللي ثانية)
+ZOOM_SETTLE_DELAY = 200
+# حدود شريط التكبير بالنسبة المئوية
+IMAGE_ZOOM_MIN = 10
+IMAGE_ZOOM_MAX = 200
+# عدد الصور المجاورة التي تُجهَّز مسبقًا في كل اتجاه وعدد خيوط تجهيزها
+SLIDESHOW_PREFETCH = 2
+SLIDESHOW_WORKERS = 2
+# عدد إطارات الصورة المتحركة التي تُفك مسبقًا قبل موضع التشغيل
+ANIMATION_DECODE_AHEAD = 8
+# الحد الأقصى لحجم الإطارات المحولة في الذاكرة لكل صورة متحركة
+ANIMATION_FRAME_MAX_BYTES = 64 * 1024 * 1024
+# مدة الإطار الافتراضية، وأقل مدة تُحترم كما في المتصفحات (بالمللي ثانية)
+ANIMATION_DEFAULT_DURATION = 100
+ANIMATION_MIN_DURATION = 20
+# مهلة إعادة المحاولة عندما لا يكون الإطار التالي جاهزًا (بالمللي ثانية)
+ANIMATION_RETRY_DELAY = 10
+# أقصى تأخر قبل إعادة ضبط توقيت التشغيل بدل تخطي الإطارات (بالثواني)
+ANIMATION_MAX_LAG = 1.0
+# صيغ الإخراج المتاحة في معالجة الصور دفعة واحدة: الاسم -> الامتداد
+IMAGE_BATCH_FORMATS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+# عدد مهام المعالجة في الانتظار لكل عملية فرعية
+IMAGE_BATCH_QUEUE_PER_WORKER = 2
+# حجم الملف الذي يُفتح بعده المحرر في وضع الملفات الكبيرة للقراءة فقط
+LARGE_FILE_THRESHOLD = 16 * 1024 * 1024
+# تُحفظ بداية سطر واحد من كل LINE_INDEX_STRIDE سطر، ويُمسح الملف على أجزاء بهذا الحجم
+LINE_INDEX_STRIDE = 64
+LINE_INDEX_CHUNK = 16 * 1024 * 1024
+# الفاصل بين تحديثات شريط التمرير أثناء بناء فهرس الأسطر (بالمللي ثانية)
+LINE_INDEX_POLL_INTERVAL = 200
+# عدد الأسطر المحملة في المحرر حول منطقة العرض، والهامش الذي يُعاد التحميل عند بلوغه
+LARGE_FILE_WINDOW_LINES = 3000
+LARGE_FILE_MARGIN_LINES = 500
+# الحد الأقصى لحجم النص المحمل في المحرر دفعة واحدة (للأسطر الطويلة جدًا)
+LARGE_FILE_WINDOW_BYTES = 8 * 1024 * 1024
+# مجلد النسخ الاحتياطية لنصوص المحرر غير المحفوظة والفاصل بين كل نسخة (بالمللي ثانية)
+RECOVERY_DIR = os.path.join(APP_DATA_DIR, "recovery")
+AUTOSAVE_INTERVAL = 30 * 1000
+# الفاصل بين فحوص اكتمال الحفظ في الخلفية (بالمللي ثانية)
+SAVE_POLL_INTERVAL = 100
+# عدد البايتات المقروءة من بداية الملف لاكتشاف ترميزه أو كونه ثنائيًا
+TEXT_SNIFF_SIZE = 64 * 1024
+# الترميزات المجربة بالترتيب إذا لم يكن الملف UTF-8 صالحًا (latin-1 يقبل أي بايتات)
+TEXT_FALLBACK_ENCODINGS = ("cp1256", "cp1252", "latin-1")
+# أقصى نسبة لمحارف التحكم في ملف نصي
+TEXT_MAX_CONTROL_RATIO = 0.1
+# عدد البايتات في كل صف من العرض الست عشري
+HEX_BYTES_PER_ROW = 16
+# الحد الأقصى لعدد التطابقات المحفوظة عند البحث في المحرر
+TEXT_SEARCH_MAX_MATCHES = 1000000
+# الفاصل بين تحديثات عدد التطابقات أثناء البحث أو الاستبدال في الخلفية (بالمللي ثانية)
+SEARCH_POLL_INTERVAL = 100
+# ميزانية ذاكرة مستندات المحرر؛ عند تجاوزها تُسبت التبويبات غير النشطة الأقدم استخدامًا
+EDITOR_MEMORY_BUDGET = 64 * 1024 * 1024
+# لغات تلوين الشيفرة حسب امتداد الملف
+SYNTAX_LANGUAGES = {".py": "python", ".pyw": "python", ".html": "html", ".htm": "html",
+                    ".css": "css", ".js": "javascript", ".mjs": "javascript"}
+SYNTAX_COLORS = {
+    "keyword": "#0000FF", "builtin": "#795E26", "definition": "#267F99", "decorator": "#AF00DB",
+    "string": "#A31515", "comment": "#008000", "number": "#098658",
+    "tag": "#800000", "attribute": "#E50000", "property": "#0451A5", "entity": "#8B008B",
+}
+# عدد الأسطر المقطعة في كل مهمة خلفية، ومهلة تجميع التعديلات قبل إعادة التلوين (بالمللي ثانية)
+SYNTAX_CHUNK_LINES = 500
+SYNTAX_DEBOUNCE = 50
+SYNTAX_POLL_INTERVAL = 20
+# أبعاد بلاطة العرض بالبكسل وعدد البلاطات الإضافية حول منطقة العرض
+IMAGE_TILE_SIZE = 512
+IMAGE_TILE_OVERSCAN = 1
+# الحد الأقصى لحجم البلاطات المحولة في الذاكرة لكل نافذة عارض
+IMAGE_TILE_MAX_BYTES = 128 * 1024 * 1024
+# الحد الأقصى لعدد بكسلات الصور التي يفتحها العارض، مرفوع ليشمل الصور العملاقة؛
+# المصغرات ومعالجة الصور تبقى على حد PIL الافتراضي الذي يحمي من قنابل فك الضغط
+IMAGE_MAX_PIXELS = 2 * 1024 * 1024 * 1024
+
+# الحد الأقصى لحجم الصور المفكوكة غير المستخدمة المحتفظ بها بين نوافذ العارض
+DECODED_IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# ثوابت inotify في لينكس
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+class DirectoryEntry:
+    """سجل مضغوط لعنصر واحد في المجلد"""
+    __slots__ = ("name", "is_dir", "size", "mtime")
+
+    def __init__(self, name, is_dir, size, mtime):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+
+
+def entry_sort_key(entry):
+    """مفتاح ترتيب العناصر: المجلدات أولاً ثم الملفات أبجديًا"""
+    return (not entry.is_dir, entry.name.lower())
+
+
+def read_directory_entry(directory, name):
+    """قراءة سجل عنصر واحد في المجلد، أو None إذا لم يعد موجودًا"""
+    path = os.path.join(directory, name)
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        # رابط رمزي معطوب ما زال موجودًا في المجلد
+        if os.path.lexists(path):
+            return DirectoryEntry(name, False, 0, None)
+        return None
+    except OSError:
+        return DirectoryEntry(name, False, 0, None)
+        
+    is_dir = stat.S_ISDIR(info.st_mode)
+    return DirectoryEntry(name, is_dir, 0 if is_dir else info.st_size, info.st_mtime)
+
+
+class DirectoryCache:
+    """ذاكرة مؤقتة محدودة لقوائم المجلدات تستبعد الأقدم استخدامًا أولاً"""
+
+    def __init__(self, max_bytes=DIRECTORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_signature(path):
+        """توقيع المجلد المستخدم للتحقق من صلاحية القائمة المخزنة"""
+        info = os.stat(path)
+        return (info.st_mtime_ns, info.st_ino, info.st_dev)
+
+    @staticmethod
+    def estimate_size(entries):
+        """تقدير تقريبي لحجم قائمة السجلات في الذاكرة"""
+        return sys.getsizeof(entries) + sum(map(DirectoryCache.estimate_entry_size, entries))
+
+    @staticmethod
+    def estimate_entry_size(entry):
+        """السجل نفسه والاسم والحجم وتاريخ التعديل"""
+        return sys.getsizeof(entry) + sys.getsizeof(entry.name) + 56
+
+    def get(self, path):
+        """إرجاع (التوقيع، السجلات) للمسار أو None"""
+        with self.lock:
+            item = self.items.get(path)
+            if item is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.items.move_to_end(path)
+            return item[0], item[1]
+
+    def put(self, path, signature, entries, size):
+        """تخزين قائمة مجلد مع استبعاد الأقدم عند تجاوز الحد"""
+        with self.lock:
+            self.put_locked(path, signature, entries, size)
+
+    def update(self, path, entries, signature=None, delta=None):
+        """تحديث حجم قائمة عُدّلت في مكانها بفرق الحجم إن أُعطي وإلا بإعادة حسابه، مع تحديث توقيعها إن أُعطي"""
+        size = self.estimate_size(entries) if delta is None else None
+        with self.lock:
+            item = self.items.get(path)
+            if item is not None:
+                if size is None:
+                    size = item[2] + delta
+                self.put_locked(path, item[0] if signature is None else signature, entries, size)
+
+    def put_locked(self, path, signature, entries, size):
+        self.discard_locked(path)
+        if size > self.max_bytes:
+            return
+        self.items[path] = (signature, entries, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self.items.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def discard(self, path):
+        """حذف قائمة مجلد من الذاكرة المؤقتة"""
+        with self.lock:
+            self.discard_locked(path)
+
+    def discard_locked(self, path):
+        item = self.items.pop(path, None)
+        if item is not None:
+            self.total_bytes -= item[2]
+
+
+class DirectoryWatcher:
+    """مراقبة تغييرات مجلد عبر inotify مع الرجوع إلى الاستطلاع الدوري"""
+
+    def __init__(self, path):
+        self.path = path
+        # كل عنصر إما (التوقيع، [(الاسم، السجل أو None)]) أو None لطلب إعادة المسح
+        self.changes = queue.Queue()
+        self.stop_event = threading.Event()
+        self.after_id = None
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        fd = self.open_inotify()
+        if fd is None:
+            self.run_polling()
+            return
+        try:
+            self.run_inotify(fd)
+        finally:
+            os.close(fd)
+
+    def open_inotify(self):
+        """فتح واصف inotify للمجلد، أو None إذا لم يكن متاحًا"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+            if libc.inotify_add_watch(fd, os.fsencode(self.path), INOTIFY_MASK) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            return None
+
+    def run_inotify(self, fd):
+        """قراءة أحداث inotify وتجميعها قبل نشرها"""
+        pending = set()
+        rescan = False
+        deadline = None
+        
+        while not self.stop_event.is_set():
+            timeout = 0.5 if deadline is None else max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if ready:
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b""
+                if self.read_events(data, pending):
+                    rescan = True
+                    
+                if (pending or rescan) and deadline is None:
+                    deadline = time.monotonic() + WATCH_COALESCE_DELAY
+                    
+            if deadline is not None and time.monotonic() >= deadline:
+                self.publish(pending, rescan)
+                pending = set()
+                rescan = False
+                deadline = None
+
+    @staticmethod
+    def read_events(data, pending):
+        """إضافة أسماء العناصر المتغيرة في دفعة أحداث إلى pending، وإرجاع True إذا لزمت إعادة المسح"""
+        rescan = False
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+            _, mask, _, length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = True
+            elif name:
+                pending.add(name)
+        return rescan
+
+    def run_polling(self):
+        """مراقبة توقيع المجلد دوريًا وطلب إعادة المسح عند تغيره"""
+        try:
+            signature = DirectoryCache.get_signature(self.path)
+        except OSError:
+            signature = None
+            
+        while not self.stop_event.wait(WATCH_POLL_SECONDS):
+            try:
+                current = DirectoryCache.get_signature(self.path)
+            except OSError:
+                current = None
+            if current != signature:
+                signature = current
+                self.changes.put(None)
+
+    def publish(self, names, rescan):
+        """قراءة العناصر المتغيرة في الخلفية وإرسالها إلى الواجهة"""
+        if rescan or len(names) > WATCH_MAX_INCREMENTAL:
+            self.changes.put(None)
+            return
+            
+        try:
+            signature = DirectoryCache.get_signature(self.path)
+        except OSError:
+            self.changes.put(None)
+            return
+        self.changes.put((signature, [(name, read_directory_entry(self.path, name)) for name in names]))
+
+
+class DirectoryScan:
+    """عملية مسح مجلد تعمل في الخلفية ويمكن إلغاؤها"""
+
+    def __init__(self, path, signature=None, force=False):
+        self.path = path
+        # توقيع القائمة المعروضة من الذاكرة المؤقتة للتحقق منها في الخلفية
+        self.signature = signature
+        self.force = force
+        self.cancel_event = threading.Event()
+        self.results = queue.Queue()
+        self.entries = []
+        # دفعات وصلت من المسح ولم تُدمج بعد في القائمة المرتبة
+        self.pending = []
+        self.after_id = None
+
+    def cancel(self):
+        """طلب إيقاف المسح وتجاهل نتائجه"""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class TransferJournal:
+    """سجل نقاط التحقق لعملية نسخ حتى يمكن استئنافها بعد الانقطاع"""
+
+    def __init__(self, path, sources, destination_dir, verify):
+        self.path = path
+        self.sources = sources
+        self.destination_dir = destination_dir
+        self.verify = verify
+        # الملفات المكتملة والإزاحات المكتوبة للملفات الجزئية، مفهرسة بمسار الهدف
+        self.completed = set()
+        self.offsets = {}
+        self.lock = threading.Lock()
+        self.file = None
+
+    @classmethod
+    def create(cls, sources, destination_dir, verify):
+        """إنشاء سجل جديد وكتابة رأسه"""
+        os.makedirs(TRANSFER_JOURNAL_DIR, exist_ok=True)
+        path = os.path.join(TRANSFER_JOURNAL_DIR, f"{uuid.uuid4().hex}.jsonl")
+        journal = cls(path, sources, destination_dir, verify)
+        journal.write({"sources": sources, "destination": destination_dir, "verify": verify})
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        """قراءة سجل محفوظ مع تجاهل آخر سطر إذا كان مقطوعًا"""
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        header = json.loads(lines[0])
+        journal = cls(path, header["sources"], header["destination"], header.get("verify", False))
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if "done" in record:
+                journal.completed.add(record["done"])
+                journal.offsets.pop(record["done"], None)
+            else:
+                journal.offsets[record["file"]] = record["offset"]
+        return journal
+
+    @staticmethod
+    def find_pending():
+        """مسارات سجلات النسخ غير المكتملة"""
+        try:
+            names = sorted(os.listdir(TRANSFER_JOURNAL_DIR))
+        except OSError:
+            return []
+        return [os.path.join(TRANSFER_JOURNAL_DIR, name) for name in names if name.endswith(".jsonl")]
+
+    def write(self, record):
+        """إلحاق سطر بالسجل ودفعه إلى نظام الملفات"""
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8")
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def record_offset(self, destination, offset):
+        self.write({"file": destination, "offset": offset})
+
+    def record_done(self, destination):
+        self.write({"done": destination})
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def remove(self):
+        """حذف السجل بعد اكتمال العملية أو إلغائها"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class BackgroundJob(abc.ABC):
+    """أساس العمليات الطويلة على الملفات التي تعمل في الخلفية"""
+
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.lock = threading.Lock()
+        self.errors = []
+        self.interrupted = False
+        self.finished = False
+        self.started_at = None
+        self.paused_at = None
+        self.paused_seconds = 0.0
+
+    def start(self):
+        self.started_at = time.monotonic()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def pause(self):
+        if self.resume_event.is_set():
+            self.paused_at = time.monotonic()
+            self.resume_event.clear()
+
+    def resume(self):
+        if not self.resume_event.is_set():
+            self.paused_seconds += time.monotonic() - self.paused_at
+            self.paused_at = None
+            self.resume_event.set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        # إيقاظ الخيوط المتوقفة مؤقتًا حتى تلاحظ الإلغاء
+        self.resume_event.set()
+
+    def interrupt(self):
+        """إيقاف النسخ مع الإبقاء على السجل والملفات الجزئية لاستئنافه لاحقًا"""
+        self.interrupted = True
+        self.cancel()
+
+    @property
+    def paused(self):
+        return not self.resume_event.is_set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def get_elapsed(self):
+        """الوقت المنقضي دون فترات الإيقاف المؤقت"""
+        now = self.paused_at if self.paused_at is not None else time.monotonic()
+        return max(1e-6, now - self.started_at - self.paused_seconds)
+
+    @abc.abstractmethod
+    def run(self):
+        """تنفيذ العملية في خيط الخلفية مع انتظار resume_event بين الخطوات"""
+
+    @abc.abstractmethod
+    def describe(self, format_size):
+        """إرجاع (نسبة الإنجاز، سطر المعلومات، سطر السرعة) لنافذة التقدم"""
+
+    @staticmethod
+    def format_eta(remaining, rate):
+        if rate <= 0:
+            return "--:--:--"
+        return time.strftime("%H:%M:%S", time.gmtime(remaining / rate))
+
+
+class CopyJob(BackgroundJob):
+    """عملية نسخ تعمل في الخلفية مع دعم الإيقاف المؤقت والإلغاء والاستئناف"""
+
+    def __init__(self, sources, destination_dir, verify=False, journal=None):
+        super().__init__()
+        self.sources = sources
+        self.destination_dir = destination_dir
+        self.verify = verify
+        self.journal = journal
+        self.total_bytes = 0
+        self.total_files = 0
+        self.copied_bytes = 0
+        self.copied_files = 0
+        self.verified_files = 0
+        # المرحلة الحالية: planning ثم copying ثم verifying
+        self.phase = "planning"
+        # طريقة النسخ المفضلة، تتراجع تلقائيًا إذا لم يدعمها النظام
+        self.method = "copy_file_range" if hasattr(os, "copy_file_range") else "sendfile"
+        # أخطاء الحصر (مصدر مفقود أو هو نفسه الهدف) لا يصلحها الاستئناف
+        self.planning_errors = 0
+        # هل بقي السجل لاستئناف النسخ في التشغيل التالي
+        self.journal_kept = False
+
+    def describe(self, format_size):
+        if self.phase == "planning":
+            return 0, "جارٍ حصر الملفات…", ""
+        if self.phase == "verifying":
+            fraction = self.verified_files / self.total_files if self.total_files else 0
+            return fraction, f"جارٍ التحقق من {self.verified_files} من {self.total_files} ملف…", ""
+            
+        elapsed = self.get_elapsed()
+        bytes_per_second = self.copied_bytes / elapsed
+        files_per_second = self.copied_files / elapsed
+        eta = self.format_eta(self.total_bytes - self.copied_bytes, bytes_per_second)
+        info = (f"{self.copied_files} من {self.total_files} ملف | "
+                f"{format_size(self.copied_bytes)} من {format_size(self.total_bytes)}")
+        speed = (f"{format_size(bytes_per_second)}/ث | "
+                 f"{files_per_second:.1f} ملف/ث | الوقت المتبقي: {eta}")
+        return self.copied_bytes / self.total_bytes if self.total_bytes else 0, info, speed
+
+    def run(self):
+        try:
+            # التحقق من المصادر قبل إنشاء السجل حتى لا يُحفظ نسخ لا يمكن إكماله
+            self.sources = self.check_sources()
+            if self.journal is None and self.sources:
+                try:
+                    self.journal = TransferJournal.create(self.sources, self.destination_dir, self.verify)
+                except OSError:
+                    # متابعة النسخ دون إمكانية الاستئناف
+                    self.journal = None
+                    
+            files, folders = self.plan()
+            self.planning_errors = len(self.errors)
+            self.phase = "copying"
+            
+            with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+                for _ in pool.map(self.copy_one, files):
+                    pass
+                    
+            # نسخ خصائص المجلدات بعد ملفاتها حتى لا تتغير أوقات تعديلها
+            if not self.cancelled:
+                for source, destination in reversed(folders):
+                    try:
+                        shutil.copystat(source, destination)
+                    except OSError:
+                        pass
+                        
+            if self.verify and not self.cancelled and not self.errors:
+                self.phase = "verifying"
+                with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+                    for _ in pool.map(self.verify_one, files):
+                        pass
+        except Exception as e:
+            self.errors.append(("", str(e)))
+        finally:
+            if self.journal is not None:
+                # الإبقاء على السجل عند الانقطاع أو أخطاء الإدخال والإخراج فقط لاستئناف النسخ لاحقًا
+                failed = not self.cancelled and len(self.errors) > self.planning_errors
+                if self.interrupted or failed:
+                    self.journal.close()
+                    self.journal_kept = True
+                else:
+                    self.journal.remove()
+            self.finished = True
+
+    def check_sources(self):
+        """المصادر القابلة للنسخ، مع تسجيل المفقود منها وما يطابق هدفه"""
+        valid = []
+        for source in self.sources:
+            destination = os.path.join(self.destination_dir, os.path.basename(source))
+            if not os.path.lexists(source):
+                self.errors.append((source, "المصدر غير موجود"))
+            elif self.is_inside_source(source):
+                # نسخ مجلد إلى داخله يعيد نسخ ما ينسخه بلا نهاية
+                self.errors.append((source, "لا يمكن نسخ مجلد إلى داخله"))
+            elif os.path.exists(destination) and os.path.samefile(source, destination):
+                # النسخ فوق المصدر نفسه سيمحو محتواه
+                self.errors.append((source, "المصدر والهدف هما نفس الملف"))
+            else:
+                valid.append(source)
+        return valid
+
+    def is_inside_source(self, source):
+        """هل المجلد الهدف هو المصدر نفسه أو أحد مجلداته الفرعية"""
+        if os.path.islink(source) or not os.path.isdir(source):
+            return False
+        source = os.path.realpath(source)
+        destination = os.path.realpath(self.destination_dir)
+        return os.path.commonpath([source, destination]) == source
+
+    def copy_link(self, source, destination):
+        """إعادة إنشاء رابط رمزي في الهدف بدل نسخ ما يشير إليه"""
+        try:
+            target = os.readlink(source)
+            if os.path.islink(destination) or os.path.isfile(destination):
+                os.remove(destination)
+            os.symlink(target, destination)
+        except OSError as e:
+            self.errors.append((source, str(e)))
+
+    def plan(self):
+        """حصر الملفات والمجلدات المطلوب نسخها وإنشاء المجلدات الهدف"""
+        files = []
+        folders = []
+        for source in self.sources:
+            destination = os.path.join(self.destination_dir, os.path.basename(source))
+            if os.path.islink(source):
+                self.copy_link(source, destination)
+                continue
+            if not os.path.isdir(source):
+                try:
+                    files.append((source, destination, os.path.getsize(source)))
+                except OSError as e:
+                    self.errors.append((source, str(e)))
+                continue
+                
+            # لا نتبع الروابط الرمزية: رابط يشير إلى مجلد أعلى يجعل المرور بلا نهاية
+            for folder, subfolders, names in os.walk(source):
+                if self.cancelled:
+                    return [], []
+                target = os.path.normpath(os.path.join(destination, os.path.relpath(folder, source)))
+                os.makedirs(target, exist_ok=True)
+                folders.append((folder, target))
+                for name in subfolders:
+                    path = os.path.join(folder, name)
+                    if os.path.islink(path):
+                        self.copy_link(path, os.path.join(target, name))
+                for name in names:
+                    path = os.path.join(folder, name)
+                    if os.path.islink(path):
+                        self.copy_link(path, os.path.join(target, name))
+                        continue
+                    try:
+                        size = os.path.getsize(path)
+                    except OSError as e:
+                        self.errors.append((path, str(e)))
+                        continue
+                    files.append((path, os.path.join(target, name), size))
+                    
+        self.total_files = len(files)
+        self.total_bytes = sum(size for _, _, size in files)
+        return files, folders
+
+    def get_resume_offset(self, destination, size):
+        """عدد البايتات التي يمكن تخطيها من ملف حسب السجل، أو None إذا اكتمل"""
+        if self.journal is None:
+            return 0
+        try:
+            written = os.path.getsize(destination)
+        except OSError:
+            return 0
+        if destination in self.journal.completed and written == size:
+            return None
+        # لا نثق إلا بما كُتب فعلاً في الهدف
+        return min(self.journal.offsets.get(destination, 0), written)
+
+    def copy_one(self, item):
+        """نسخ ملف واحد (تعمل في خيط من مجموعة الخيوط)"""
+        source, destination, size = item
+        if self.cancelled:
+            return
+        try:
+            offset = self.get_resume_offset(destination, size)
+            if offset is None:
+                with self.lock:
+                    self.copied_bytes += size
+                    self.copied_files += 1
+                return
+                
+            with open(source, "rb") as fsrc, open(destination, "r+b" if offset else "wb") as fdst:
+                if offset:
+                    fdst.truncate(offset)
+                    os.lseek(fsrc.fileno(), offset, os.SEEK_SET)
+                    os.lseek(fdst.fileno(), offset, os.SEEK_SET)
+                    with self.lock:
+                        self.copied_bytes += offset
+                        
+                while True:
+                    self.resume_event.wait()
+                    if self.cancelled:
+                        break
+                    copied = self.copy_chunk(fsrc.fileno(), fdst.fileno())
+                    if not copied:
+                        break
+                    offset += copied
+                    with self.lock:
+                        self.copied_bytes += copied
+                    if self.journal is not None and offset < size:
+                        self.journal.record_offset(destination, offset)
+                        
+            if self.cancelled:
+                # عدم ترك ملف نصف مكتوب عند الإلغاء
+                if not self.interrupted:
+                    os.remove(destination)
+                return
+            shutil.copystat(source, destination)
+            if self.journal is not None:
+                self.journal.record_done(destination)
+            with self.lock:
+                self.copied_files += 1
+        except OSError as e:
+            with self.lock:
+                self.errors.append((source, str(e)))
+
+    def copy_chunk(self, in_fd, out_fd):
+        """نسخ جزء داخل النواة إن أمكن مع التراجع إلى القراءة والكتابة"""
+        # إرجاع صفر من النواة قد يعني ملفًا لا يدعمها (مثل /proc) فنتحقق بالقراءة
+        if self.method == "copy_file_range":
+            try:
+                copied = os.copy_file_range(in_fd, out_fd, COPY_CHUNK_SIZE)
+                if copied:
+                    return copied
+            except OSError:
+                # مثل النسخ بين أنظمة ملفات مختلفة في الأنوية القديمة
+                self.method = "sendfile"
+        if self.method == "sendfile":
+            try:
+                copied = os.sendfile(out_fd, in_fd, None, COPY_CHUNK_SIZE)
+                if copied:
+                    return copied
+            except (OSError, AttributeError):
+                self.method = "readwrite"
+        data = os.read(in_fd, COPY_CHUNK_SIZE)
+        if data:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(out_fd, view):]
+        return len(data)
+
+    def verify_one(self, item):
+        """مقارنة بصمة الملف المصدر بالهدف (تعمل في خيط من مجموعة الخيوط)"""
+        source, destination, _ = item
+        if self.cancelled:
+            return
+        try:
+            if get_file_digest(source) != get_file_digest(destination):
+                with self.lock:
+                    self.errors.append((destination, "البصمة لا تطابق المصدر"))
+        except OSError as e:
+            with self.lock:
+                self.errors.append((destination, str(e)))
+        with self.lock:
+            self.verified_files += 1
+
+
+class DeleteJob(BackgroundJob):
+    """حذف مجموعة من الملفات والمجلدات في الخلفية"""
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+        self.deleted_items = 0
+        self.deleted_files = 0
+
+    def run(self):
+        try:
+            for path in self.paths:
+                self.resume_event.wait()
+                if self.cancelled:
+                    break
+                try:
+                    self.delete_path(path)
+                    self.deleted_items += 1
+                except OSError as e:
+                    self.errors.append((path, str(e)))
+        finally:
+            self.finished = True
+
+    def delete_path(self, path):
+        """حذف عنصر واحد، والمجلدات من الأعمق إلى الأعلى"""
+        if not os.path.isdir(path) or os.path.islink(path):
+            os.remove(path)
+            self.deleted_files += 1
+            return
+            
+        for folder, folders, files in os.walk(path, topdown=False):
+            for name in files:
+                self.resume_event.wait()
+                if self.cancelled:
+                    return
+                os.remove(os.path.join(folder, name))
+                self.deleted_files += 1
+            for name in folders:
+                subfolder = os.path.join(folder, name)
+                if os.path.islink(subfolder):
+                    os.remove(subfolder)
+                else:
+                    os.rmdir(subfolder)
+        os.rmdir(path)
+
+    def describe(self, format_size):
+        total = len(self.paths)
+        files_per_second = self.deleted_files / self.get_elapsed()
+        return (self.deleted_items / total if total else 0,
+                f"تم حذف {self.deleted_items} من {total} عنصر",
+                f"{self.deleted_files} ملف | {files_per_second:.1f} ملف/ث")
+
+
+class Trash:
+    """سلة مهملات على نفس نظام الملفات تجعل الحذف فوريًا وقابلاً للتراجع"""
+
+    def __init__(self):
+        # يمنع تفريغ عنصر أثناء استعادته والعكس
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.reclaimer = None
+        self.roots = {TRASH_DIR}
+        try:
+            with open(TRASH_ROOTS_FILE, "r", encoding="utf-8") as f:
+                self.roots.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def get_trash_root(self, path):
+        """سلة مهملات على نفس القرص حتى يكون النقل إليها إعادة تسمية ذرية"""
+        device = os.lstat(path).st_dev
+        os.makedirs(TRASH_DIR, exist_ok=True)
+        if os.stat(TRASH_DIR).st_dev == device:
+            return TRASH_DIR
+            
+        # الصعود إلى نقطة تركيب القرص
+        mount = os.path.dirname(os.path.abspath(path))
+        while os.path.dirname(mount) != mount and os.lstat(os.path.dirname(mount)).st_dev == device:
+            mount = os.path.dirname(mount)
+        root = os.path.join(mount, ".zu_trash")
+        os.makedirs(root, exist_ok=True)
+        
+        if root not in self.roots:
+            self.roots.add(root)
+            with open(TRASH_ROOTS_FILE, "w", encoding="utf-8") as f:
+                json.dump(sorted(self.roots), f, ensure_ascii=False)
+        return root
+
+    def move_to_trash(self, path):
+        """نقل عنصر إلى سلة المهملات وإرجاع (السلة، المعرف)
+
+        البيانات تُكتب قبل النقل في ملف مؤقت يُثبَّت بعده، فلا يبقى عنصر منقول بلا بيانات
+        إذا انقطع النقل؛ يُكمله list_items في الجلسة التالية.
+        """
+        root = self.get_trash_root(path)
+        item_id = uuid.uuid4().hex
+        holder = os.path.join(root, item_id)
+        with self.lock:
+            self.write_metadata(holder, {"original": os.path.abspath(path), "deleted_at": time.time(), "size": None})
+            try:
+                os.mkdir(holder)
+                try:
+                    os.rename(path, os.path.join(holder, os.path.basename(path)))
+                except OSError:
+                    os.rmdir(holder)
+                    raise
+            except OSError:
+                os.remove(holder + ".json.tmp")
+                raise
+            os.replace(holder + ".json.tmp", holder + ".json")
+        self.wakeup.set()
+        return root, item_id
+
+    @staticmethod
+    def write_metadata(holder, metadata):
+        """كتابة بيانات عنصر في ملف مؤقت بجانبه؛ المستدعي يثبتها بإعادة التسمية"""
+        with open(holder + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+    def finish_move(self, holder):
+        """إكمال نقل انقطع بعد كتابة بياناته المؤقتة، وإرجاع True إذا أصبح العنصر في السلة"""
+        with self.lock:
+            try:
+                moved = bool(os.listdir(holder))
+            except FileNotFoundError:
+                moved = False
+            except OSError:
+                return False
+            try:
+                if moved:
+                    # العنصر نُقل قبل الانقطاع: تثبيت بياناته
+                    os.replace(holder + ".json.tmp", holder + ".json")
+                    return True
+                # لم يُنقل شيء: حذف البيانات المؤقتة والحامل الفارغ إن وُجد
+                os.remove(holder + ".json.tmp")
+                os.rmdir(holder)
+            except OSError:
+                pass
+            return False
+
+    def restore(self, root, item_id):
+        """إعادة عنصر إلى مكانه الأصلي إذا لم يُفرَّغ بعد"""
+        holder = os.path.join(root, item_id)
+        with self.lock:
+            try:
+                with open(holder + ".json", "r", encoding="utf-8") as f:
+                    original = json.load(f)["original"]
+            except OSError:
+                raise FileNotFoundError("تم تفريغ العنصر من سلة المهملات")
+            if os.path.lexists(original):
+                raise FileExistsError(f"يوجد عنصر آخر في {original}")
+            os.rename(os.path.join(holder, os.path.basename(original)), original)
+            os.rmdir(holder)
+            os.remove(holder + ".json")
+        return original
+
+    def start_reclaimer(self):
+        """بدء خيط التفريغ مرة واحدة عند أول استخدام"""
+        if self.reclaimer is None:
+            self.reclaimer = threading.Thread(target=self.run_reclaimer, daemon=True)
+            self.reclaimer.start()
+
+    def run_reclaimer(self):
+        """خيط منخفض الأولوية يفرغ العناصر القديمة أو الزائدة عن الحجم المسموح"""
+        try:
+            # تخفيض أولوية هذا الخيط فقط في لينكس
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+            
+        while True:
+            try:
+                self.reclaim()
+            except OSError:
+                pass
+            self.wakeup.wait(TRASH_RECLAIM_INTERVAL)
+            self.wakeup.clear()
+
+    def list_items(self):
+        """عناصر السلة كقائمة (السلة، المعرف، البيانات) من الأقدم إلى الأحدث"""
+        items = []
+        for root in list(self.roots):
+            try:
+                names = os.listdir(root)
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(root, name)
+                if name.endswith(".reclaiming"):
+                    # تفريغ لم يكتمل في جلسة سابقة
+                    self.reclaim_holder(path[:-len(".reclaiming")])
+                    continue
+                if name.endswith(".json.tmp"):
+                    # نقل لم يكتمل في جلسة سابقة
+                    if not self.finish_move(path[:-len(".json.tmp")]):
+                        continue
+                    name, path = name[:-len(".tmp")], path[:-len(".tmp")]
+                if name.endswith(".json"):
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            items.append((root, name[:-len(".json")], json.load(f)))
+                    except (OSError, ValueError):
+                        continue
+        items.sort(key=lambda item: item[2]["deleted_at"])
+        return items
+
+    def reclaim(self):
+        """تطبيق سياسة العمر والحجم على محتويات السلة"""
+        items = self.list_items()
+        for root, item_id, metadata in items:
+            if metadata["size"] is None:
+                holder = os.path.join(root, item_id)
+                size = get_tree_size(holder)
+                with self.lock:
+                    # عنصر استُعيد أثناء حساب حجمه لا تُعاد كتابة بياناته
+                    if not os.path.isdir(holder):
+                        metadata["size"] = 0
+                        continue
+                    metadata["size"] = size
+                    self.write_metadata(holder, metadata)
+                    os.replace(holder + ".json.tmp", holder + ".json")
+                    
+        total = sum(metadata["size"] for _, _, metadata in items)
+        now = time.time()
+        for root, item_id, metadata in items:
+            if total <= TRASH_MAX_BYTES and now - metadata["deleted_at"] <= TRASH_MAX_AGE:
+                break
+            holder = os.path.join(root, item_id)
+            with self.lock:
+                # بعد هذه الخطوة لم يعد التراجع ممكنًا
+                try:
+                    os.rename(holder + ".json", holder + ".reclaiming")
+                except OSError:
+                    continue
+            self.reclaim_holder(holder)
+            total -= metadata["size"]
+
+    def reclaim_holder(self, holder):
+        """حذف محتويات عنصر في السلة نهائيًا مع التمهل حتى لا يزاحم الواجهة"""
+        for folder, folders, files in os.walk(holder, topdown=False):
+            for count, name in enumerate(files, 1):
+                try:
+                    os.remove(os.path.join(folder, name))
+                except OSError:
+                    pass
+                if count % 200 == 0:
+                    time.sleep(0.01)
+            for name in folders:
+                path = os.path.join(folder, name)
+                try:
+                    if os.path.islink(path):
+                        os.remove(path)
+                    else:
+                        os.rmdir(path)
+                except OSError:
+                    pass
+        try:
+            os.rmdir(holder)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # يبقى الملف .reclaiming لإعادة المحاولة لاحقًا
+            return
+        try:
+            os.remove(holder + ".reclaiming")
+        except OSError:
+            pass
+
+
+class TrashJob(BackgroundJob):
+    """نقل مجموعة من العناصر إلى سلة المهملات في الخلفية"""
+
+    def __init__(self, trash, paths):
+        super().__init__()
+        self.trash = trash
+        self.paths = paths
+        # (السلة، المعرف، المسار الأصلي) لكل عنصر نُقل، لاستخدامها في التراجع
+        self.trashed = []
+        self.failed = []
+
+    def run(self):
+        try:
+            for path in self.paths:
+                self.resume_event.wait()
+                if self.cancelled:
+                    break
+                try:
+                    root, item_id = self.trash.move_to_trash(path)
+                    self.trashed.append((root, item_id, path))
+                except OSError:
+                    # غالبًا قرص لا يمكن إنشاء سلة عليه
+                    self.failed.append(path)
+        finally:
+            self.finished = True
+
+    def describe(self, format_size):
+        total = len(self.paths)
+        done = len(self.trashed) + len(self.failed)
+        return done / total if total else 0, f"نقل {done} من {total} عنصر إلى سلة المهملات", ""
+
+
+class FileIndex:
+    """فهرس دائم لأسماء الملفات في SQLite يُحدَّث تدريجيًا حسب تاريخ تعديل المجلدات"""
+
+    def __init__(self, path=SEARCH_INDEX_PATH, roots=None):
+        self.path = path
+        self.roots = roots if roots is not None else SEARCH_INDEX_ROOTS
+        # فهرس الثلاثيات يحتاج SQLite 3.34 أو أحدث، وإلا يُستخدم البحث الخطي
+        self.trigram = False
+        self.query_connection = None
+        self.indexing = False
+        self.wakeup = threading.Event()
+        self.crawler = None
+
+    def connect(self):
+        """فتح اتصال جديد بالفهرس وإنشاء الجداول عند الحاجة"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        # وضع WAL يسمح بالبحث أثناء تحديث الفهرس في الخلفية
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY, parent TEXT NOT NULL, name TEXT NOT NULL, is_dir INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_parent ON files (parent);
+        """)
+        try:
+            connection.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS names_fts
+                    USING fts5(name, content='files', content_rowid='id', tokenize='trigram');
+                CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+                    INSERT INTO names_fts (rowid, name) VALUES (new.id, new.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+                    INSERT INTO names_fts (names_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                END;
+            """)
+            self.trigram = True
+        except sqlite3.OperationalError:
+            self.trigram = False
+        return connection
+
+    def start(self):
+        """بدء خيط الفهرسة مرة واحدة عند أول استخدام"""
+        if self.crawler is None:
+            self.crawler = threading.Thread(target=self.run, daemon=True)
+            self.crawler.start()
+
+    def run(self):
+        try:
+            # تخفيض أولوية هذا الخيط فقط في لينكس
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+            
+        try:
+            connection = self.connect()
+        except sqlite3.Error:
+            return
+        while True:
+            self.indexing = True
+            try:
+                self.update(connection)
+            except sqlite3.Error:
+                connection.rollback()
+            finally:
+                self.indexing = False
+            self.wakeup.wait(SEARCH_REINDEX_INTERVAL)
+            self.wakeup.clear()
+
+    def update(self, connection):
+        """إعادة فهرسة المجلدات التي تغير تاريخ تعديلها فقط"""
+        known = dict(connection.execute("SELECT path, mtime_ns FROM dirs"))
+        seen = set()
+        
+        # إسقاط الجذور المتداخلة حتى لا يُفهرس المجلد مرتين
+        roots = sorted(set(os.path.abspath(root) for root in self.roots))
+        stack = [root for root in roots
+                 if not any(root.startswith(os.path.join(other, "")) for other in roots)]
+        
+        while stack:
+            folder = stack.pop()
+            try:
+                mtime_ns = os.stat(folder).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(folder)
+            
+            if known.get(folder) == mtime_ns:
+                subfolders = [name for (name,) in connection.execute(
+                    "SELECT name FROM files WHERE parent = ? AND is_dir = 1", (folder,))]
+            else:
+                try:
+                    with os.scandir(folder) as entries:
+                        # تجاهل العناصر المخفية مثل .cache و.git
+                        rows = [(entry.name, entry.is_dir(follow_symlinks=False))
+                                for entry in entries if not entry.name.startswith(".")]
+                except OSError:
+                    rows = []
+                connection.execute("DELETE FROM files WHERE parent = ?", (folder,))
+                connection.executemany(
+                    "INSERT INTO files (parent, name, is_dir) VALUES (?, ?, ?)",
+                    [(folder, name, int(is_dir)) for name, is_dir in rows])
+                connection.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", (folder, mtime_ns))
+                subfolders = [name for name, is_dir in rows if is_dir]
+                
+            stack.extend(os.path.join(folder, name) for name in subfolders)
+            if len(seen) % SEARCH_COMMIT_EVERY == 0:
+                connection.commit()
+                
+        # حذف المجلدات التي لم تعد موجودة
+        for folder in known.keys() - seen:
+            connection.execute("DELETE FROM files WHERE parent = ?", (folder,))
+            connection.execute("DELETE FROM dirs WHERE path = ?", (folder,))
+        connection.commit()
+
+    def search(self, query, limit=SEARCH_MAX_RESULTS):
+        """البحث بجزء من الاسم أو بنمط glob وإرجاع (المجلد، الاسم، مجلد؟)"""
+        if self.query_connection is None:
+            self.query_connection = self.connect()
+            
+        if any(char in query for char in "*?["):
+            condition, pattern = "GLOB ?", query
+        else:
+            # الرمزان % و_ في LIKE حرفان عاديان بالنسبة للمستخدم
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            condition, pattern = "LIKE ? ESCAPE '\\'", f"%{escaped}%"
+            
+        if self.trigram:
+            sql = ("SELECT files.parent, files.name, files.is_dir FROM names_fts "
+                   "JOIN files ON files.id = names_fts.rowid "
+                   f"WHERE names_fts.name {condition} LIMIT ?")
+        else:
+            sql = f"SELECT parent, name, is_dir FROM files WHERE name {condition} LIMIT ?"
+            
+        rows = self.query_connection.execute(sql, (pattern, limit)).fetchall()
+        return [(parent, name, bool(is_dir)) for parent, name, is_dir in rows]
+
+
+def get_process_context():
+    """سياق العمليات الفرعية: forkserver حيث يتوفر لتجنب نسخ خيوط الواجهة"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def search_files_batch(paths, pattern, per_file_limit):
+    """البحث عن نمط في مجموعة ملفات (تعمل في عملية فرعية)"""
+    regex = re.compile(pattern.encode("utf-8"), re.IGNORECASE)
+    matches = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                # تخطي الملفات الثنائية بفحص بدايتها فقط
+                head = f.read(CONTENT_SEARCH_SNIFF_SIZE)
+                if not head or b"\0" in head:
+                    continue
+                    
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    line = 1
+                    last = 0
+                    for count, match in enumerate(regex.finditer(data), 1):
+                        start = match.start()
+                        line += data[last:start].count(b"\n")
+                        last = start
+                        
+                        line_start = data.rfind(b"\n", 0, start) + 1
+                        line_end = data.find(b"\n", start)
+                        if line_end == -1:
+                            line_end = len(data)
+                        snippet = data[line_start:min(line_end, line_start + CONTENT_SEARCH_SNIPPET)]
+                        matches.append((path, line, snippet.decode("utf-8", "replace").strip()))
+                        if count >= per_file_limit:
+                            break
+        except (OSError, ValueError):
+            continue
+    return matches, len(paths)
+
+
+class ContentSearch:
+    """بحث متوازٍ في محتوى الملفات تحت مجلد باستخدام عدة عمليات"""
+
+    def __init__(self, root_dir, pattern, max_results=CONTENT_SEARCH_MAX_RESULTS):
+        self.root_dir = root_dir
+        self.pattern = pattern
+        self.max_results = max_results
+        self.results = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.files_scanned = 0
+        self.match_count = 0
+        # الدفعات التي فشلت عمليتها الفرعية فلم تُفحص ملفاتها
+        self.failed_batches = 0
+        self.failed_files = 0
+        self.batch_sizes = {}
+        self.error = None
+        self.finished = False
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def iter_batches(self):
+        """مجموعات من مسارات الملفات مع تجاهل المجلدات المخفية"""
+        batch = []
+        for folder, folders, files in os.walk(self.root_dir):
+            folders[:] = [name for name in folders if not name.startswith(".")]
+            for name in files:
+                batch.append(os.path.join(folder, name))
+                if len(batch) >= CONTENT_SEARCH_BATCH:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def run(self):
+        workers = os.cpu_count() or 2
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context())
+        pending = set()
+        try:
+            for batch in self.iter_batches():
+                if self.cancelled:
+                    break
+                future = pool.submit(search_files_batch, batch, self.pattern, CONTENT_SEARCH_PER_FILE)
+                self.batch_sizes[future] = len(batch)
+                pending.add(future)
+                # إبقاء عدد محدود من المهام في الانتظار حتى لا تتضخم الذاكرة
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self.collect(done)
+                    
+            while pending and not self.cancelled:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self.collect(done)
+        except Exception as e:
+            # مثل توقف إحدى العمليات الفرعية بشكل مفاجئ
+            self.error = e
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.finished = True
+
+    def collect(self, futures):
+        """نقل نتائج المهام المكتملة إلى طابور الواجهة حتى بلوغ الحد"""
+        for future in futures:
+            batch_size = self.batch_sizes.pop(future, 0)
+            try:
+                matches, scanned = future.result()
+            except Exception:
+                # لا تُسقط النتائج الناقصة بصمت: تُعد لتظهر في حالة البحث
+                self.failed_batches += 1
+                self.failed_files += batch_size
+                continue
+            self.files_scanned += scanned
+            for match in matches:
+                if self.match_count >= self.max_results:
+                    self.cancel()
+                    return
+                self.results.put(match)
+                self.match_count += 1
+
+
+def process_image(path, output_dir, options):
+    """تحجيم صورة واحدة وتحويلها وحفظها في مجلد الإخراج (تعمل في عملية فرعية)"""
+    max_size = options["max_size"]
+    with Image.open(path) as image:
+        target_format = options["format"] or image.format
+        if max_size:
+            # فك JPEG بدقة مخفضة مباشرة عندما يكون التصغير كبيرًا
+            image.draft("RGB", (max_size, max_size))
+        exif = image.info.get("exif")
+        icc_profile = image.info.get("icc_profile")
+        if options["strip_metadata"]:
+            # تطبيق اتجاه EXIF على البكسلات قبل حذفه حتى لا تنقلب الصورة
+            image = ImageOps.exif_transpose(image)
+        if max_size:
+            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if target_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+            
+        save_options = {}
+        if target_format in ("JPEG", "WEBP"):
+            save_options["quality"] = options["quality"]
+        if target_format == "JPEG":
+            save_options["optimize"] = True
+        if not options["strip_metadata"]:
+            if exif:
+                save_options["exif"] = exif
+            if icc_profile:
+                save_options["icc_profile"] = icc_profile
+                
+        # حجز اسم غير مستخدم حتى لا تتسابق العمليات على الاسم نفسه ولا يُستبدل الأصل
+        stem = os.path.splitext(os.path.basename(path))[0]
+        extension = IMAGE_BATCH_FORMATS.get(target_format, os.path.splitext(path)[1])
+        counter = 0
+        while True:
+            suffix = f" ({counter})" if counter else ""
+            output_path = os.path.join(output_dir, f"{stem}{suffix}{extension}")
+            try:
+                os.close(os.open(output_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                counter += 1
+                
+        try:
+            image.save(output_path, target_format, **save_options)
+        except Exception:
+            os.remove(output_path)
+            raise
+    return output_path, os.path.getsize(path), os.path.getsize(output_path)
+
+
+class ImageBatchJob(BackgroundJob):
+    """تحجيم الصور وتحويلها دفعة واحدة على كل الأنوية باستخدام عدة عمليات"""
+
+    def __init__(self, paths, output_dir, options):
+        super().__init__()
+        self.paths = paths
+        self.output_dir = output_dir
+        self.options = options
+        self.processed_files = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.output_paths = []
+        self.last_name = ""
+
+    def run(self):
+        workers = os.cpu_count() or 2
+        pool = None
+        pending = {}
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context())
+            for path in self.paths:
+                # الإيقاف المؤقت يمنع إرسال مهام جديدة فقط، وما بدأ يكتمل
+                self.resume_event.wait()
+                if self.cancelled:
+                    break
+                pending[pool.submit(process_image, path, self.output_dir, self.options)] = path
+                # إبقاء عدد محدود من المهام في الانتظار حتى تظهر النتائج تباعًا
+                if len(pending) >= workers * IMAGE_BATCH_QUEUE_PER_WORKER:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self.collect(done, pending)
+                    
+            while pending and not self.cancelled:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                self.collect(done, pending)
+        except Exception as e:
+            # مثل تعذر إنشاء مجلد الإخراج أو توقف إحدى العمليات الفرعية
+            self.errors.append((self.output_dir, str(e)))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.finished = True
+
+    def collect(self, futures, pending):
+        """تسجيل نتائج الصور المكتملة"""
+        for future in futures:
+            path = pending.pop(future)
+            try:
+                output_path, input_size, output_size = future.result()
+            except Exception as e:
+                self.errors.append((path, str(e)))
+                continue
+            self.output_paths.append(output_path)
+            self.processed_files += 1
+            self.input_bytes += input_size
+            self.output_bytes += output_size
+            self.last_name = os.path.basename(path)
+
+    def describe(self, format_size):
+        total = len(self.paths)
+        done = self.processed_files + len(self.errors)
+        elapsed = self.get_elapsed()
+        return (done / total if total else 0,
+                f"تمت معالجة {done} من {total} صورة: {self.last_name}",
+                f"{self.processed_files / elapsed:.1f} صورة/ث | {format_size(self.input_bytes / elapsed)}/ث | "
+                f"الوقت المتبقي: {self.format_eta(total - done, done / elapsed)}")
+
+
+# حد PIL الافتراضي لعدد البكسلات؛ يُقرأ من متغير عام في Image.open فيُرفع تحت قفل عند الحاجة فقط
+PIL_MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS
+IMAGE_OPEN_LOCK = threading.Lock()
+
+
+def open_image(path, max_pixels=None):
+    """فتح صورة بحد بكسلات خاص بهذا الاستدعاء، وبحد PIL الافتراضي إن لم يُحدد
+
+    كل فتح للصور في هذه العملية يمر بالقفل، فلا يرى خيط آخر الحد المرفوع أثناء فتح صورة للعارض.
+    """
+    with IMAGE_OPEN_LOCK:
+        Image.MAX_IMAGE_PIXELS = max_pixels or PIL_MAX_IMAGE_PIXELS
+        try:
+            return Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = PIL_MAX_IMAGE_PIXELS
+
+
+class ThumbnailCache:
+    """ذاكرة مؤقتة على القرص للصور المصغرة تستبعد الأقدم استخدامًا عند تجاوز الحجم"""
+
+    def __init__(self, directory=THUMBNAIL_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # المفتاح -> الحجم، من الأقدم استخدامًا إلى الأحدث
+        self.files = None
+        self.total_bytes = 0
+
+    @staticmethod
+    def get_key(path, size, mtime, thumb_size=THUMBNAIL_SIZE):
+        """مفتاح الصورة المصغرة من المسار والحجم وتاريخ التعديل"""
+        return hashlib.sha1(f"{path}|{size}|{mtime}|{thumb_size}".encode("utf-8", "surrogateescape")).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".png")
+
+    def load_index(self):
+        """قراءة محتويات المجلد مرة واحدة وترتيبها حسب آخر استخدام"""
+        if self.files is not None:
+            return
+        found = []
+        for folder, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".png"):
+                    continue
+                try:
+                    info = os.stat(os.path.join(folder, name))
+                except OSError:
+                    continue
+                found.append((info.st_mtime, name[:-len(".png")], info.st_size))
+        found.sort()
+        self.files = OrderedDict((key, size) for _, key, size in found)
+        self.total_bytes = sum(self.files.values())
+
+    def get(self, key):
+        """تحميل صورة مصغرة مخزنة أو None"""
+        path = self.get_path(key)
+        with self.lock:
+            self.load_index()
+            if key not in self.files:
+                return None
+            self.files.move_to_end(key)
+        try:
+            # تحديث تاريخ التعديل ليعكس آخر استخدام بين الجلسات
+            os.utime(path)
+            image = open_image(path)
+            image.load()
+            return image
+        except OSError:
+            return None
+
+    def put(self, key, image):
+        """حفظ صورة مصغرة على القرص ثم استبعاد الأقدم عند الحاجة"""
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(temp_path, "PNG")
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        
+        with self.lock:
+            self.load_index()
+            self.total_bytes += size - self.files.pop(key, 0)
+            self.files[key] = size
+            while self.total_bytes > self.max_bytes and len(self.files) > 1:
+                old_key, old_size = self.files.popitem(last=False)
+                self.total_bytes -= old_size
+                try:
+                    os.remove(self.get_path(old_key))
+                except OSError:
+                    pass
+
+
+def generate_thumbnail(path, size=THUMBNAIL_SIZE):
+    """توليد صورة مصغرة بأسرع مسار متاح في PIL"""
+    with open_image(path) as image:
+        # draft يفك ترميز JPEG بدقة مخفضة مباشرة، وreducing_gap يستخدم reduce() قبل إعادة التحجيم
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        return image.copy()
+
+
+class DecodedImageCache:
+    """ذاكرة مؤقتة مشتركة للصور المفكوكة، تحسب بالبايت ولا تستبعد صورة ما زالت نافذة تستخدمها"""
+
+    def __init__(self, max_bytes=DECODED_IMAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # المفتاح -> [الصورة، الحجم، عدد المراجع، متحركة]، من الأقدم استخدامًا إلى الأحدث
+        self.items = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(path):
+        """مفتاح الصورة من مسارها وحجمها وتاريخ تعديلها حتى لا تُعرض نسخة قديمة"""
+        info = os.stat(path)
+        return (os.path.abspath(path), info.st_size, info.st_mtime_ns)
+
+    def acquire(self, path):
+        """حجز صورة مفكوكة وإرجاع (المفتاح، الصورة، متحركة)؛ يجب تحريرها بـ release"""
+        key = self.get_key(path)
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                item[2] += 1
+                self.items.move_to_end(key)
+                self.hits += 1
+                return key, item[0], item[3]
+            self.misses += 1
+            
+        # فك الترميز خارج القفل، ومعه معرفة إن كانت متحركة حتى لا يُفتح الملف ثانية
+        with open_image(path, IMAGE_MAX_PIXELS) as source:
+            animated = getattr(source, "is_animated", False)
+            if source.mode in ("RGB", "RGBA", "L", "LA"):
+                image = source.copy()
+            else:
+                image = source.convert("RGBA")
+        image.load()
+        size = image.width * image.height * len(image.getbands())
+        
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                item[2] += 1
+                self.items.move_to_end(key)
+                return key, item[0], item[3]
+            self.items[key] = [image, size, 1, animated]
+            self.total_bytes += size
+            self.evict()
+        return key, image, animated
+
+    def release(self, key):
+        """تحرير مرجع نافذة للصورة؛ تبقى في الذاكرة المؤقتة حتى تُستبعد"""
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                item[2] -= 1
+            self.evict()
+
+    def evict(self):
+        """استبعاد الصور غير المحجوزة الأقدم استخدامًا (يُستدعى مع القفل)"""
+        for key in list(self.items):
+            if self.total_bytes <= self.max_bytes:
+                break
+            image, size, refs, animated = self.items[key]
+            if refs > 0:
+                continue
+            del self.items[key]
+            self.total_bytes -= size
+
+
+class ImagePyramid:
+    """هرم دقة متعددة المستويات للصورة، كل مستوى نصف أبعاد المستوى الذي قبله"""
+
+    def __init__(self, image):
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        self.levels = [image]
+        # صور كاملة محجَّمة مسبقًا بجودة عالية: التكبير -> الصورة
+        self.scaled = {}
+
+    def get_level(self, scale):
+        """أصغر مستوى لا تقل دقته عن المقياس المطلوب، يُبنى عند أول طلب"""
+        level = 0
+        while scale <= 0.5 ** (level + 1):
+            if level + 1 == len(self.levels):
+                previous = self.levels[-1]
+                if min(previous.size) < 2:
+                    break
+                self.levels.append(previous.reduce(2))
+            level += 1
+        return self.levels[level]
+
+    def prepare(self, zoom):
+        """تحجيم الصورة كاملة مسبقًا بتكبير معين لتُقتطع منها البلاطات دون إعادة تحجيم"""
+        if zoom not in self.scaled:
+            base = self.levels[0]
+            size = (max(1, int(base.width * zoom)), max(1, int(base.height * zoom)))
+            self.scaled[zoom] = self.get_level(zoom).resize(size, Image.Resampling.LANCZOS)
+        return self.scaled[zoom]
+
+
+def get_fit_zoom(image_size, fit_size):
+    """أكبر تكبير (بنسبة مئوية صحيحة) تلائم به الصورة المساحة دون تكبيرها فوق حجمها"""
+    percent = int(100 * min(fit_size[0] / image_size[0], fit_size[1] / image_size[1]))
+    return max(IMAGE_ZOOM_MIN, min(100, percent)) / 100
+
+
+class TiledImageCanvas:
+    """عرض صورة على كانفاس في بلاطات لا يُنشأ منها إلا ما يقع في منطقة العرض أو قربها"""
+
+    def __init__(self, canvas, image, pyramid=None, max_bytes=IMAGE_TILE_MAX_BYTES):
+        self.canvas = canvas
+        self.pyramid = pyramid or ImagePyramid(image)
+        self.width, self.height = image.size
+        self.max_bytes = max_bytes
+        self.zoom = 1.0
+        self.final = True
+        # (التكبير، الجودة، العمود، الصف) -> (PhotoImage، الحجم)، من الأقدم استخدامًا إلى الأحدث
+        self.tiles = OrderedDict()
+        self.total_bytes = 0
+        # البلاطات الموضوعة حاليًا على الكانفاس
+        self.placed = {}
+        self.render_id = None
+
+    def get_size(self):
+        """أبعاد الصورة المعروضة بالتكبير الحالي"""
+        return max(1, int(self.width * self.zoom)), max(1, int(self.height * self.zoom))
+
+    def set_zoom(self, zoom, final=True):
+        """تغيير التكبير؛ المعاينة أثناء السحب تستخدم أقرب جار بدل LANCZOS"""
+        self.zoom = zoom
+        self.final = final
+        width, height = self.get_size()
+        self.canvas.config(scrollregion=(0, 0, width, height))
+        self.render()
+
+    def schedule_render(self):
+        """دمج طلبات الرسم أثناء التمرير والسحب في رسم واحد لكل دورة خمول"""
+        if self.render_id is None:
+            self.render_id = self.canvas.after_idle(self.render)
+
+    def render(self):
+        """وضع البلاطات الظاهرة على الكانفاس وإزالة ما خرج من منطقة العرض"""
+        if self.render_id is not None:
+            self.canvas.after_cancel(self.render_id)
+            self.render_id = None
+            
+        width, height = self.get_size()
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        right = left + self.canvas.winfo_width()
+        bottom = top + self.canvas.winfo_height()
+        
+        first_column = max(0, int(left // IMAGE_TILE_SIZE) - IMAGE_TILE_OVERSCAN)
+        last_column = min((width - 1) // IMAGE_TILE_SIZE, int(right // IMAGE_TILE_SIZE) + IMAGE_TILE_OVERSCAN)
+        first_row = max(0, int(top // IMAGE_TILE_SIZE) - IMAGE_TILE_OVERSCAN)
+        last_row = min((height - 1) // IMAGE_TILE_SIZE, int(bottom // IMAGE_TILE_SIZE) + IMAGE_TILE_OVERSCAN)
+        
+        needed = set()
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                # البلاطة عالية الجودة إن وجدت أولى من المعاينة
+                key = (self.zoom, True, column, row)
+                if key not in self.tiles:
+                    key = (self.zoom, self.final, column, row)
+                needed.add(key)
+                photo = self.get_tile(key)
+                if key not in self.placed:
+                    self.placed[key] = self.canvas.create_image(
+                        column * IMAGE_TILE_SIZE, row * IMAGE_TILE_SIZE, anchor=tk.NW, image=photo
+                    )
+                    
+        for key in [key for key in self.placed if key not in needed]:
+            self.canvas.delete(self.placed.pop(key))
+        self.evict(needed)
+
+    def get_tile(self, key):
+        """إرجاع بلاطة من الذاكرة أو تحجيم منطقتها فقط من أقرب مستوى في الهرم"""
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key][0]
+            
+        zoom, final, column, row = key
+        width, height = self.get_size()
+        x0 = column * IMAGE_TILE_SIZE
+        y0 = row * IMAGE_TILE_SIZE
+        x1 = min(width, x0 + IMAGE_TILE_SIZE)
+        y1 = min(height, y0 + IMAGE_TILE_SIZE)
+        
+        scaled = self.pyramid.scaled.get(zoom) if final else None
+        if scaled is not None:
+            # الصورة محجَّمة مسبقًا بهذا التكبير، فالبلاطة مجرد اقتطاع
+            tile = scaled.crop((x0, y0, x1, y1))
+        else:
+            level = self.pyramid.get_level(zoom)
+            scale_x = level.width / width
+            scale_y = level.height / height
+            resample = Image.Resampling.LANCZOS if final else Image.Resampling.NEAREST
+            tile = level.resize((x1 - x0, y1 - y0), resample,
+                                box=(x0 * scale_x, y0 * scale_y, x1 * scale_x, y1 * scale_y))
+        
+        photo = ImageTk.PhotoImage(tile)
+        size = (x1 - x0) * (y1 - y0) * 4
+        self.tiles[key] = (photo, size)
+        self.total_bytes += size
+        return photo
+
+    def evict(self, needed):
+        """استبعاد البلاطات الأقدم استخدامًا خارج منطقة العرض عند تجاوز الحد"""
+        for key in list(self.tiles):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key in needed:
+                continue
+            _, size = self.tiles.pop(key)
+            self.total_bytes -= size
+
+    def close(self):
+        """إزالة البلاطات من الكانفاس وتحرير كل البلاطات المحولة"""
+        if self.render_id is not None:
+            self.canvas.after_cancel(self.render_id)
+            self.render_id = None
+        for item in self.placed.values():
+            self.canvas.delete(item)
+        self.tiles.clear()
+        self.placed.clear()
+        self.total_bytes = 0
+
+
+def get_frame_duration(info):
+    """مدة إطار الصورة المتحركة بالمللي ثانية من معلوماته في PIL"""
+    duration = info.get("duration") or ANIMATION_DEFAULT_DURATION
+    if duration < ANIMATION_MIN_DURATION:
+        return ANIMATION_DEFAULT_DURATION
+    return duration
+
+
+def advance_animation(index, due, now, durations, frame_count):
+    """الإطار الذي يُعرض عند now بعد انتهاء الإطار index في الموعد due، وموعد ظهوره"""
+    if now - due > ANIMATION_MAX_LAG:
+        due = now
+    index = (index + 1) % frame_count
+    
+    # تخطي الإطارات التي فات موعدها بالكامل للحفاظ على السرعة الأصلية
+    while index in durations and due + durations[index] / 1000 <= now:
+        due += durations[index] / 1000
+        index = (index + 1) % frame_count
+    return index, due
+
+
+class AnimatedImageCanvas:
+    """تشغيل صورة متحركة (GIF/APNG) على كانفاس بإطارات تُفك مسبقًا في خيط خلفي"""
+
+    def __init__(self, canvas, path, first_frame, max_bytes=ANIMATION_FRAME_MAX_BYTES):
+        self.canvas = canvas
+        self.path = path
+        self.first_frame = first_frame
+        self.width, self.height = first_frame.size
+        self.max_bytes = max_bytes
+        self.zoom = 1.0
+        self.final = True
+        # الإطارات المحولة: (التكبير، الجودة، الموضع) -> (PhotoImage، الحجم)، من الأقدم استخدامًا إلى الأحدث
+        self.photos = OrderedDict()
+        self.photo_bytes = 0
+        
+        # حالة مشتركة مع خيط فك الإطارات، محمية بالشرط
+        self.condition = threading.Condition()
+        self.frame_count = None
+        self.frames = {}
+        self.durations = {}
+        # المواضع الجاهزة كإطارات محولة بالتكبير الحالي لا تحتاج فكًا
+        self.ready = set()
+        self.wanted = 0
+        self.stopped = False
+        
+        self.index = 0
+        self.item = None
+        self.next_due = None
+        self.after_id = None
+        self.thread = threading.Thread(target=self.decode_frames, daemon=True)
+        self.thread.start()
+
+    def get_size(self):
+        """أبعاد الإطار المعروض بالتكبير الحالي"""
+        return max(1, int(self.width * self.zoom)), max(1, int(self.height * self.zoom))
+
+    def get_decode_window(self):
+        """المواضع التي يجب أن تكون مفكوكة بدءًا من الموضع المطلوب (يُستدعى مع القفل)"""
+        count = min(ANIMATION_DECODE_AHEAD, self.frame_count)
+        window = [(self.wanted + i) % self.frame_count for i in range(count)]
+        return [index for index in window if index not in self.ready or index not in self.durations]
+
+    def get_missing_frame(self):
+        """أول موضع في نافذة الفك لم يُفك بعد، مع التخلص من الإطارات خارجها (يُستدعى مع القفل)"""
+        window = self.get_decode_window()
+        for index in [index for index in self.frames if index not in window]:
+            del self.frames[index]
+        return next((index for index in window if index not in self.frames), None)
+
+    def decode_frames(self):
+        """فك الإطارات بالترتيب أمام موضع التشغيل، مع الانتظار عند امتلاء النافذة"""
+        try:
+            with open_image(self.path, IMAGE_MAX_PIXELS) as image:
+                with self.condition:
+                    self.frame_count = image.n_frames
+                    
+                while True:
+                    with self.condition:
+                        while True:
+                            if self.stopped:
+                                return
+                            missing = self.get_missing_frame()
+                            if missing is not None:
+                                break
+                            self.condition.wait()
+                            
+                    # الانتقال إلى الإطار التالي متسلسل ورخيص، والرجوع يعيد الفك من البداية
+                    image.seek(missing)
+                    frame = image.convert("RGBA")
+                    duration = get_frame_duration(image.info)
+                    with self.condition:
+                        self.frames[missing] = frame
+                        self.durations[missing] = duration
+        except (OSError, EOFError, ValueError, Image.DecompressionBombError):
+            # ملف تالف، أو إطار يتجاوز حد PIL عند الانتقال إليه: يبقى آخر إطار معروض ويتوقف التشغيل
+            with self.condition:
+                self.stopped = True
+
+    def get_photo(self, index):
+        """الإطار المحول بالتكبير الحالي، أو None إن لم يُفك بعد"""
+        key = (self.zoom, self.final, index)
+        if key in self.photos:
+            self.photos.move_to_end(key)
+            return self.photos[key][0]
+            
+        with self.condition:
+            frame = self.frames.get(index)
+            if frame is None and index == 0:
+                frame = self.first_frame
+            if frame is None:
+                self.wanted = index
+                self.condition.notify()
+                return None
+                
+        width, height = self.get_size()
+        if frame.size != (width, height):
+            resample = Image.Resampling.LANCZOS if self.final else Image.Resampling.NEAREST
+            frame = frame.resize((width, height), resample)
+        photo = ImageTk.PhotoImage(frame)
+        self.store_photo(key, photo, width * height * 4)
+        return photo
+
+    def store_photo(self, key, photo, size):
+        """حفظ إطار محول واستبعاد الأقدم استخدامًا عند تجاوز الحد، مع إبلاغ خيط الفك"""
+        self.photos[key] = (photo, size)
+        self.photo_bytes += size
+        with self.condition:
+            self.ready.add(key[2])
+            while self.photo_bytes > self.max_bytes and len(self.photos) > 1:
+                (zoom, final, old_index), (_, old_size) = self.photos.popitem(last=False)
+                self.photo_bytes -= old_size
+                if (zoom, final) == (self.zoom, self.final):
+                    self.ready.discard(old_index)
+            self.condition.notify()
+
+    def set_zoom(self, zoom, final=True):
+        """تغيير التكبير؛ المعاينة أثناء السحب تستخدم أقرب جار بدل LANCZOS"""
+        self.zoom = zoom
+        self.final = final
+        with self.condition:
+            self.ready = {index for (z, f, index) in self.photos if (z, f) == (zoom, final)}
+            self.condition.notify()
+        width, height = self.get_size()
+        self.canvas.config(scrollregion=(0, 0, width, height))
+        self.render()
+
+    def schedule_render(self):
+        # الإطار صورة واحدة تغطي منطقة التمرير، فلا حاجة لإعادة الرسم عند التمرير
+        pass
+
+    def render(self):
+        """عرض الإطار الحالي وبدء التشغيل عند أول رسم"""
+        photo = self.get_photo(self.index)
+        if photo is not None:
+            self.show_photo(photo)
+        if self.next_due is None:
+            self.next_due = time.monotonic()
+            self.after_id = self.canvas.after(ANIMATION_RETRY_DELAY, self.tick)
+
+    def show_photo(self, photo):
+        if self.item is None:
+            self.item = self.canvas.create_image(0, 0, anchor=tk.NW, image=photo)
+        else:
+            self.canvas.itemconfig(self.item, image=photo)
+
+    def tick(self):
+        """عرض الإطار التالي في موعده مع تصحيح الانحراف الزمني"""
+        self.after_id = None
+        with self.condition:
+            frame_count = self.frame_count
+            durations = dict(self.durations) if frame_count else {}
+        if frame_count is None or frame_count < 2 or self.index not in durations:
+            # عدد الإطارات أو مدة الإطار الحالي لم تُعرف بعد
+            if not self.stopped:
+                self.after_id = self.canvas.after(ANIMATION_RETRY_DELAY, self.tick)
+            return
+            
+        now = time.monotonic()
+        # موعد انتهاء الإطار الحالي هو موعد ظهور التالي
+        due = self.next_due + durations[self.index] / 1000
+        if now < due:
+            self.after_id = self.canvas.after(max(1, int((due - now) * 1000)), self.tick)
+            return
+        index, due = advance_animation(self.index, due, now, durations, frame_count)
+        
+        photo = self.get_photo(index)
+        if photo is None:
+            if self.stopped:
+                return
+            # الإطار لم يُفك بعد: إعادة المحاولة قريبًا دون إيقاف الواجهة
+            self.after_id = self.canvas.after(ANIMATION_RETRY_DELAY, self.tick)
+            return
+            
+        self.show_photo(photo)
+        self.index = index
+        self.next_due = due
+        with self.condition:
+            self.wanted = (index + 1) % frame_count
+            self.condition.notify()
+            
+        if index in durations:
+            delay = due + durations[index] / 1000 - time.monotonic()
+        else:
+            delay = 0
+        self.after_id = self.canvas.after(max(1, int(delay * 1000)), self.tick)
+
+    def close(self):
+        """إيقاف التشغيل وخيط الفك وتحرير الإطارات المحولة"""
+        with self.condition:
+            self.stopped = True
+            self.frames.clear()
+            self.condition.notify()
+        if self.after_id is not None:
+            self.canvas.after_cancel(self.after_id)
+            self.after_id = None
+        if self.item is not None:
+            self.canvas.delete(self.item)
+            self.item = None
+        self.photos.clear()
+        self.photo_bytes = 0
+
+
+class LineIndex:
+    """فهرس متباعد لبدايات الأسطر في ملف كبير، يُبنى في الخلفية فوق mmap"""
+
+    def __init__(self, path, stride=LINE_INDEX_STRIDE):
+        self.path = path
+        self.stride = stride
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        # mmap يرفض الملف الفارغ، وقد يُفرَّغ الملف بعد فحص حجمه قبل فتحه
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        # بداية كل سطر رقمه من مضاعفات stride، فالذاكرة ثابتة تقريبًا مهما كبر الملف
+        self.offsets = array("Q", [0])
+        self.line_count = 1
+        self.scanned = 0
+        self.finished = False
+        self.cancel_event = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        data = self.map
+        position = 0
+        lines = 1
+        try:
+            while position < self.size and not self.cancel_event.is_set():
+                end = min(self.size, position + LINE_INDEX_CHUNK)
+                found = []
+                newline = data.find(b"\n", position, end)
+                while newline != -1:
+                    if lines % self.stride == 0:
+                        found.append(newline + 1)
+                    lines += 1
+                    newline = data.find(b"\n", newline + 1, end)
+                self.offsets.extend(found)
+                self.line_count = lines
+                self.scanned = end
+                position = end
+        except ValueError:
+            # أُغلق الملف أثناء المسح
+            return
+        self.finished = not self.cancel_event.is_set()
+
+    def get_total_lines(self):
+        """عدد الأسطر، أو تقديره من نسبة ما مُسح أثناء بناء الفهرس"""
+        if self.finished or not self.scanned:
+            return self.line_count
+        return max(self.line_count, int(self.line_count * self.size / self.scanned))
+
+    def get_line_start(self, line):
+        """موضع بداية السطر: قفزة في الفهرس ثم أقل من stride بحث"""
+        offset = self.offsets[line // self.stride]
+        for _ in range(line % self.stride):
+            offset = self.map.find(b"\n", offset) + 1
+        return offset
+
+    def get_text(self, first, count, encoding="utf-8"):
+        """نص الأسطر [first, first + count) مع عدد الأسطر المقروءة فعلًا"""
+        # السطر الأخير المعروف قد لا يكون مكتملًا قبل انتهاء المسح
+        available = self.line_count - first - (0 if self.finished else 1)
+        count = max(0, min(count, available))
+        if not count:
+            return "", 0
+        start = self.get_line_start(first)
+        end = self.get_line_start(first + count) if first + count < self.line_count else self.size
+        end = min(end, start + LARGE_FILE_WINDOW_BYTES)
+        if end <= start:
+            return "", count
+        text = self.map[start:end].decode(encoding, errors="replace").replace("\r\n", "\n")
+        if text.endswith("\n"):
+            text = text[:-1]
+        return text, count
+
+    def close(self):
+        self.cancel_event.set()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+def count_words(text):
+    return len(text.split())
+
+
+class TextChangeTracker:
+    """وسيط لأمر ودجة النص يلتقط كل إدراج وحذف، فتُحدَّث الإحصاءات وسجل التراجع بفرق التعديل فقط"""
+
+    def __init__(self, text):
+        self.text = text
+        self.widget = str(text)
+        self.original = self.widget + "_original"
+        text.tk.call("rename", self.widget, self.original)
+        text.tk.createcommand(self.widget, self.dispatch)
+        # إحصاءات المستند
+        self.chars = 0
+        self.lines = 1
+        self.words = 0
+        # سجل التراجع: مجموعات من (نوع العملية، الموضع، النص)؛ تراجع Tk الداخلي لا يمر بأمر الودجة
+        self.undo_stack = []
+        self.redo_stack = []
+        self.separator = True
+        self.replaying = False
+        # يزداد مع كل تعديل، لمعرفة ما إذا تغير النص منذ لقطة معينة
+        self.version = 0
+        # آخر تعديل (النوع، الموضع، النص) ليعرف المستمعون الأسطر المتأثرة به
+        self.last_edit = None
+        # دوال تُستدعى بعد كل تعديل
+        self.listeners = []
+
+    def call(self, *args):
+        return self.text.tk.call((self.original,) + args)
+
+    def index(self, index):
+        return str(self.call("index", index))
+
+    def dispatch(self, command, *args):
+        if command == "insert" and len(args) >= 2:
+            self.apply_insert(args[0], args[1:])
+            return ""
+        if command == "delete" and args:
+            # الحذف المتعدد يُنفذ من آخر نطاق حتى لا تتغير مواضع ما قبله
+            for i in reversed(range(0, len(args), 2)):
+                self.apply_delete(args[i], args[i + 1] if i + 1 < len(args) else None)
+            return ""
+        if command == "replace" and len(args) >= 3:
+            start = self.index(args[0])
+            self.apply_delete(start, args[1])
+            self.apply_insert(start, args[2:], merge=True)
+            return ""
+        if command == "edit" and args:
+            action = args[0]
+            if action == "undo":
+                self.undo()
+                return ""
+            if action == "redo":
+                self.redo()
+                return ""
+            if action == "separator":
+                self.separator = True
+                return ""
+            if action == "reset":
+                self.undo_stack.clear()
+                self.redo_stack.clear()
+                self.separator = True
+                return ""
+            if action == "canundo":
+                return int(bool(self.undo_stack))
+            if action == "canredo":
+                return int(bool(self.redo_stack))
+        return self.call(command, *args)
+
+    def is_disabled(self):
+        return str(self.call("cget", "-state")) == tk.DISABLED
+
+    def apply_insert(self, index, pieces, merge=False):
+        """إدراج مع تحديث الإحصاءات من السطر المتأثر فقط"""
+        if self.is_disabled():
+            return
+        text = "".join(pieces[0::2])
+        index = self.index(index)
+        if self.call("compare", index, "==", "end"):
+            index = self.index("end-1c")
+        if not text:
+            return
+            
+        before = self.call("get", f"{index} linestart", f"{index} lineend")
+        self.call("insert", index, *pieces)
+        added_lines = text.count("\n")
+        after = self.call("get", f"{index} linestart", f"{index} linestart + {added_lines} lines lineend")
+        
+        self.chars += len(text)
+        self.lines += added_lines
+        self.words += count_words(after) - count_words(before)
+        self.record("insert", index, text, merge)
+
+    def apply_delete(self, index1, index2=None):
+        """حذف مع تحديث الإحصاءات من النص المحذوف والسطر المتأثر فقط"""
+        if self.is_disabled():
+            return
+        start = self.index(index1)
+        end = self.index(index2) if index2 is not None else self.index(f"{start}+1c")
+        # Tk لا يحذف السطر الجديد الأخير أبدًا
+        last = self.index("end-1c")
+        if self.call("compare", end, ">", last):
+            end = last
+        if not self.call("compare", start, "<", end):
+            return
+            
+        removed = self.call("get", start, end)
+        before = self.call("get", f"{start} linestart", f"{end} lineend")
+        self.call("delete", start, end)
+        after = self.call("get", f"{start} linestart", f"{start} lineend")
+        
+        self.chars -= len(removed)
+        self.lines -= removed.count("\n")
+        self.words += count_words(after) - count_words(before)
+        self.record("delete", start, removed, end=end)
+
+    def record(self, kind, index, text, merge=False, end=None):
+        """إضافة تعديل إلى سجل التراجع، ودمج الكتابة أو الحذف المتصل كما يفعل Tk"""
+        self.version += 1
+        self.last_edit = (kind, index, text)
+        if not self.replaying:
+            self.redo_stack.clear()
+            group = None if self.separator or not self.undo_stack else self.undo_stack[-1]
+            if group is not None and not merge:
+                last_kind, last_index, last_text = group[-1]
+                if kind == last_kind == "insert" and index == self.index(f"{last_index}+{len(last_text)}c"):
+                    group[-1] = (kind, last_index, last_text + text)
+                elif kind == last_kind == "delete" and index == last_index:
+                    group[-1] = (kind, last_index, last_text + text)
+                elif kind == last_kind == "delete" and end == last_index:
+                    group[-1] = (kind, index, text + last_text)
+                else:
+                    group = None
+            elif group is not None:
+                group.append((kind, index, text))
+            if group is None:
+                self.undo_stack.append([(kind, index, text)])
+            self.separator = False
+            
+        for listener in self.listeners:
+            listener()
+
+    def replay(self, group, reverse):
+        """تنفيذ مجموعة تعديلات أو عكسها دون تسجيلها من جديد"""
+        self.replaying = True
+        try:
+            for kind, index, text in (reversed(group) if reverse else group):
+                if (kind == "insert") == reverse:
+                    self.apply_delete(index, f"{index}+{len(text)}c")
+                else:
+                    self.apply_insert(index, (text,))
+        finally:
+            self.replaying = False
+        self.separator = True
+        self.call("mark", "set", "insert", group[0][1])
+        self.call("see", "insert")
+
+    def undo(self):
+        if self.undo_stack:
+            group = self.undo_stack.pop()
+            self.replay(group, reverse=True)
+            self.redo_stack.append(group)
+
+    def redo(self):
+        if self.redo_stack:
+            group = self.redo_stack.pop()
+            self.replay(group, reverse=False)
+            self.undo_stack.append(group)
+
+    def get_selection_length(self):
+        ranges = self.call("tag", "ranges", "sel")
+        if not ranges:
+            return 0
+        return int(self.call("count", "-chars", ranges[0], ranges[1]))
+
+    def close(self):
+        """إزالة أمر الوسيط بعد تدمير الودجة"""
+        try:
+            self.text.tk.deletecommand(self.widget)
+        except tk.TclError:
+            pass
+
+
+# علامات ترتيب البايتات؛ UTF-32 قبل UTF-16 لأن بدايتيهما متشابهتان
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# البايتات المقبولة في النصوص: المطبوعة ومحارف التحكم الشائعة (جدولة، أسطر، ESC…)
+TEXT_BYTES = bytes(sorted({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7F}))
+
+
+def get_file_stamp(path):
+    """(وقت التعديل، الحجم) لمعرفة ما إذا تغير الملف على القرص، أو None"""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def sniff_text_file(path, size=TEXT_SNIFF_SIZE):
+    """اكتشاف (ثنائي؟، الترميز) من بداية الملف فقط، فالملفات الضخمة لا تُقرأ كاملة"""
+    with open(path, "rb") as f:
+        head = f.read(size)
+    complete = len(head) < size
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            return False, encoding
+            
+    if b"\0" in head:
+        # UTF-16 بلا علامة: الأصفار كلها في المواضع الفردية أو الزوجية
+        half = len(head) // 2
+        even_zeros = head[0::2].count(0)
+        odd_zeros = head[1::2].count(0)
+        if odd_zeros > half // 4 and not even_zeros:
+            return False, "utf-16-le"
+        if even_zeros > half // 4 and not odd_zeros:
+            return False, "utf-16-be"
+        return True, None
+    if len(head.translate(None, TEXT_BYTES)) > len(head) * TEXT_MAX_CONTROL_RATIO:
+        return True, None
+        
+    try:
+        # آخر محرف قد يكون مقطوعًا عند حد القراءة
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=complete)
+        return False, "utf-8"
+    except UnicodeDecodeError:
+        pass
+    for encoding in TEXT_FALLBACK_ENCODINGS:
+        try:
+            head.decode(encoding)
+            return False, encoding
+        except UnicodeDecodeError:
+            continue
+    return True, None
+
+
+def format_hex_rows(data, offset, width=HEX_BYTES_PER_ROW):
+    """صفوف العرض الست عشري: الموضع، البايتات، ثم المحارف القابلة للطباعة"""
+    rows = []
+    for start in range(0, len(data), width):
+        chunk = data[start:start + width]
+        hex_part = " ".join(f"{byte:02x}" for byte in chunk)
+        text_part = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in chunk)
+        rows.append(f"{offset + start:08x}  {hex_part:<{width * 3 - 1}}  {text_part}")
+    return "\n".join(rows)
+
+
+class TextSearch:
+    """بحث أو استبدال في لقطة من نص المحرر في الخلفية
+
+    المصدر نص، أو مسار ملف كبير يُبحث فيه بالبايتات عبر mmap. مواضع التطابقات
+    تُحفظ كأسطر (تبدأ من 0) وأعمدة في مصفوفات، فتُعرض أثناء البحث وتبقى الذاكرة صغيرة.
+    """
+
+    def __init__(self, pattern, text=None, path=None, is_regex=False, ignore_case=False,
+                 replacement=None, max_matches=TEXT_SEARCH_MAX_MATCHES, encoding="utf-8"):
+        self.text = text
+        self.path = path
+        # علامة BOM تُضاف عند الترميز بـ utf-8-sig، ولا مكان لها في النمط
+        self.encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.is_regex = is_regex
+        self.replacement = replacement
+        self.max_matches = max_matches
+        pattern = pattern if is_regex else re.escape(pattern)
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        if path:
+            try:
+                pattern = pattern.encode(self.encoding)
+                if replacement is not None:
+                    self.replacement = replacement.encode(self.encoding)
+            except UnicodeEncodeError:
+                raise ValueError(f"لا يمكن تمثيل النمط بترميز الملف {self.encoding.upper()}") from None
+        # يرفع re.error أو ValueError في خيط الواجهة إذا كان النمط غير صالح
+        self.regex = re.compile(pattern, flags)
+        self.start_lines = array("Q")
+        self.start_columns = array("Q")
+        self.end_lines = array("Q")
+        self.end_columns = array("Q")
+        self.count = 0
+        # نتيجة الاستبدال: (بداية النطاق، نهايته، النص الجديد) بصيغة مواضع Tk
+        self.replaced = None
+        self.cancel_event = threading.Event()
+        self.error = None
+        self.finished = False
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            if self.path:
+                with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    def get_column(start, end):
+                        # الأعمدة في Tk بالأحرف لا بالبايتات
+                        return len(data[start:end].decode(self.encoding, errors="replace"))
+                        
+                    if self.replacement is not None:
+                        self.replace_all(data, b"\n", get_column)
+                    else:
+                        self.find_all(data, b"\n", get_column)
+            elif self.replacement is not None:
+                self.replace_all(self.text, "\n", lambda start, end: end - start)
+            else:
+                self.find_all(self.text, "\n", lambda start, end: end - start)
+        except (OSError, ValueError, re.error, IndexError, LookupError) as e:
+            self.error = e
+        finally:
+            self.text = None
+            self.finished = True
+
+    def find_all(self, data, newline, get_column):
+        """تسجيل موضع كل تطابق مع عدّ الأسطر بين التطابقات المتتالية فقط"""
+        line = 0
+        line_start = 0
+        last = 0
+        for match in self.regex.finditer(data):
+            if self.cancelled or self.count >= self.max_matches:
+                break
+            start, end = match.span()
+            if start == end:
+                continue
+            newlines = data[last:start].count(newline)
+            if newlines:
+                line += newlines
+                line_start = data.rfind(newline, last, start) + 1
+            last = start
+            column = get_column(line_start, start)
+            
+            spanned = data[start:end].count(newline)
+            if spanned:
+                end_line_start = data.rfind(newline, start, end) + 1
+                end_column = get_column(end_line_start, end)
+            else:
+                end_column = column + get_column(start, end)
+            self.start_lines.append(line)
+            self.start_columns.append(column)
+            self.end_lines.append(line + spanned)
+            self.end_columns.append(end_column)
+            self.count += 1
+
+    def replace_all(self, data, newline, get_column):
+        """بناء النص الجديد للنطاق الممتد من أول تطابق إلى آخره فقط"""
+        pieces = []
+        first = last_end = None
+        for match in self.regex.finditer(data):
+            if self.cancelled:
+                return
+            if first is None:
+                first = match.start()
+            else:
+                pieces.append(data[last_end:match.start()])
+            pieces.append(match.expand(self.replacement) if self.is_regex else self.replacement)
+            last_end = match.end()
+            self.count += 1
+        if first is None:
+            return
+            
+        def get_index(offset):
+            line = data[:offset].count(newline) + 1
+            column = get_column(data.rfind(newline, 0, offset) + 1, offset)
+            return f"{line}.{column}"
+            
+        new_text = newline[:0].join(pieces)
+        if self.path:
+            new_text = new_text.decode(self.encoding)
+        self.replaced = (get_index(first), get_index(last_end), new_text)
+
+    def find_at_or_after(self, line, column):
+        """رقم أول تطابق يبدأ عند الموضع أو بعده"""
+        count = self.count
+        index = bisect_left(self.start_lines, line, 0, count)
+        while index < count and self.start_lines[index] == line and self.start_columns[index] < column:
+            index += 1
+        return index
+
+
+PYTHON_BUILTINS = frozenset(dir(builtins))
+STRING_OPENER = re.compile(r"[A-Za-z]*(\'\'\'|\"\"\"|\'|\")")
+
+# قواعد اللغات غير Python: نمط واحد بمجموعات مسماة باسم لون الرمز، ومجموعات تفتح كتلة
+# تمتد عبر الأسطر (تعليق أو نص) مع نمط إغلاقها من بداية السطر التالي
+JS_KEYWORDS = ("break case catch class const continue debugger default delete do else export extends "
+               "finally for function if import in instanceof let new return super switch this throw try "
+               "typeof var void while with yield async await of static get set null true false undefined")
+JS_BUILTINS = "console window document Math JSON Promise Array Object String Number Boolean Date RegExp Error Map Set"
+SYNTAX_RULES = {
+    "javascript": (
+        re.compile(r"(?P<comment>//.*|/\*.*?\*/)|(?P<block_comment>/\*)"
+                   r"|(?P<string>\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)|(?P<block_template>`)"
+                   r"|(?P<number>\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b)"
+                   r"|(?P<keyword>\b(?:" + "|".join(JS_KEYWORDS.split()) + r")\b)"
+                   r"|(?P<builtin>\b(?:" + "|".join(JS_BUILTINS.split()) + r")\b)"),
+        {"block_comment": ("comment", re.compile(r".*?\*/")),
+         "block_template": ("string", re.compile(r"(?:\\.|[^`\\])*`"))},
+    ),
+    "css": (
+        re.compile(r"(?P<comment>/\*.*?\*/)|(?P<block_comment>/\*)"
+                   r"|(?P<string>\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')"
+                   r"|(?P<keyword>@[\w-]+|!important)"
+                   r"|(?P<property>[\w-]+(?=\s*:[^;{]*(?:;|}|$)))"
+                   r"|(?P<number>#[0-9a-fA-F]{3,8}\b|-?\d*\.?\d+(?:px|em|rem|%|vh|vw|s|ms|deg|fr)?)"),
+        {"block_comment": ("comment", re.compile(r".*?\*/"))},
+    ),
+    "html": (
+        re.compile(r"(?P<comment><!--.*?-->)|(?P<block_comment><!--)"
+                   r"|(?P<tag></?[A-Za-z][\w:-]*|/?>|<!DOCTYPE\b)"
+                   r"|(?P<attribute>[\w:-]+(?=\s*=))"
+                   r"|(?P<string>\"[^\"]*\"|'[^']*')"
+                   r"|(?P<entity>&#?\w+;)"),
+        {"block_comment": ("comment", re.compile(r".*?-->"))},
+    ),
+}
+
+
+def get_syntax_language(path):
+    """لغة التلوين المناسبة لامتداد الملف أو None"""
+    return SYNTAX_LANGUAGES.get(os.path.splitext(path)[1].lower()) if path else None
+
+
+def lex_python(lines, state):
+    """تقطيع أسطر Python بـ tokenize بدءًا من حالة أول سطر
+
+    الحالة هي علامة فتح النص متعدد الأسطر الذي يبدأ السطر داخله ("" خارج النصوص)،
+    فتُضاف العلامة قبل السطر الأول ليكمل tokenize النص من منتصفه.
+    """
+    tokens = [[] for _ in lines]
+    states = [""] * (len(lines) + 1)
+    states[0] = state
+    start = 0
+    prefix = state
+    
+    def get_position(position):
+        row, column = position
+        line = start + row - 1
+        if row == 1:
+            column = max(0, column - len(prefix))
+        return line, column
+        
+    def mark_string(first, last, opener):
+        for line in range(first + 1, last + 1):
+            states[line] = opener
+            
+    while start < len(lines):
+        source = prefix + "\n".join(lines[start:]) + "\n"
+        previous = None
+        try:
+            for token in tokenize.generate_tokens(io.StringIO(source).readline):
+                kind = None
+                if token.type == tokenize.COMMENT:
+                    kind = "comment"
+                elif token.type == tokenize.STRING:
+                    kind = "string"
+                elif token.type == tokenize.NUMBER:
+                    kind = "number"
+                elif token.type == tokenize.NAME:
+                    if previous is not None and previous.string in ("def", "class"):
+                        kind = "definition"
+                    elif previous is not None and previous.string == "@":
+                        kind = "decorator"
+                    elif keyword.iskeyword(token.string):
+                        kind = "keyword"
+                    elif token.string in PYTHON_BUILTINS:
+                        kind = "builtin"
+                elif token.type == tokenize.OP and token.string == "@" and (
+                        previous is None or previous.type in (tokenize.NEWLINE, tokenize.NL, tokenize.INDENT, tokenize.DEDENT)):
+                    kind = "decorator"
+                if token.type not in (tokenize.NL, tokenize.COMMENT):
+                    previous = token
+                if kind is None:
+                    continue
+                    
+                first, column = get_position(token.start)
+                last, end_column = get_position(token.end)
+                if last >= len(lines):
+                    last, end_column = len(lines) - 1, len(lines[-1])
+                tokens[first].append((kind, column, last, end_column))
+                if kind == "string" and last > first:
+                    mark_string(first, last, STRING_OPENER.match(token.string).group(1))
+            break
+        except tokenize.TokenError as e:
+            message, position = e.args
+            if "string" in message:
+                # نص متعدد الأسطر لم يُغلق ضمن هذه الأسطر: يمتد حتى آخرها
+                first, column = get_position(position)
+                opener = STRING_OPENER.match(source.split("\n")[position[0] - 1][position[1]:])
+                tokens[first].append(("string", column, len(lines) - 1, len(lines[-1])))
+                mark_string(first, len(lines), opener.group(1) if opener else '"""')
+            break
+        except SyntaxError as e:
+            # بدء التقطيع من منتصف الملف قد يخالف مستويات الإزاحة: يُستأنف من السطر المخالف
+            failed = start + (e.lineno or 1) - 1
+            start = failed if failed > start else start + 1
+            prefix = states[start]
+    return tokens, states
+
+
+def lex_rules(language, lines, state):
+    """تقطيع الأسطر بقواعد اللغة مع متابعة الكتل الممتدة عبر الأسطر"""
+    pattern, blocks = SYNTAX_RULES[language]
+    tokens = [[] for _ in lines]
+    states = [""] * (len(lines) + 1)
+    states[0] = state
+    for line_number, line in enumerate(lines):
+        position = 0
+        if state:
+            kind, closer = blocks[state]
+            match = closer.match(line)
+            if match is None:
+                tokens[line_number].append((kind, 0, line_number, len(line)))
+                states[line_number + 1] = state
+                continue
+            tokens[line_number].append((kind, 0, line_number, match.end()))
+            position = match.end()
+            state = ""
+        for match in pattern.finditer(line, position):
+            kind = match.lastgroup
+            if kind in blocks:
+                tokens[line_number].append((blocks[kind][0], match.start(), line_number, len(line)))
+                state = kind
+                break
+            tokens[line_number].append((kind, match.start(), line_number, match.end()))
+        states[line_number + 1] = state
+    return tokens, states
+
+
+class SyntaxLexJob:
+    """تقطيع مجموعة أسطر متتالية في الخلفية بدءًا من حالة المقطِّع المحفوظة لأولها"""
+
+    def __init__(self, language, first, lines, state, version):
+        self.language = language
+        self.first = first
+        self.lines = lines
+        self.state = state
+        self.version = version
+        # رموز كل سطر: (اللون، عمود البداية، سطر النهاية، عمود النهاية) بالنسبة لأول سطر
+        self.tokens = None
+        # حالة المقطِّع في بداية كل سطر، وآخرها الحالة بعد السطر الأخير
+        self.states = None
+        self.error = None
+        self.finished = False
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        try:
+            if self.language == "python":
+                self.tokens, self.states = lex_python(self.lines, self.state)
+            else:
+                self.tokens, self.states = lex_rules(self.language, self.lines, self.state)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.lines = None
+            self.finished = True
+
+
+def copy_file_owner(source_stat, source, destination):
+    """نقل المالك والسمات الموسعة إلى الملف البديل قدر ما تسمح الصلاحيات"""
+    if hasattr(os, "chown"):
+        try:
+            os.chown(destination, source_stat.st_uid, source_stat.st_gid)
+        except OSError:
+            pass
+    if hasattr(os, "listxattr"):
+        try:
+            for name in os.listxattr(source):
+                os.setxattr(destination, name, os.getxattr(source, name))
+        except OSError:
+            pass
+
+
+def write_file_atomic(path, data):
+    """كتابة الملف في ملف مؤقت بجانبه ثم استبداله دفعة واحدة حتى لا يبقى نصف مكتوب"""
+    # الاستبدال يحل محل الرابط الرمزي نفسه، فيُكتب الملف الذي يشير إليه
+    path = os.path.realpath(path)
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        current = None
+    if current is not None and current.st_nlink > 1:
+        # الاستبدال يفصل الروابط الصلبة الأخرى عن المحتوى الجديد: الكتابة في الملف نفسه
+        with open(path, "r+b") as f:
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        return
+        
+    directory = os.path.dirname(path)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if current is not None:
+            shutil.copymode(path, temp_path)
+            copy_file_owner(current, path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+        
+    # مزامنة المجلد حتى يثبت الاستبدال نفسه بعد انقطاع الكهرباء
+    try:
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+    except OSError:
+        pass
+
+
+class TextSaveJob:
+    """حفظ لقطة من نص المحرر في الخلفية بشكل ذري"""
+
+    def __init__(self, path, text, encoding="utf-8"):
+        self.path = path
+        self.text = text
+        self.encoding = encoding
+        self.error = None
+        self.finished = False
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        try:
+            write_file_atomic(self.path, self.text.encode(self.encoding))
+        except (OSError, UnicodeError) as e:
+            self.error = e
+        finally:
+            self.text = None
+            self.finished = True
+
+
+class RecoveryJournal:
+    """نسخة احتياطية دورية من نص المحرر غير المحفوظ تُعرض للاستعادة بعد الانهيار"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(RECOVERY_DIR, f"{uuid.uuid4().hex}.recovery")
+        # يمنع حذف النسخة أثناء كتابتها فتعود للظهور بعد الحذف
+        self.lock = threading.Lock()
+        self.writing = False
+        self.removed = False
+        # يزداد مع كل حذف؛ النص الملتقط قبل آخر حذف لا يُكتب، فلا تعود نسخة قديمة بعد الحفظ
+        self.generation = 0
+
+    @staticmethod
+    def find_pending():
+        """مسارات النسخ الاحتياطية المتبقية من جلسات سابقة"""
+        try:
+            names = sorted(os.listdir(RECOVERY_DIR))
+        except OSError:
+            return []
+        return [os.path.join(RECOVERY_DIR, name) for name in names if name.endswith(".recovery")]
+
+    @staticmethod
+    def load(path):
+        """قراءة (مسار الملف الأصلي، وقت النسخ، النص) من نسخة احتياطية"""
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            text = f.read()
+        return header["path"], header["saved_at"], text
+
+    def save(self, file_path, text):
+        """كتابة نسخة في الخلفية، وتجاهل الطلب إذا كانت نسخة سابقة لم تكتمل"""
+        if self.writing:
+            return False
+        self.writing = True
+        header = json.dumps({"path": file_path, "saved_at": time.time()}, ensure_ascii=False)
+        threading.Thread(target=self.write, args=(header + "\n" + text, self.generation), daemon=True).start()
+        return True
+
+    def write(self, data, generation):
+        try:
+            with self.lock:
+                if not self.removed and generation == self.generation:
+                    os.makedirs(RECOVERY_DIR, exist_ok=True)
+                    write_file_atomic(self.path, data.encode("utf-8"))
+        except OSError:
+            pass
+        finally:
+            self.writing = False
+
+    def remove(self, reusable=True):
+        """حذف النسخة بعد الحفظ؛ ويمكن الكتابة فيها مجددًا إلا عند إغلاق المحرر"""
+        # قبل انتظار القفل، حتى تتجاهل الكتابة المنتظرة نصها القديم
+        self.generation += 1
+        with self.lock:
+            self.removed = not reusable
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def get_tree_size(path):
+    """مجموع أحجام الملفات داخل مسار دون تتبع الروابط الرمزية"""
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(folder, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def get_file_digest(path):
+    """حساب بصمة BLAKE2 لمحتوى ملف"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class TextEditor:
+    """مستند واحد في المحرر النصي: ودجاته وحالته ودوال قوائمه"""
+
+    def __init__(self, app, file_path=None, recovery_file=None):
+        self.app = app
+        self.window = self.app.get_editor_window()
+        self.notebook = self.app.editor_notebook
+        self.frame = tk.Frame(self.notebook)
+        self.last_used = time.monotonic()
+        self.hibernated = False
+        
+        # متغير لتخزين مسار الملف الحالي
+        self.path = tk.StringVar(value=file_path if file_path else "")
+        
+        # وضع الملفات الكبيرة: فهرس الأسطر وأول سطر محمل في المحرر
+        self.line_index = None
+        self.first_line = 0
+        self.line_index_poll_id = None
+        self.recenter_id = None
+        self.encoding = "utf-8"
+        
+        # الحفظ في الخلفية والنسخ الاحتياطي الدوري
+        self.journal = RecoveryJournal(recovery_file)
+        self.save_job = None
+        self.pending_save = None
+        self.autosave_id = None
+        self.autosaved_version = 0
+        self.stamp = None
+                
+        # شريط القوائم: لكل مستند قائمته، وتُعرض قائمة التبويب النشط فقط
+        self.menu_bar = tk.Menu(self.window)
+        
+        # قائمة الملف
+        file_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="ملف", menu=file_menu)
+                
+        # إضافة العناصر لقائمة الملف
+        file_menu.add_command(label="جديد", command=self.new_file)
+        file_menu.add_command(label="فتح", command=self.open_file)
+        file_menu.add_command(label="حفظ", command=self.save_file)
+        file_menu.add_command(label="حفظ باسم", command=self.save_file_as)
+        file_menu.add_separator()
+        file_menu.add_command(label="خروج", command=self.close)
+        
+        # قائمة التحرير
+        edit_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="تحرير", menu=edit_menu)
+            
+        # إضافة العناصر لقائمة التحرير
+        edit_menu.add_command(label="قص", command=self.cut)
+        edit_menu.add_command(label="نسخ", command=self.copy)
+        edit_menu.add_command(label="لصق", command=self.paste)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="تحديد الكل", command=self.select_all)
+        edit_menu.add_command(label="الانتقال إلى سطر", command=self.ask_goto_line)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="بحث", command=self.show_find_bar)
+        edit_menu.add_command(label="استبدال", command=lambda: self.show_find_bar(replace=True))
+        
+        # شريط الأدوات
+        self.toolbar = tk.Frame(self.frame, bg="#F0F0F0")
+        self.toolbar.pack(fill=tk.X)
+        
+        # أزرار شريط الأدوات
+        tk.Button(self.toolbar, text="جديد", command=self.new_file).pack(side=tk.LEFT, padx=2, pady=2)
+        tk.Button(self.toolbar, text="فتح", command=self.open_file).pack(side=tk.LEFT, padx=2, pady=2)
+        tk.Button(self.toolbar, text="حفظ", command=self.save_file).pack(side=tk.LEFT, padx=2, pady=2)
+        
+        # إطار النص
+        text_frame = tk.Frame(self.frame)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # شريط رقم السطر: كانفاس تُرسم فيه أرقام الأسطر الظاهرة فقط
+        self.line_numbers = tk.Canvas(text_frame, width=40, bg='#F0F0F0', highlightthickness=0, takefocus=0)
+        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
+        self.gutter_state = None
+        self.gutter_rows = None
+        self.gutter_after_id = None
+        
+        # منطقة النص مع شريط تمرير
+        # التراجع يديره متتبع التعديلات حتى تمر كل التعديلات بالإحصاءات
+        self.text_area = scrolledtext.ScrolledText(
+            text_frame, wrap=tk.WORD, font=("Courier New", 12),
+            undo=False
+        )
+        self.text_area.pack(fill=tk.BOTH, expand=True)
+        self.tracker = TextChangeTracker(self.text_area)
+        self.text_area.bind("<Control-g>", self.ask_goto_line)
+        
+        self.gutter_font = tkfont.Font(font=self.text_area.cget("font"))
+        
+        # ربط تحديث أرقام الأسطر بالتمرير والتغيير وتغيير الحجم
+        self.text_area.config(yscrollcommand=self.on_text_yscroll)
+        self.text_area.bind("<Configure>", self.update_line_numbers, add="+")
+        self.text_area.bind("<KeyRelease>", self.update_line_numbers, add="+")
+        
+        # شريط الحالة
+        self.status_bar = tk.Label(self.frame, anchor=tk.W, bd=1, relief=tk.SUNKEN)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+            
+        self.status_after_id = None
+            
+        # ربط تحديث الحالة بأحداث المحرر
+        self.tracker.listeners.append(self.schedule_status)
+        self.text_area.bind("<KeyRelease>", self.update_status, add="+")
+        self.text_area.bind("<ButtonRelease-1>", self.update_status)
+        self.text_area.bind("<<Selection>>", lambda e: self.schedule_status(), add="+")
+        
+        # شريط البحث والاستبدال: البحث في الخلفية وتلوين التطابقات الظاهرة فقط
+        self.search = None
+        self.search_poll_id = None
+        self.search_restart_id = None
+        self.highlight_id = None
+        self.current_match = None
+        self.select_next_match = False
+        self.find_bar = tk.Frame(self.frame, bg="#F0F0F0")
+        self.find_var = tk.StringVar()
+        self.replace_var = tk.StringVar()
+        self.find_regex_var = tk.BooleanVar(value=False)
+        self.find_case_var = tk.BooleanVar(value=False)
+        
+        tk.Label(self.find_bar, text="بحث:", bg="#F0F0F0").grid(row=0, column=0, padx=2, pady=2, sticky=tk.E)
+        self.find_entry = tk.Entry(self.find_bar, textvariable=self.find_var, width=30)
+        self.find_entry.grid(row=0, column=1, padx=2, pady=2, sticky=tk.EW)
+        tk.Button(self.find_bar, text="السابق", command=self.find_previous).grid(row=0, column=2, padx=2, pady=2)
+        tk.Button(self.find_bar, text="التالي", command=self.find_next).grid(row=0, column=3, padx=2, pady=2)
+        tk.Checkbutton(self.find_bar, text="تعبير نمطي", variable=self.find_regex_var, bg="#F0F0F0",
+                       command=self.restart_search).grid(row=0, column=4, padx=2)
+        tk.Checkbutton(self.find_bar, text="مطابقة حالة الأحرف", variable=self.find_case_var, bg="#F0F0F0",
+                       command=self.restart_search).grid(row=0, column=5, padx=2)
+        tk.Button(self.find_bar, text="✕", relief=tk.FLAT, bg="#F0F0F0",
+                  command=self.hide_find_bar).grid(row=0, column=6, padx=2)
+        self.replace_label = tk.Label(self.find_bar, text="استبدال:", bg="#F0F0F0")
+        self.replace_entry = tk.Entry(self.find_bar, textvariable=self.replace_var, width=30)
+        self.replace_button = tk.Button(self.find_bar, text="استبدال", command=self.replace_current)
+        self.replace_all_button = tk.Button(self.find_bar, text="استبدال الكل", command=self.replace_all)
+        self.find_count_label = tk.Label(self.find_bar, anchor=tk.W, bg="#F0F0F0")
+        self.find_count_label.grid(row=0, column=7, padx=5, sticky=tk.W)
+        self.find_bar.columnconfigure(1, weight=1)
+        
+        self.text_area.tag_configure("search_match", background="#FFF59D")
+        self.text_area.tag_configure("search_current", background="#FFB74D")
+        self.text_area.tag_raise("sel")
+            
+        self.tracker.listeners.append(self.on_text_changed)
+        self.find_var.trace_add("write", self.schedule_search)
+        self.find_entry.bind("<Return>", self.find_next)
+        self.find_entry.bind("<Shift-Return>", self.find_previous)
+        self.find_entry.bind("<Escape>", self.hide_find_bar)
+        self.replace_entry.bind("<Return>", lambda e: self.replace_current())
+        self.replace_entry.bind("<Escape>", self.hide_find_bar)
+        self.text_area.bind("<Control-f>", lambda e: self.show_find_bar())
+        self.text_area.bind("<Control-h>", lambda e: self.show_find_bar(replace=True))
+        self.text_area.bind("<F3>", self.find_next)
+        self.text_area.bind("<Shift-F3>", self.find_previous)
+        
+        # تلوين الشيفرة: التقطيع في الخلفية على دفعات من الأسطر، مع حفظ حالة المقطِّع لبداية
+        # كل سطر حتى يُعاد تقطيع الأسطر المتأثرة بالتعديل فقط إلى أن تعود الحالة كما كانت
+        self.syntax_language = None
+        self.syntax_states = []
+        self.syntax_dirty = None
+        self.syntax_job = None
+        self.syntax_after_id = None
+        for name, color in SYNTAX_COLORS.items():
+            self.text_area.tag_configure(f"syntax_{name}", foreground=color)
+            # تحت التحديد وتلوين البحث
+            self.text_area.tag_lower(f"syntax_{name}")
+            
+                
+        self.tracker.listeners.append(self.on_syntax_edit)
+        
+        # الإسبات: تفريغ الودجة من نص تبويب غير نشط مع حفظ حالته، واستعادته عند العودة إليه
+        self.snapshot = None
+        self.snapshot_insert = "1.0"
+        self.snapshot_top = 0.0
+        self.snapshot_modified = False
+        self.snapshot_stats = None
+            
+        self.notebook.add(self.frame, text="ملف جديد")
+        self.app.editor_tabs.append(self)
+        
+        # فتح الملف إذا تم تحديده، أو استعادة النسخة الاحتياطية
+        if recovery_file:
+            try:
+                recovered_path, _, recovered_text = RecoveryJournal.load(recovery_file)
+                self.path.set(recovered_path)
+                self.text_area.insert(1.0, recovered_text)
+                self.text_area.edit_reset()
+                self.set_syntax_language(recovered_path)
+                self.update_title()
+            except (OSError, ValueError, KeyError) as e:
+                messagebox.showerror("خطأ", f"تعذر قراءة النسخة الاحتياطية: {e}")
+        elif file_path and not self.load_file(file_path):
+            # لا يُحفظ فوق ملف لم يُحمّل (ثنائي أو غير مقروء)
+            self.path.set("")
+            self.update_title()
+                
+        # التهيئة الأولية
+        self.update_title()
+        self.update_line_numbers()
+        self.update_status()
+        self.autosave_id = self.window.after(AUTOSAVE_INTERVAL, self.autosave)
+
+    # دالة تحديث العنوان
+    def update_title(self):
+        name = os.path.basename(self.path.get()) if self.path.get() else "ملف جديد"
+        if str(self.frame) in self.notebook.tabs():
+            self.notebook.tab(self.frame, text=name)
+        if self.notebook.select() == str(self.frame):
+            self.window.title(f"المحرر النصي - {name}")
+
+    # دوال قائمة الملف
+    def confirm_discard(self, question, action):
+        """سؤال الحفظ قبل تجاهل التغييرات؛ الإجراء يُنفذ بعد نجاح الحفظ فقط"""
+        if not self.text_area.edit_modified():
+            action()
+            return
+        response = messagebox.askyesnocancel("تنبيه", question, parent=self.window)
+        if response is None:  # إلغاء
+            return
+        if response:  # نعم
+            self.save_file(on_success=action)
+        else:
+            action()
+
+    def new_file(self):
+        self.confirm_discard("هل تريد حفظ التغييرات قبل فتح ملف جديد؟", self.clear_file)
+
+    def clear_file(self):
+        self.close_large_file()
+        self.text_area.delete(1.0, tk.END)
+        self.text_area.edit_reset()
+        self.path.set("")
+        self.text_area.edit_modified(False)
+        self.journal.remove()
+        self.set_syntax_language(None)
+        self.encoding = "utf-8"
+        self.update_title()
+
+    def open_file(self):
+        self.confirm_discard("هل تريد حفظ التغييرات قبل فتح ملف آخر؟", self.choose_file)
+
+    def choose_file(self):
+        file = filedialog.askopenfilename(
+            filetypes=[
+                ("ملفات نصية", "*.txt"), 
+                ("ملفات بايثون", "*.py"),
+                ("ملفات HTML", "*.html"),
+                ("جميع الملفات", "*.*")
+            ]
+        )
+        
+        if file and self.load_file(file):
+            self.path.set(file)
+            self.update_title()
+
+    def load_file(self, path):
+        """تحميل الملف كاملًا، أو في وضع الملفات الكبيرة إذا تجاوز الحد"""
+        try:
+            # الترميز والمحتوى الثنائي يُكتشفان من بداية الملف قبل قراءته كله
+            is_binary, encoding = sniff_text_file(path)
+            if is_binary:
+                if messagebox.askyesno("ملف ثنائي", "يبدو أن الملف ثنائي وليس نصيًا. هل تريد عرضه بالنظام الست عشري؟",
+                                       parent=self.window):
+                    self.app.open_hex_viewer(path)
+                return False
+            large = os.path.getsize(path) >= LARGE_FILE_THRESHOLD
+            if large and encoding.startswith(("utf-16", "utf-32")):
+                # فهرس الأسطر يبحث عن بايت السطر الجديد، وهو لا يصلح لهذه الترميزات
+                if messagebox.askyesno("ملف كبير", f"لا يمكن فتح ملف كبير بترميز {encoding.upper()} في المحرر. "
+                                       "هل تريد عرضه بالنظام الست عشري؟", parent=self.window):
+                    self.app.open_hex_viewer(path)
+                return False
+                
+            self.close_large_file()
+            if large:
+                self.set_syntax_language(None)
+                self.open_large_file(path, encoding)
+            else:
+                for candidate in (encoding,) + TEXT_FALLBACK_ENCODINGS:
+                    try:
+                        with open(path, "r", encoding=candidate) as f:
+                            text = f.read()
+                        encoding = candidate
+                        break
+                    except UnicodeDecodeError:
+                        # بداية الملف وحدها لم تكشف الترميز: تجربة البدائل على الملف كله
+                        continue
+                self.text_area.config(state=tk.NORMAL)
+                self.text_area.delete(1.0, tk.END)
+                self.text_area.insert(1.0, text)
+                self.text_area.edit_reset()
+                self.text_area.edit_modified(False)
+                self.set_syntax_language(path)
+            self.encoding = encoding
+            self.stamp = get_file_stamp(path)
+            # ملف جديد حُمّل في تبويب مُسبت تعذرت استعادته: لم تعد اللقطة تخصه
+            self.snapshot = None
+            self.hibernated = False
+            self.update_line_numbers()
+            self.update_status()
+            return True
+        except Exception as e:
+            messagebox.showerror("خطأ", f"حدث خطأ أثناء قراءة الملف: {e}")
+            return False
+
+    def save_file(self, on_success=None):
+        if self.line_index is not None:
+            messagebox.showinfo("حفظ", "الملفات الكبيرة تُفتح للقراءة فقط")
+            return
+        if self.hibernated:
+            messagebox.showinfo("حفظ", "تعذر تحميل نص هذا التبويب، فلا يمكن حفظه", parent=self.window)
+            return
+        if self.path.get():
+            self.start_save(self.path.get(), on_success)
+        else:
+            self.save_file_as(on_success)
+
+    def start_save(self, path, on_success=None):
+        """أخذ لقطة من النص وكتابتها في الخلفية دون تجميد المحرر"""
+        if self.save_job is not None:
+            # حفظ آخر ما زال جاريًا: يُعاد الحفظ بأحدث نص بعد انتهائه
+            self.pending_save = (path, on_success)
+            return
+        # end-1c يستبعد السطر الجديد الذي يضيفه Tk دائمًا في نهاية النص
+        job = TextSaveJob(path, self.text_area.get("1.0", "end-1c"), self.encoding)
+        self.save_job = job
+        job.start()
+        self.update_status()
+        self.window.after(SAVE_POLL_INTERVAL, lambda: self.poll_save(job, self.tracker.version, on_success))
+
+    def poll_save(self, job, version, on_success):
+        if not job.finished:
+            self.window.after(SAVE_POLL_INTERVAL, lambda: self.poll_save(job, version, on_success))
+            return
+        self.save_job = None
+        if not self.frame.winfo_exists():
+            return
+        if job.error is not None:
+            self.pending_save = None
+            messagebox.showerror("خطأ", f"حدث خطأ أثناء حفظ الملف: {job.error}", parent=self.window)
+            self.update_status()
+            return
+            
+        # النص المحفوظ هو اللقطة، فالتعديلات التي جاءت أثناء الحفظ تبقى غير محفوظة
+        if self.tracker.version == version:
+            self.text_area.edit_modified(False)
+            self.journal.remove()
+            self.stamp = get_file_stamp(job.path)
+        self.update_status()
+        if on_success is not None:
+            on_success()
+        if self.pending_save is not None:
+            path, pending_success = self.pending_save
+            self.pending_save = None
+            self.start_save(path, pending_success)
+
+    def save_file_as(self, on_success=None):
+        file = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[
+                ("ملفات نصية", "*.txt"), 
+                ("ملفات بايثون", "*.py"),
+                ("ملفات HTML", "*.html"),
+                ("جميع الملفات", "*.*")
+            ]
+        )
+        
+        if file:
+            if self.line_index is not None:
+                messagebox.showinfo("حفظ", "الملفات الكبيرة تُفتح للقراءة فقط")
+                return
+            self.path.set(file)
+            if get_syntax_language(file) != self.syntax_language:
+                self.set_syntax_language(file)
+            self.save_file(on_success)
+            self.update_title()
+
+    # دوال قائمة التحرير
+    def cut(self):
+        self.window.focus_get().event_generate("<<Cut>>")
+
+    def copy(self):
+        self.window.focus_get().event_generate("<<Copy>>")
+
+    def paste(self):
+        self.window.focus_get().event_generate("<<Paste>>")
+
+    def select_all(self):
+        self.text_area.tag_add(tk.SEL, "1.0", tk.END)
+        self.text_area.mark_set(tk.INSERT, "1.0")
+        self.text_area.see(tk.INSERT)
+
+    def ask_goto_line(self, event=None):
+        total = self.line_index.get_total_lines() if self.line_index else int(self.text_area.index("end-1c").split(".")[0])
+        line = simpledialog.askinteger("الانتقال إلى سطر", f"رقم السطر (1 - {total}):",
+                                       parent=self.window, minvalue=1, maxvalue=total)
+        if line is not None:
+            self.goto_line(line)
+        return "break"
+
+    def open_large_file(self, path, encoding="utf-8"):
+        """فتح ملف كبير للقراءة فقط مع تحميل الأسطر القريبة من منطقة العرض فقط"""
+        index = LineIndex(path)
+        index.start()
+        self.line_index = index
+        self.encoding = encoding
+        self.text_area.config(yscrollcommand=self.on_large_yscroll)
+        self.text_area.vbar.config(command=self.on_large_scrollbar)
+        self.load_line_window(0)
+        self.poll_line_index()
+        self.restart_search()
+
+    def close_large_file(self):
+        """إنهاء وضع الملفات الكبيرة وإعادة التمرير العادي"""
+        index = self.line_index
+        if index is None:
+            return
+        for name in ("line_index_poll_id", "recenter_id"):
+            if getattr(self, name) is not None:
+                self.window.after_cancel(getattr(self, name))
+                setattr(self, name, None)
+        index.close()
+        self.line_index = None
+        self.first_line = 0
+        self.text_area.config(state=tk.NORMAL, yscrollcommand=self.on_text_yscroll)
+        self.text_area.vbar.config(command=self.text_area.yview)
+
+    def load_line_window(self, first):
+        """استبدال محتوى المحرر بنافذة الأسطر التي تبدأ من first"""
+        text, count = self.line_index.get_text(first, LARGE_FILE_WINDOW_LINES, self.encoding)
+        self.first_line = first
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.delete(1.0, tk.END)
+        self.text_area.insert(1.0, text)
+        self.text_area.config(state=tk.DISABLED)
+        self.text_area.edit_reset()
+        self.text_area.edit_modified(False)
+
+    def goto_line(self, line):
+        """الانتقال إلى سطر (يبدأ من 1) دون المرور بما قبله"""
+        if self.line_index is not None:
+            self.load_line_window(max(0, line - 1 - LARGE_FILE_WINDOW_LINES // 2))
+            line -= self.first_line
+        self.text_area.mark_set(tk.INSERT, f"{line}.0")
+        self.text_area.yview(f"{line}.0")
+        self.update_line_numbers()
+        self.update_status()
+
+    def on_large_yscroll(self, first, last):
+        """تحويل موضع التمرير في النافذة المحملة إلى موضعه في الملف كله"""
+        index = self.line_index
+        total = max(1, index.get_total_lines())
+        top = self.first_line + int(self.text_area.index("@0,0").split(".")[0]) - 1
+        bottom = self.first_line + int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split(".")[0])
+        self.text_area.vbar.set(top / total, bottom / total)
+        
+        # إعادة تحميل النافذة حول منطقة العرض عند الاقتراب من أحد طرفيها
+        loaded = int(self.text_area.index("end-1c").split(".")[0])
+        near_start = self.first_line > 0 and top - self.first_line < LARGE_FILE_MARGIN_LINES
+        near_end = bottom - self.first_line > loaded - LARGE_FILE_MARGIN_LINES and self.first_line + loaded < index.line_count
+        if (near_start or near_end) and self.recenter_id is None:
+            self.recenter_id = self.window.after_idle(lambda: self.recenter_line_window(top))
+        self.update_line_numbers()
+        self.schedule_highlight()
+
+    def recenter_line_window(self, top):
+        self.recenter_id = None
+        if self.line_index is None:
+            return
+        self.load_line_window(max(0, top - LARGE_FILE_WINDOW_LINES // 2))
+        self.text_area.yview(f"{top - self.first_line + 1}.0")
+
+    def on_large_scrollbar(self, *args):
+        """سحب شريط التمرير ينتقل مباشرة إلى السطر المقابل في الملف"""
+        if args[0] == "moveto":
+            line = int(float(args[1]) * self.line_index.get_total_lines())
+            self.load_line_window(max(0, line - LARGE_FILE_WINDOW_LINES // 2))
+            self.text_area.yview(f"{line - self.first_line + 1}.0")
+        else:
+            self.text_area.yview(*args)
+
+    def poll_line_index(self):
+        """متابعة بناء فهرس الأسطر في الخلفية"""
+        self.line_index_poll_id = None
+        index = self.line_index
+        if index is None:
+            return
+        # تحميل ما لم يكن متاحًا عند فتح الملف
+        loaded = int(self.text_area.index("end-1c").split(".")[0])
+        if loaded < LARGE_FILE_WINDOW_LINES and self.first_line + loaded < index.line_count - 1:
+            top = self.first_line + int(self.text_area.index("@0,0").split(".")[0]) - 1
+            self.load_line_window(self.first_line)
+            self.text_area.yview(f"{top - self.first_line + 1}.0")
+        self.update_status()
+        if not index.finished:
+            self.line_index_poll_id = self.window.after(LINE_INDEX_POLL_INTERVAL, self.poll_line_index)
+
+    # دالة تحديث أرقام الأسطر
+    def update_line_numbers(self, event=None):
+        """جدولة تحديث أرقام الأسطر مرة واحدة لكل دورة خمول"""
+        if self.gutter_after_id is None:
+            self.gutter_after_id = self.window.after_idle(self.draw_line_numbers)
+
+    def draw_line_numbers(self):
+        """رسم أرقام الأسطر الظاهرة فقط، وفقط إذا تغير التمرير أو عدد الأسطر"""
+        self.gutter_after_id = None
+        if not self.text_area.winfo_exists():
+            return
+        height = self.text_area.winfo_height()
+        line_count = int(self.text_area.index("end-1c").split(".")[0])
+        state = (self.text_area.index("@0,0"), line_count, self.text_area.yview(), height, self.first_line)
+        if state == self.gutter_state:
+            return
+        self.gutter_state = state
+        
+        rows = self.get_visible_line_rows(height)
+        total = self.line_index.get_total_lines() if self.line_index else line_count
+        width = self.gutter_font.measure(str(total + self.first_line)) + 12
+        if rows == self.gutter_rows and width == int(self.line_numbers.cget("width")):
+            return
+        self.gutter_rows = rows
+        
+        self.line_numbers.config(width=width)
+        self.line_numbers.delete("all")
+        for y, number in rows:
+            self.line_numbers.create_text(width - 6, y, anchor=tk.NE, text=str(number), font=self.gutter_font, fill="#606060")
+
+    def get_visible_line_rows(self, height):
+        """(الموضع الرأسي، رقم السطر في الملف) لكل سطر ظاهر يبدأ داخل منطقة العرض"""
+        # السطر الملتف الذي بدأ فوق منطقة العرض لا رقم له، ونافذة الملف الكبير تُزاح بأول سطر فيها
+        first = int(self.text_area.index("@0,0").split(".")[0])
+        last = int(self.text_area.index(f"@0,{height}").split(".")[0])
+        rows = []
+        for line in range(first, last + 1):
+            info = self.text_area.dlineinfo(f"{line}.0")
+            if info is not None:
+                rows.append((info[1], line + self.first_line))
+        return rows
+
+    def on_text_yscroll(self, first, last):
+        self.text_area.vbar.set(first, last)
+        self.update_line_numbers()
+        self.schedule_highlight()
+
+    # تحديث شريط الحالة
+    def update_status(self, event=None):
+        cursor_position = self.text_area.index(tk.INSERT)
+        line, column = cursor_position.split('.')
+        
+        index = self.line_index
+        if index is not None:
+            # وضع الملفات الكبيرة: الحجم وعدد الأسطر من الفهرس بدل نص المحرر
+            line = self.first_line + int(line)
+            status_text = (f"السطر: {line} | العمود: {column} | الحجم: {self.app.get_human_readable_size(index.size)} | "
+                           f"الترميز: {self.encoding.upper()}")
+            if index.finished:
+                status_text += f" | عدد الأسطر: {index.line_count} | للقراءة فقط"
+            else:
+                status_text += f" | جارٍ فهرسة الأسطر… {int(index.scanned * 100 / index.size)}%"
+            self.status_bar.config(text=status_text)
+            return
+            
+        # الإحصاءات محدثة بفروق التعديلات، فلا يُنسخ النص هنا
+        status_text = (f"السطر: {line} | العمود: {column} | عدد الأحرف: {self.tracker.chars} | "
+                       f"الكلمات: {self.tracker.words} | الأسطر: {self.tracker.lines} | الترميز: {self.encoding.upper()}")
+        selection = self.tracker.get_selection_length()
+        if selection:
+            status_text += f" | المحدد: {selection}"
+        
+        if self.save_job is not None:
+            status_text += " | [جارٍ الحفظ…]"
+        elif self.text_area.edit_modified():
+            status_text += " | [غير محفوظ]"
+            
+        self.status_bar.config(text=status_text)
+
+    def schedule_status(self):
+        """تحديث شريط الحالة مرة واحدة بعد مجموعة تعديلات متتالية"""
+        if self.status_after_id is None:
+            self.status_after_id = self.window.after_idle(self.run_status_update)
+
+    def run_status_update(self):
+        self.status_after_id = None
+        if self.text_area.winfo_exists():
+            self.update_status()
+
+    def show_find_bar(self, replace=False):
+        if not self.find_bar.winfo_ismapped():
+            self.find_bar.pack(fill=tk.X, after=self.toolbar)
+        if replace:
+            self.replace_label.grid(row=1, column=0, padx=2, pady=2, sticky=tk.E)
+            self.replace_entry.grid(row=1, column=1, padx=2, pady=2, sticky=tk.EW)
+            self.replace_button.grid(row=1, column=2, padx=2, pady=2)
+            self.replace_all_button.grid(row=1, column=3, padx=2, pady=2)
+        # البحث عن النص المحدد إذا كان سطرًا واحدًا
+        selection = self.text_area.tag_ranges(tk.SEL)
+        if selection:
+            selected = self.text_area.get(selection[0], selection[1])
+            if selected and "\n" not in selected:
+                self.find_var.set(selected)
+        self.find_entry.focus_set()
+        self.find_entry.select_range(0, tk.END)
+        self.restart_search()
+        return "break"
+
+    def hide_find_bar(self, event=None):
+        self.stop_search()
+        self.clear_highlight()
+        for widget in (self.replace_label, self.replace_entry, self.replace_button, self.replace_all_button):
+            widget.grid_remove()
+        self.find_bar.pack_forget()
+        self.text_area.focus_set()
+        return "break"
+
+    def stop_search(self):
+        for name in ("search_poll_id", "search_restart_id"):
+            if getattr(self, name) is not None:
+                self.window.after_cancel(getattr(self, name))
+                setattr(self, name, None)
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+        self.current_match = None
+
+    def schedule_search(self, *args):
+        """إعادة البحث بعد توقف الكتابة في مربع البحث أو في النص"""
+        if not self.find_bar.winfo_ismapped():
+            return
+        if self.search_restart_id is not None:
+            self.window.after_cancel(self.search_restart_id)
+        self.search_restart_id = self.window.after(SEARCH_DEBOUNCE, self.restart_search)
+
+    def restart_search(self):
+        """بدء بحث جديد في لقطة من النص، أو في الملف كله في وضع الملفات الكبيرة"""
+        self.stop_search()
+        self.clear_highlight()
+        pattern = self.find_var.get()
+        if not self.find_bar.winfo_ismapped() or not pattern:
+            self.find_count_label.config(text="")
+            return
+        try:
+            if self.line_index is not None:
+                search = TextSearch(pattern, path=self.line_index.path, is_regex=self.find_regex_var.get(),
+                                    ignore_case=not self.find_case_var.get(), encoding=self.encoding)
+            else:
+                search = TextSearch(pattern, text=self.text_area.get("1.0", "end-1c"), is_regex=self.find_regex_var.get(),
+                                    ignore_case=not self.find_case_var.get())
+        except re.error as e:
+            self.find_count_label.config(text=f"تعبير نمطي غير صالح: {e}")
+            return
+        except ValueError as e:
+            self.find_count_label.config(text=str(e))
+            return
+        self.search = search
+        search.start()
+        self.poll_search(search)
+
+    def poll_search(self, search):
+        """عرض عدد التطابقات أثناء نموه وتلوين ما ظهر منها"""
+        self.search_poll_id = None
+        if self.search is not search:
+            return
+        self.highlight_visible()
+        if search.finished:
+            if search.error is not None:
+                self.find_count_label.config(text=f"خطأ: {search.error}")
+                return
+            if self.select_next_match:
+                self.select_next_match = False
+                self.find_next()
+            self.update_find_count()
+            return
+        self.find_count_label.config(text=f"{search.count} تطابق…")
+        self.search_poll_id = self.window.after(SEARCH_POLL_INTERVAL, lambda: self.poll_search(search))
+
+    def update_find_count(self):
+        search = self.search
+        if search is None:
+            return
+        if not search.count:
+            self.find_count_label.config(text="لا توجد نتائج")
+            return
+        text = f"{search.count} تطابق"
+        if self.current_match is not None:
+            text = f"{self.current_match + 1} من {text}"
+        if search.count >= search.max_matches:
+            text += " (تم بلوغ الحد الأقصى)"
+        self.find_count_label.config(text=text)
+
+    def on_text_changed(self):
+        # في وضع الملفات الكبيرة يُبحث في الملف نفسه، فتحميل نافذة أسطر جديدة لا يغير النتائج
+        if self.line_index is not None:
+            return
+        # مواضع التطابقات القديمة لم تعد صالحة بعد تعديل النص
+        if self.search is not None:
+            self.stop_search()
+            self.clear_highlight()
+        self.schedule_search()
+
+    def clear_highlight(self):
+        self.text_area.tag_remove("search_match", "1.0", tk.END)
+        self.text_area.tag_remove("search_current", "1.0", tk.END)
+
+    def schedule_highlight(self):
+        if self.search is not None and self.highlight_id is None:
+            self.highlight_id = self.window.after_idle(self.highlight_visible)
+
+    def highlight_visible(self):
+        """تلوين التطابقات في الأسطر الظاهرة فقط بدل وسم كل تطابقات الملف"""
+        self.highlight_id = None
+        search = self.search
+        if search is None or not self.text_area.winfo_exists():
+            return
+        self.text_area.tag_remove("search_match", "1.0", tk.END)
+        offset = self.first_line
+        first = int(self.text_area.index("@0,0").split(".")[0]) - 1 + offset
+        last = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split(".")[0]) - 1 + offset
+        loaded = int(self.text_area.index("end-1c").split(".")[0]) + offset
+        index = search.find_at_or_after(first, 0)
+        while index < search.count and search.start_lines[index] <= last:
+            if search.end_lines[index] < loaded:
+                self.text_area.tag_add("search_match", self.get_match_index(search, index, "start"),
+                                  self.get_match_index(search, index, "end"))
+            index += 1
+
+    def get_match_index(self, search, index, side):
+        """موضع طرف تطابق داخل النص المحمل في المحرر"""
+        if side == "start":
+            line, column = search.start_lines[index], search.start_columns[index]
+        else:
+            line, column = search.end_lines[index], search.end_columns[index]
+        return f"{line - self.first_line + 1}.{column}"
+
+    def get_cursor_position(self, mark):
+        line, column = self.text_area.index(mark).split(".")
+        return int(line) - 1 + self.first_line, int(column)
+
+    def select_match(self, index):
+        search = self.search
+        line = search.start_lines[index]
+        loaded = int(self.text_area.index("end-1c").split(".")[0])
+        if self.line_index is not None and not self.first_line <= line < self.first_line + loaded - 1:
+            self.goto_line(line + 1)
+        start = self.get_match_index(search, index, "start")
+        end = self.get_match_index(search, index, "end")
+        self.current_match = index
+        self.text_area.tag_remove("search_current", "1.0", tk.END)
+        self.text_area.tag_add("search_current", start, end)
+        self.text_area.tag_remove(tk.SEL, "1.0", tk.END)
+        self.text_area.tag_add(tk.SEL, start, end)
+        self.text_area.mark_set(tk.INSERT, end)
+        self.text_area.see(start)
+        self.update_find_count()
+
+    def find_next(self, event=None):
+        search = self.search
+        if search is not None and search.count:
+            line, column = self.get_cursor_position(tk.INSERT)
+            index = search.find_at_or_after(line, column)
+            self.select_match(index if index < search.count else 0)
+        return "break"
+
+    def find_previous(self, event=None):
+        search = self.search
+        if search is not None and search.count:
+            selection = self.text_area.tag_ranges(tk.SEL)
+            line, column = self.get_cursor_position(selection[0] if selection else tk.INSERT)
+            index = search.find_at_or_after(line, column) - 1
+            self.select_match(index if index >= 0 else search.count - 1)
+        return "break"
+
+    def replace_current(self):
+        """استبدال التطابق المحدد ثم الانتقال إلى التالي بعد إعادة البحث"""
+        if self.line_index is not None:
+            messagebox.showinfo("استبدال", "الملفات الكبيرة تُفتح للقراءة فقط", parent=self.window)
+            return
+        search = self.search
+        index = self.current_match
+        if search is None or index is None:
+            self.find_next()
+            return
+        start = self.get_match_index(search, index, "start")
+        end = self.get_match_index(search, index, "end")
+        match = search.regex.fullmatch(self.text_area.get(start, end))
+        if match is None:
+            self.find_next()
+            return
+        try:
+            new_text = match.expand(self.replace_var.get()) if search.is_regex else self.replace_var.get()
+        except (re.error, IndexError) as e:
+            messagebox.showerror("خطأ", f"نص استبدال غير صالح: {e}", parent=self.window)
+            return
+        self.text_area.edit_separator()
+        self.text_area.replace(start, end, new_text)
+        self.text_area.edit_separator()
+        self.text_area.mark_set(tk.INSERT, f"{start}+{len(new_text)}c")
+        self.select_next_match = True
+        self.restart_search()
+
+    def replace_all(self):
+        """استبدال كل التطابقات في الخلفية ثم تطبيقها كتعديل واحد يمكن التراجع عنه"""
+        if self.line_index is not None:
+            messagebox.showinfo("استبدال", "الملفات الكبيرة تُفتح للقراءة فقط", parent=self.window)
+            return
+        pattern = self.find_var.get()
+        if not pattern:
+            return
+        try:
+            job = TextSearch(pattern, text=self.text_area.get("1.0", "end-1c"), is_regex=self.find_regex_var.get(),
+                             ignore_case=not self.find_case_var.get(), replacement=self.replace_var.get())
+        except re.error as e:
+            messagebox.showerror("خطأ", f"تعبير نمطي غير صالح: {e}", parent=self.window)
+            return
+        except ValueError as e:
+            messagebox.showerror("خطأ", str(e), parent=self.window)
+            return
+        self.stop_search()
+        self.search = job
+        self.replace_all_button.config(state=tk.DISABLED)
+        job.start()
+        self.poll_replace(job, self.tracker.version)
+
+    def poll_replace(self, job, version):
+        self.search_poll_id = None
+        if self.search is not job:
+            self.replace_all_button.config(state=tk.NORMAL)
+            return
+        if not job.finished:
+            self.find_count_label.config(text=f"جارٍ الاستبدال… {job.count}")
+            self.search_poll_id = self.window.after(SEARCH_POLL_INTERVAL, lambda: self.poll_replace(job, version))
+            return
+        self.search = None
+        self.replace_all_button.config(state=tk.NORMAL)
+        if job.error is not None:
+            messagebox.showerror("خطأ", f"تعذر الاستبدال: {job.error}", parent=self.window)
+            self.restart_search()
+            return
+        if self.tracker.version != version:
+            # تغير النص أثناء الاستبدال فلم تعد المواضع صالحة
+            self.restart_search()
+            return
+        if job.replaced is not None:
+            # نطاق واحد من أول تطابق إلى آخره: تعديل واحد في المحرر وفي سجل التراجع
+            start, end, new_text = job.replaced
+            top = self.text_area.yview()[0]
+            self.text_area.edit_separator()
+            self.text_area.replace(start, end, new_text)
+            self.text_area.edit_separator()
+            self.text_area.mark_set(tk.INSERT, start)
+            self.text_area.yview_moveto(top)
+        # التعديل نفسه يجدول إعادة البحث بعد قليل
+        self.find_count_label.config(text=f"تم استبدال {job.count} تطابق")
+
+    def set_syntax_language(self, path):
+        """تفعيل تلوين لغة الملف (أو إيقافه) وإعادة تقطيع النص كله"""
+        if self.syntax_after_id is not None:
+            self.window.after_cancel(self.syntax_after_id)
+            self.syntax_after_id = None
+        self.syntax_job = None
+        for name in SYNTAX_COLORS:
+            self.text_area.tag_remove(f"syntax_{name}", "1.0", tk.END)
+        self.syntax_language = get_syntax_language(path)
+        if self.syntax_language is None:
+            self.syntax_states = []
+            self.syntax_dirty = None
+            return
+        line_count = int(self.text_area.index("end-1c").split(".")[0])
+        # None: حالة غير معروفة بعد، فلا يتوقف التقطيع عندها
+        self.syntax_states = [None] * line_count
+        self.syntax_states[0] = ""
+        self.syntax_dirty = (0, line_count - 1)
+        self.schedule_syntax()
+
+    def on_syntax_edit(self):
+        """تحديث حالات الأسطر بعد تعديل وتوسيع نطاق الأسطر المتسخة"""
+        if self.syntax_language is None or self.tracker.last_edit is None:
+            return
+        kind, index, text = self.tracker.last_edit
+        line = int(index.split(".")[0]) - 1
+        changed = text.count("\n")
+        states = self.syntax_states
+        if kind == "insert":
+            states[line + 1:line + 1] = [None] * changed
+            edited = (line, line + changed)
+        else:
+            del states[line + 1:line + 1 + changed]
+            changed = -changed
+            edited = (line, line)
+            
+        if self.syntax_dirty is not None:
+            first, last = self.syntax_dirty
+            if last > line:
+                last = max(line, last + changed)
+            edited = (min(first, edited[0]), max(last, edited[1]))
+        self.syntax_dirty = edited
+        self.schedule_syntax()
+
+    def schedule_syntax(self):
+        if self.syntax_after_id is None and self.syntax_job is None:
+            self.syntax_after_id = self.window.after(SYNTAX_DEBOUNCE, self.start_syntax_job)
+
+    def start_syntax_job(self):
+        """إرسال دفعة الأسطر التالية من النطاق المتسخ إلى التقطيع في الخلفية"""
+        self.syntax_after_id = None
+        if self.syntax_dirty is None or self.syntax_language is None:
+            return
+        line_count = int(self.text_area.index("end-1c").split(".")[0])
+        if len(self.syntax_states) != line_count:
+            # لا يُفترض حدوثه، لكن الحالات غير المتطابقة مع النص تعني إعادة التلوين كاملًا
+            self.set_syntax_language(self.path.get() or None)
+            return
+        first = min(self.syntax_dirty[0], line_count - 1)
+        last = min(line_count, first + SYNTAX_CHUNK_LINES)
+        lines = self.text_area.get(f"{first + 1}.0", f"{last}.end").split("\n")
+        job = SyntaxLexJob(self.syntax_language, first, lines, self.syntax_states[first], self.tracker.version)
+        self.syntax_job = job
+        job.start()
+        self.window.after(SYNTAX_POLL_INTERVAL, lambda: self.poll_syntax_job(job))
+
+    def poll_syntax_job(self, job):
+        if self.syntax_job is not job:
+            return
+        if not job.finished:
+            self.window.after(SYNTAX_POLL_INTERVAL, lambda: self.poll_syntax_job(job))
+            return
+        self.syntax_job = None
+        if job.error is not None:
+            self.set_syntax_language(None)
+            return
+        if self.tracker.version != job.version:
+            # تغير النص أثناء التقطيع: يُعاد من بداية النطاق المتسخ المحدث
+            self.schedule_syntax()
+            return
+        self.apply_syntax_job(job)
+
+    def apply_syntax_job(self, job):
+        """وضع ألوان الدفعة ثم التوقف إن عادت حالة المقطِّع إلى ما كانت عليه"""
+        first = job.first
+        count = len(job.tokens)
+        start = f"{first + 1}.0"
+        end = f"{first + count}.end"
+        ranges = {}
+        for offset, line_tokens in enumerate(job.tokens):
+            line = first + offset + 1
+            for kind, column, end_line, end_column in line_tokens:
+                ranges.setdefault(kind, []).extend((f"{line}.{column}", f"{first + end_line + 1}.{end_column}"))
+        # استدعاء واحد لكل لون بدل استدعاء لكل رمز
+        for name in SYNTAX_COLORS:
+            self.text_area.tag_remove(f"syntax_{name}", start, end)
+        for kind, indices in ranges.items():
+            self.text_area.tag_add(f"syntax_{kind}", *indices)
+            
+        states = self.syntax_states
+        dirty_last = self.syntax_dirty[1]
+        converged = False
+        for offset in range(1, min(count + 1, len(states) - first)):
+            line = first + offset
+            if line > dirty_last and states[line] == job.states[offset]:
+                converged = True
+                break
+            states[line] = job.states[offset]
+        if converged or first + count >= len(states):
+            self.syntax_dirty = None
+        else:
+            self.syntax_dirty = (first + count, max(dirty_last, first + count))
+            self.schedule_syntax()
+
+    def autosave(self):
+        """نسخ النص غير المحفوظ دوريًا إلى سجل الاستعادة"""
+        self.autosave_id = self.window.after(AUTOSAVE_INTERVAL, self.autosave)
+        if self.hibernated or self.line_index is not None or not self.text_area.edit_modified():
+            return
+        if self.tracker.version != self.autosaved_version:
+            if self.journal.save(self.path.get(), self.text_area.get("1.0", "end-1c")):
+                self.autosaved_version = self.tracker.version
+
+    def get_memory_estimate(self):
+        """تقدير ذاكرة المستند: النص وسجلات التراجع والإعادة"""
+        if self.line_index is not None:
+            # الملفات الكبيرة تحمّل نافذة محدودة من الأسطر أصلًا
+            return 0
+        history = sum(len(text) for group in self.tracker.undo_stack + self.tracker.redo_stack for _, _, text in group)
+        return self.tracker.chars + history
+
+    def hibernate(self):
+        """ضغط حالة المستند وتفريغ الودجة؛ النص غير المعدل يُعاد من القرص بدل ضغطه"""
+        if self.hibernated or self.line_index is not None or self.save_job is not None:
+            return False
+        path = self.path.get()
+        modified = self.text_area.edit_modified()
+        from_disk = bool(path) and not modified and self.stamp is not None \
+            and get_file_stamp(path) == self.stamp
+        text = None if from_disk else self.text_area.get("1.0", "end-1c")
+        if modified and self.tracker.version != self.autosaved_version:
+            # النسخة الاحتياطية لا تُحدَّث أثناء الإسبات، فتُكتب آخر نسخة الآن
+            if self.journal.save(path, text):
+                self.autosaved_version = self.tracker.version
+                
+        snapshot = {"text": text, "undo": self.tracker.undo_stack, "redo": self.tracker.redo_stack}
+        self.snapshot = zlib.compress(json.dumps(snapshot, ensure_ascii=False).encode("utf-8"))
+        self.snapshot_insert = self.text_area.index(tk.INSERT)
+        self.snapshot_top = self.text_area.yview()[0]
+        self.snapshot_modified = modified
+        self.snapshot_stats = (self.tracker.chars, self.tracker.lines, self.tracker.words)
+        
+        self.stop_search()
+        self.set_syntax_language(None)
+        # التفريغ عبر الأمر الأصلي للودجة فلا يُسجل تعديلًا في المتتبع
+        self.tracker.call("delete", "1.0", tk.END)
+        self.tracker.undo_stack = []
+        self.tracker.redo_stack = []
+        self.tracker.chars, self.tracker.lines, self.tracker.words = 0, 1, 0
+        # الودجة الفارغة لا تُحرر ولا تُحفظ حتى تُستعاد
+        self.text_area.config(state=tk.DISABLED)
+        self.hibernated = True
+        return True
+
+    def wake(self):
+        """استعادة النص والمؤشر والتمرير وسجل التراجع بعد الإسبات
+
+        إذا تعذرت قراءة الملف يبقى التبويب مُسبتًا وللقراءة فقط، فلا يُحفظ نص فارغ فوق الملف.
+        """
+        snapshot = json.loads(zlib.decompress(self.snapshot).decode("utf-8"))
+        text = snapshot["text"]
+        path = self.path.get()
+        if text is None and get_file_stamp(path) != self.stamp:
+            # تغير الملف على القرص أثناء الإسبات: تحميله من جديد بدل سجل تراجع لا يطابقه
+            return self.load_file(path)
+        if text is None:
+            try:
+                with open(path, "r", encoding=self.encoding) as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                messagebox.showerror("خطأ", f"تعذر إعادة تحميل الملف: {e}", parent=self.window)
+                return False
+                
+        self.snapshot = None
+        self.hibernated = False
+        self.text_area.config(state=tk.NORMAL)
+        self.tracker.call("insert", "1.0", text)
+        self.tracker.undo_stack = [[tuple(entry) for entry in group] for group in snapshot["undo"]]
+        self.tracker.redo_stack = [[tuple(entry) for entry in group] for group in snapshot["redo"]]
+        self.tracker.separator = True
+        self.tracker.chars, self.tracker.lines, self.tracker.words = self.snapshot_stats
+        self.text_area.edit_modified(self.snapshot_modified)
+        self.text_area.mark_set(tk.INSERT, self.snapshot_insert)
+        self.text_area.yview_moveto(self.snapshot_top)
+        self.set_syntax_language(path or None)
+        if self.find_bar.winfo_ismapped():
+            self.restart_search()
+        return True
+
+    def activate(self):
+        self.window.config(menu=self.menu_bar)
+        if self.hibernated:
+            self.wake()
+        self.update_title()
+        self.update_line_numbers()
+        self.update_status()
+        self.text_area.focus_set()
+
+    def close(self, on_closed=None):
+        # سؤال الحفظ يحتاج النص الحقيقي لا الودجة المفرغة
+        if self.hibernated and not self.wake():
+            # لا يفشل الاستعادة إلا نص غير معدل يُقرأ من القرص، فلا شيء يُفقد بالإغلاق
+            self.destroy(on_closed)
+            return
+        self.confirm_discard("هل تريد حفظ التغييرات قبل الإغلاق؟", lambda: self.destroy(on_closed))
+
+    def destroy(self, on_closed=None):
+        """إغلاق التبويب، والنافذة كلها إذا كان آخر مستند"""
+        self.window.after_cancel(self.autosave_id)
+        self.stop_search()
+        self.set_syntax_language(None)
+        self.journal.remove(reusable=False)
+        self.close_large_file()
+        self.app.editor_tabs.remove(self)
+        self.frame.destroy()
+        self.menu_bar.destroy()
+        self.tracker.close()
+        if not self.app.editor_tabs:
+            self.app.editor_window = None
+            self.app.close_window(self.window)
+        elif on_closed is not None:
+            on_closed()
+
 
 class ZUOperatingSystem:
     def __init__(self, root):
@@ -15,11 +4019,57 @@ class ZUOperatingSystem:
         self.root = root
         self.setup_main_window()
         self.setup_styles()
-        self.copied_file = None
+        self.clipboard_paths = []
         self.current_opened_windows = []
+        self.directory_scan = None
+        self.directory_watcher = None
+        self.dir_entries = []
+        self.selected_indices = set()
+        self.focus_index = None
+        self.view_offset = 0
+        self.current_dir = None
+        self.directory_cache = DirectoryCache()
+        self.history_back = []
+        self.history_forward = []
+        self.verify_copies = tk.BooleanVar(value=False)
+        self.file_jobs = []
+        self.use_trash = tk.BooleanVar(value=True)
+        # خيطا التفريغ والفهرسة يبدآن مع أول فتح لمتصفح الملفات لا مع تشغيل النظام
+        self.trash = Trash()
+        self.trash_undo_stack = []
+        self.file_index = FileIndex()
+        self.search_after_id = None
+        self.search_window = None
+        self.pending_select_name = None
+        self.view_mode = "list"
+        self.image_cache = DecodedImageCache()
+        self.thumbnail_cache = ThumbnailCache()
+        self.thumbnail_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+        self.thumbnail_results = queue.Queue()
+        self.thumbnail_photos = OrderedDict()
+        self.thumbnail_pending = set()
+        self.thumbnail_wanted = set()
+        # صور تعذر توليد مصغراتها، فلا تُطلب من جديد مع كل تمرير
+        self.thumbnail_failed = set()
+        self.thumbnail_after_id = None
+        self.grid_image_items = {}
+        self.editor_window = None
+        self.editor_notebook = None
+        self.editor_tabs = []
         self.create_taskbar()
         self.create_desktop()
         self.create_start_menu()
+        
+        # عرض عمليات النسخ التي انقطعت في الجلسة السابقة
+        self.root.after(500, self.offer_transfer_resume)
+        self.root.after(700, self.offer_text_recovery)
+        self.root.bind("<Destroy>", self.on_root_destroy)
+
+    def on_root_destroy(self, event):
+        """إيقاف عمليات النسخ الجارية عند إغلاق النظام مع حفظ نقاط استئنافها"""
+        if event.widget is self.root:
+            for job in self.file_jobs:
+                job.interrupt()
 
     def setup_main_window(self):
         """إعداد النافذة الرئيسية"""
@@ -41,7 +4091,7 @@ class ZUOperatingSystem:
         self.style = ttk.Style()
         self.style.configure("TButton", padding=6, relief="flat", background="#E1E1E1")
         self.style.configure("TFrame", background="#F0F0F0")
-        self.style.configure("Treeview", font=('Arial', 10))
+        self.style.configure("Treeview", font=('Arial', 10), rowheight=TREE_ROW_HEIGHT)
         self.style.configure("Treeview.Heading", font=('Arial', 10, 'bold'))
 
     def create_taskbar(self):
@@ -191,6 +4241,9 @@ class ZUOperatingSystem:
 
     def open_file_explorer(self):
         """فتح متصفح الملفات"""
+        # الحذف إلى السلة والبحث لا يُستخدمان إلا من متصفح الملفات
+        self.trash.start_reclaimer()
+        self.file_index.start()
         explorer_window = tk.Toplevel(self.root)
         explorer_window.title("متصفح الملفات")
         explorer_window.geometry("800x600")
@@ -201,6 +4254,13 @@ class ZUOperatingSystem:
         toolbar = tk.Frame(explorer_window, bg="#F0F0F0")
         toolbar.pack(fill=tk.X)
         
+        # أزرار التنقل في السجل
+        self.back_button = tk.Button(toolbar, text="⬅️ رجوع", command=self.go_back, state=tk.DISABLED)
+        self.back_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.forward_button = tk.Button(toolbar, text="➡️ تقدم", command=self.go_forward, state=tk.DISABLED)
+        self.forward_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # زر العودة للمجلد الأب
         back_button = tk.Button(toolbar, text="⬆️ للأعلى", command=lambda: self.go_up_directory())
         back_button.pack(side=tk.LEFT, padx=5, pady=5)
@@ -219,6 +4279,26 @@ class ZUOperatingSystem:
         go_button = tk.Button(toolbar, text="انتقال", command=self.navigate_to_path)
         go_button.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # مربع البحث في فهرس الملفات
+        tk.Label(toolbar, text="🔍", bg="#F0F0F0").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(toolbar, textvariable=self.search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5, pady=5)
+        search_entry.bind("<KeyRelease>", lambda e: self.schedule_search())
+        search_entry.bind("<Return>", lambda e: self.run_search())
+        
+        # زر التبديل بين القائمة والشبكة
+        self.view_mode_button = tk.Button(toolbar, text="▦ شبكة", command=self.toggle_view_mode)
+        self.view_mode_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # زر البحث في محتوى الملفات
+        content_search_button = tk.Button(toolbar, text="🔎 بحث في الملفات", command=self.open_content_search)
+        content_search_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # شريط الحالة لعرض تقدم التحميل وعدد العناصر
+        self.explorer_status = tk.Label(explorer_window, anchor=tk.W, bd=1, relief=tk.SUNKEN)
+        self.explorer_status.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # الإطار الرئيسي
         main_frame = tk.Frame(explorer_window)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -254,20 +4334,25 @@ class ZUOperatingSystem:
         content_frame = tk.Frame(main_frame)
         content_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
-        # شريط التمرير
-        scrollbar = tk.Scrollbar(content_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # إطار عرض القائمة
+        self.list_frame = tk.Frame(content_frame)
+        self.list_frame.pack(fill=tk.BOTH, expand=True)
         
-        # شجرة العرض مع أعمدة
-        self.tree = ttk.Treeview(content_frame, columns=("size", "type", "modified"), show="headings", yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.tree.yview)
+        # شريط التمرير يتحكم في نموذج القائمة وليس في عناصر الشجرة مباشرة
+        self.tree_scrollbar = tk.Scrollbar(self.list_frame, command=self.on_tree_scroll)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # شجرة العرض مع أعمدة، تحتوي فقط على الصفوف الظاهرة من النموذج
+        self.tree = ttk.Treeview(self.list_frame, columns=("name", "size", "type", "modified"), show="headings")
         
         # تهيئة الأعمدة
+        self.tree.heading("name", text="الاسم")
         self.tree.heading("size", text="الحجم")
         self.tree.heading("type", text="النوع")
         self.tree.heading("modified", text="تاريخ التعديل")
         
         # ضبط عرض الأعمدة
+        self.tree.column("name", width=250)
         self.tree.column("size", width=100, anchor="e")
         self.tree.column("type", width=100)
         self.tree.column("modified", width=150)
@@ -278,15 +4363,59 @@ class ZUOperatingSystem:
         self.tree.bind("<Double-1>", self.open_selected_item)
         self.tree.bind("<Button-3>", self.show_context_menu)
         
+        # مزامنة التحديد والتمرير مع نموذج القائمة الافتراضية
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<Button-1>", lambda e: self.selected_indices.clear() if self.tree.identify_row(e.y) else None)
+        self.tree.bind("<Shift-Button-1>", lambda e: None)
+        self.tree.bind("<Control-Button-1>", lambda e: None)
+        self.tree.bind("<Configure>", lambda e: self.render_visible_rows())
+        self.tree.bind("<MouseWheel>", self.on_tree_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_tree_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_tree_rows(3))
+        self.tree.bind("<Up>", lambda e: self.move_tree_focus(-1))
+        self.tree.bind("<Down>", lambda e: self.move_tree_focus(1))
+        self.tree.bind("<Prior>", lambda e: self.move_tree_focus(-self.get_visible_row_count()))
+        self.tree.bind("<Next>", lambda e: self.move_tree_focus(self.get_visible_row_count()))
+        self.tree.bind("<Home>", lambda e: self.move_tree_focus(-len(self.dir_entries)))
+        self.tree.bind("<End>", lambda e: self.move_tree_focus(len(self.dir_entries)))
+        self.tree.bind("<Control-a>", self.select_all_entries)
+        self.tree.bind("<Delete>", lambda e: self.delete_file())
+        self.tree.bind("<Control-z>", lambda e: self.undo_delete())
+        
+        # إطار عرض الشبكة بالصور المصغرة، لا يُرسم فيه إلا الخلايا الظاهرة
+        self.grid_frame = tk.Frame(content_frame)
+        grid_scrollbar = tk.Scrollbar(self.grid_frame)
+        grid_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.grid_canvas = tk.Canvas(
+            self.grid_frame, bg="white", highlightthickness=0,
+            yscrollincrement=GRID_TILE_HEIGHT // 4, yscrollcommand=grid_scrollbar.set
+        )
+        self.grid_canvas.pack(fill=tk.BOTH, expand=True)
+        grid_scrollbar.config(command=self.on_grid_scroll)
+        
+        self.grid_canvas.bind("<Configure>", lambda e: self.render_visible_rows())
+        self.grid_canvas.bind("<Button-1>", lambda e: self.on_grid_click(e, toggle=False))
+        self.grid_canvas.bind("<Control-Button-1>", lambda e: self.on_grid_click(e, toggle=True))
+        self.grid_canvas.bind("<Double-1>", self.open_selected_item)
+        self.grid_canvas.bind("<Button-3>", self.show_grid_context_menu)
+        self.grid_canvas.bind("<MouseWheel>", lambda e: self.on_grid_scroll("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.grid_canvas.bind("<Button-4>", lambda e: self.on_grid_scroll("scroll", -1, "units"))
+        self.grid_canvas.bind("<Button-5>", lambda e: self.on_grid_scroll("scroll", 1, "units"))
+        
         # قائمة السياق
         self.context_menu = tk.Menu(explorer_window, tearoff=0)
         self.context_menu.add_command(label="فتح", command=lambda: self.open_selected_item(None))
         self.context_menu.add_separator()
         self.context_menu.add_command(label="نسخ", command=self.copy_file)
         self.context_menu.add_command(label="لصق", command=self.paste_file)
+        self.context_menu.add_checkbutton(label="التحقق من النسخ بعد اللصق", variable=self.verify_copies)
         self.context_menu.add_command(label="إعادة تسمية", command=self.rename_file)
+        self.context_menu.add_command(label="معالجة الصور…", command=self.open_image_batch_dialog)
+        self.context_menu.add_command(label="عرض ست عشري", command=self.open_selected_hex_viewer)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="حذف", command=self.delete_file)
+        self.context_menu.add_command(label="تراجع عن الحذف", command=self.undo_delete)
+        self.context_menu.add_checkbutton(label="النقل إلى سلة المهملات عند الحذف", variable=self.use_trash)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="إنشاء مجلد", command=self.create_new_folder)
         self.context_menu.add_command(label="إنشاء ملف نصي", command=self.create_new_text_file)
@@ -295,54 +4424,635 @@ class ZUOperatingSystem:
         self.explorer_window = explorer_window
         
         # تحميل المجلد الحالي
+        self.history_back = []
+        self.history_forward = []
         self.current_dir = os.getcwd()
         self.load_directory(self.current_dir)
         
         # تحديث عنوان النافذة عند إغلاقها
-        explorer_window.protocol("WM_DELETE_WINDOW", lambda: self.close_window(explorer_window))
+        explorer_window.protocol("WM_DELETE_WINDOW", lambda: self.close_file_explorer(explorer_window))
+
+    def close_file_explorer(self, window):
+        """إغلاق متصفح الملفات مع إيقاف أي تحميل جارٍ"""
+        self.cancel_directory_load()
+        self.stop_directory_watcher()
+        self.stop_thumbnail_polling()
+        self.view_mode = "list"
+        self.close_window(window)
+
+    def load_directory(self, path, add_to_history=True, force=False):
+        """تحميل محتويات المجلد من الذاكرة المؤقتة أو في الخلفية"""
+        if not os.path.exists(path):
+            messagebox.showerror("خطأ", f"المسار غير موجود: {path}")
+            return
+            
+        # إلغاء أي تحميل سابق عند الانتقال إلى مجلد آخر
+        self.cancel_directory_load()
+        # إعادة التحميل تمنح الصور التي فشلت مصغراتها محاولة جديدة
+        self.thumbnail_failed.clear()
+        
+        # تسجيل المجلد السابق في سجل التنقل
+        if add_to_history and self.current_dir and self.current_dir != path:
+            self.history_back.append(self.current_dir)
+            del self.history_back[:-NAVIGATION_HISTORY_LIMIT]
+            self.history_forward.clear()
+        refreshing = path == self.current_dir
+        
+        # تحديث المتغيرات
+        self.current_dir = path
+        self.path_var.set(path)
+        self.explorer_window.title(f"متصفح الملفات - {path}")
+        self.update_navigation_buttons()
+        self.watch_directory(path)
+        
+        # عرض القائمة المخزنة فورًا ثم التحقق منها في الخلفية
+        cached = self.directory_cache.get(path)
+        if cached is not None:
+            signature, entries = cached
+            self.set_directory_entries(entries, keep_view=refreshing)
+            self.explorer_status.config(text=self.get_explorer_status_text("جارٍ التحقق…"))
+        else:
+            signature = None
+            self.set_directory_entries([])
+            self.explorer_status.config(text="جارٍ التحميل…")
+        
+        # مسح المجلد في خيط منفصل حتى لا تتجمد الواجهة
+        scan = DirectoryScan(path, signature, force)
+        self.directory_scan = scan
+        threading.Thread(target=self.scan_directory, args=(scan,), daemon=True).start()
+        scan.after_id = self.root.after(DIRECTORY_POLL_INTERVAL, lambda: self.poll_directory_scan(scan))
+
+    def watch_directory(self, path):
+        """بدء مراقبة المجلد المعروض لتطبيق تغييراته تلقائيًا"""
+        if self.directory_watcher is not None and self.directory_watcher.path == path:
+            return
+        self.stop_directory_watcher()
+        
+        watcher = DirectoryWatcher(path)
+        self.directory_watcher = watcher
+        watcher.start()
+        watcher.after_id = self.root.after(WATCH_UI_INTERVAL, lambda: self.poll_directory_watcher(watcher))
+
+    def stop_directory_watcher(self):
+        """إيقاف مراقبة المجلد الحالي"""
+        watcher = self.directory_watcher
+        if watcher is None:
+            return
+        watcher.stop()
+        if watcher.after_id is not None:
+            self.root.after_cancel(watcher.after_id)
+        self.directory_watcher = None
+
+    def poll_directory_watcher(self, watcher):
+        """تطبيق التغييرات التي رصدها المراقب على نموذج القائمة"""
+        if watcher is not self.directory_watcher:
+            return
+            
+        # تأجيل التغييرات حتى ينتهي أي مسح جارٍ حتى لا تُطبَّق على قائمة ستُستبدل
+        scan = self.directory_scan
+        if scan is None or scan.after_id is None:
+            try:
+                while True:
+                    changes = watcher.changes.get_nowait()
+                    if changes is None:
+                        self.load_directory(watcher.path, add_to_history=False, force=True)
+                        break
+                    signature, entries = changes
+                    self.apply_directory_changes(entries, signature)
+            except queue.Empty:
+                pass
+                
+        watcher.after_id = self.root.after(WATCH_UI_INTERVAL, lambda: self.poll_directory_watcher(watcher))
+
+    def update_directory_entries(self, names):
+        """تحديث صفوف عناصر محددة بعد عملية على الملفات دون إعادة تحميل المجلد"""
+        if any(os.path.dirname(name) for name in names):
+            self.load_directory(self.current_dir, add_to_history=False, force=True)
+            return
+        self.apply_directory_changes([(name, read_directory_entry(self.current_dir, name)) for name in names])
+
+    def apply_directory_changes(self, changes, signature=None):
+        """تطبيق تغييرات على مستوى الصفوف مع الحفاظ على التمرير والتحديد"""
+        # النموذج هو القائمة المخزنة نفسها، فيُحدَّث حجمها بعد تعديلها
+        if len(changes) > DIRECTORY_BULK_CHANGES:
+            self.apply_bulk_directory_changes(changes)
+            self.directory_cache.update(self.current_dir, self.dir_entries, signature)
+        else:
+            # تعديل صفوف قليلة لا يستدعي المرور على القائمة كلها لحساب حجمها
+            list_size = sys.getsizeof(self.dir_entries)
+            delta = self.apply_row_changes(changes) + sys.getsizeof(self.dir_entries) - list_size
+            self.directory_cache.update(self.current_dir, self.dir_entries, signature, delta)
+        self.render_visible_rows()
+        self.explorer_status.config(text=self.get_explorer_status_text())
+
+    def apply_row_changes(self, changes):
+        """حذف كل صف متغير وإدراجه في موضعه مع نقل تحديده، وإرجاع فرق حجم السجلات"""
+        delta = 0
+        for name, entry in changes:
+            index = self.find_entry_index(name)
+            if index is not None:
+                delta -= DirectoryCache.estimate_entry_size(self.dir_entries[index])
+            if entry is not None:
+                delta += DirectoryCache.estimate_entry_size(entry)
+            if index is not None and entry is not None and entry.is_dir == self.dir_entries[index].is_dir:
+                # تحديث الصف في مكانه
+                self.dir_entries[index] = entry
+                continue
+                
+            selected = False
+            if index is not None:
+                selected = index in self.selected_indices
+                self.remove_entry_at(index)
+            if entry is not None:
+                new_index = self.insert_entry(entry)
+                if selected:
+                    self.selected_indices.add(new_index)
+        return delta
+
+    def apply_bulk_directory_changes(self, changes):
+        """تطبيق عدد كبير من التغييرات بتمريرة واحدة على النموذج بدلاً من حذف كل صف وإدراجه"""
+        changed = dict(changes)
+        selected_names = {entry.name for entry in self.get_selected_entries()}
+        
+        entries = [entry for entry in self.dir_entries if entry.name not in changed]
+        entries.extend(entry for entry in changed.values() if entry is not None)
+        entries.sort(key=entry_sort_key)
+        
+        # التعديل في المكان نفسه حتى تبقى الذاكرة المؤقتة متزامنة
+        self.dir_entries[:] = entries
+        self.selected_indices = {i for i, entry in enumerate(entries) if entry.name in selected_names}
+        self.focus_index = None
+
+    def bisect_entries(self, key):
+        """البحث الثنائي عن موضع مفتاح ترتيب في نموذج القائمة"""
+        low, high = 0, len(self.dir_entries)
+        while low < high:
+            middle = (low + high) // 2
+            if entry_sort_key(self.dir_entries[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find_entry_index(self, name):
+        """موضع العنصر بالاسم في نموذج القائمة أو None"""
+        for is_dir in (True, False):
+            key = (not is_dir, name.lower())
+            index = self.bisect_entries(key)
+            while index < len(self.dir_entries) and entry_sort_key(self.dir_entries[index]) == key:
+                if self.dir_entries[index].name == name:
+                    return index
+                index += 1
+        return None
+
+    def remove_entry_at(self, index):
+        """حذف صف من النموذج مع إزاحة التحديد والتمرير"""
+        del self.dir_entries[index]
+        self.selected_indices = {i - 1 if i > index else i for i in self.selected_indices if i != index}
+        if self.focus_index is not None:
+            if self.focus_index == index:
+                self.focus_index = None
+            elif self.focus_index > index:
+                self.focus_index -= 1
+        if index < self.view_offset:
+            self.view_offset -= 1
+
+    def insert_entry(self, entry):
+        """إدراج سجل في موضعه المرتب مع إزاحة التحديد والتمرير"""
+        index = self.bisect_entries(entry_sort_key(entry))
+        self.dir_entries.insert(index, entry)
+        self.selected_indices = {i + 1 if i >= index else i for i in self.selected_indices}
+        if self.focus_index is not None and self.focus_index >= index:
+            self.focus_index += 1
+        if index < self.view_offset:
+            self.view_offset += 1
+        return index
+
+    def cancel_directory_load(self):
+        """إلغاء تحميل المجلد الجاري إن وجد"""
+        scan = self.directory_scan
+        if scan is None:
+            return
+        scan.cancel()
+        if scan.after_id is not None:
+            self.root.after_cancel(scan.after_id)
+            scan.after_id = None
+        self.directory_scan = None
+
+    def scan_directory(self, scan):
+        """قراءة محتويات المجلد وإرسالها على دفعات محدودة (تعمل في خيط الخلفية)"""
+        chunk = []
+        size = 0
+        try:
+            # أخذ التوقيع قبل المسح حتى لا تضيع التغييرات التي تحدث أثناءه
+            signature = DirectoryCache.get_signature(scan.path)
+            if signature == scan.signature and not scan.force:
+                scan.results.put(("valid", None))
+                return
+                
+            with os.scandir(scan.path) as entries:
+                for entry in entries:
+                    if scan.cancelled:
+                        return
+                        
+                    # إعادة استخدام نتيجة stat الخاصة بالعنصر بدلاً من استدعاءات إضافية
+                    try:
+                        is_dir = entry.is_dir()
+                        info = entry.stat()
+                        record = DirectoryEntry(entry.name, is_dir, 0 if is_dir else info.st_size, info.st_mtime)
+                    except OSError:
+                        record = DirectoryEntry(entry.name, False, 0, None)
+                        
+                    chunk.append(record)
+                    size += DirectoryCache.estimate_entry_size(record)
+                    if len(chunk) == DIRECTORY_PROGRESS_STEP:
+                        scan.results.put(("chunk", chunk))
+                        chunk = []
+        except Exception as e:
+            scan.results.put(("error", e))
+            return
+            
+        if chunk:
+            scan.results.put(("chunk", chunk))
+        scan.results.put(("done", (signature, size)))
+
+    def poll_directory_scan(self, scan):
+        """استلام نتائج المسح من خيط الخلفية"""
+        if scan is not self.directory_scan:
+            return
+            
+        try:
+            while True:
+                kind, payload = scan.results.get_nowait()
+                if kind == "chunk":
+                    scan.pending.extend(payload)
+                    count = len(scan.entries) + len(scan.pending)
+                    self.explorer_status.config(text=f"جارٍ تحميل {count} عنصر…")
+                elif kind == "error":
+                    self.directory_scan = None
+                    self.pending_select_name = None
+                    self.directory_cache.discard(scan.path)
+                    if scan.signature is None:
+                        # لا تبقى قائمة جزئية معروضة كأنها محتوى المجلد
+                        self.set_directory_entries([])
+                    self.explorer_status.config(text="")
+                    if isinstance(payload, PermissionError):
+                        messagebox.showerror("خطأ", f"ليس لديك صلاحية الوصول إلى المجلد: {scan.path}")
+                    else:
+                        messagebox.showerror("خطأ", f"تعذر تحميل المجلد: {payload}")
+                    return
+                elif kind == "valid":
+                    scan.after_id = None
+                    self.pending_select_name = None
+                    self.explorer_status.config(text=self.get_explorer_status_text())
+                    return
+                elif kind == "done":
+                    signature, size = payload
+                    scan.after_id = None
+                    self.merge_scanned_entries(scan)
+                    self.pending_select_name = None
+                    self.directory_cache.put(scan.path, signature, scan.entries, size + sys.getsizeof(scan.entries))
+                    self.explorer_status.config(text=self.get_explorer_status_text())
+                    return
+        except queue.Empty:
+            pass
+            
+        # المجلد غير المخزن يُعرض أولاً بأول؛ الدفعات تُدمج كلما بلغت نصف المعروض
+        # فيبقى مجموع إعادة الترتيب خطيًا تقريبًا في عدد العناصر
+        if scan.signature is None and len(scan.pending) >= max(DIRECTORY_PROGRESS_STEP, len(scan.entries) // 2):
+            self.merge_scanned_entries(scan)
+            
+        scan.after_id = self.root.after(DIRECTORY_POLL_INTERVAL, lambda: self.poll_directory_scan(scan))
+
+    def merge_scanned_entries(self, scan):
+        """دمج الدفعات المستلمة في قائمة المسح المرتبة وعرضها مع الحفاظ على التمرير والتحديد"""
+        if scan.pending:
+            entries = scan.entries + scan.pending
+            entries.sort(key=entry_sort_key)
+            scan.entries = entries
+            scan.pending = []
+        self.set_directory_entries(scan.entries, keep_view=True)
+
+    def set_directory_entries(self, entries, keep_view=False):
+        """استبدال نموذج القائمة وإعادة رسم الجزء الظاهر منه"""
+        if keep_view:
+            # الحفاظ على موضع التمرير والتحديد حسب أسماء العناصر
+            selected_names = {entry.name for entry in self.get_selected_entries()}
+            focus_name = None
+            if self.focus_index is not None and self.focus_index < len(self.dir_entries):
+                focus_name = self.dir_entries[self.focus_index].name
+                
+            self.dir_entries = entries
+            self.selected_indices = {i for i, entry in enumerate(entries) if entry.name in selected_names}
+            self.focus_index = next((i for i, entry in enumerate(entries) if entry.name == focus_name), None)
+        else:
+            self.dir_entries = entries
+            self.selected_indices = set()
+            self.focus_index = None
+            self.view_offset = 0
+            if self.view_mode == "grid":
+                self.grid_canvas.yview_moveto(0)
+            
+        # تحديد العنصر المطلوب بعد الانتقال من نتائج البحث، وقد يصل في أي دفعة من المسح
+        if self.pending_select_name is not None:
+            index = self.find_entry_index(self.pending_select_name)
+            if index is not None:
+                self.pending_select_name = None
+                self.selected_indices = {index}
+                self.focus_index = index
+                self.view_offset = max(0, index - self.get_visible_row_count() // 2)
+        self.render_visible_rows()
+
+    def get_explorer_status_text(self, suffix=""):
+        """نص شريط الحالة مع إحصاءات الذاكرة المؤقتة للمجلدات"""
+        cache = self.directory_cache
+        text = (f"{len(self.dir_entries)} عنصر | الذاكرة المؤقتة: {len(cache.items)} مجلد، "
+                f"{self.get_human_readable_size(cache.total_bytes)} | "
+                f"إصابات: {cache.hits} | إخفاقات: {cache.misses}")
+        if suffix:
+            text += f" | {suffix}"
+        return text
+
+    def format_entry_values(self, entry):
+        """تحويل سجل العنصر إلى قيم أعمدة الشجرة"""
+        if entry.mtime is None:
+            modified_time = ""
+        else:
+            modified_time = datetime.fromtimestamp(entry.mtime).strftime("%Y-%m-%d %H:%M")
+            
+        if entry.is_dir:
+            return ("📁 " + entry.name, "", "مجلد", modified_time)
+            
+        return (
+            self.get_file_icon(entry.name) + " " + entry.name,
+            self.get_human_readable_size(entry.size),
+            self.get_file_type(entry.name),
+            modified_time
+        )
+
+    def get_visible_row_count(self):
+        """عدد الصفوف التي تتسع لها الشجرة حاليًا"""
+        # طرح صف واحد لرأس الأعمدة
+        return max(1, self.tree.winfo_height() // TREE_ROW_HEIGHT - 1)
+
+    def render_visible_rows(self):
+        """رسم الجزء الظاهر من النموذج حسب طريقة العرض الحالية"""
+        if self.view_mode == "grid":
+            self.render_grid_tiles()
+        else:
+            self.render_tree_rows()
+
+    def render_tree_rows(self):
+        """رسم الصفوف الظاهرة فقط مع هامش صغير حولها"""
+        total = len(self.dir_entries)
+        visible = self.get_visible_row_count()
+        self.view_offset = max(0, min(self.view_offset, total - visible))
+        
+        start = max(0, self.view_offset - TREE_OVERSCAN)
+        end = min(total, self.view_offset + visible + TREE_OVERSCAN)
+        
+        self.tree.delete(*self.tree.get_children())
+        for index in range(start, end):
+            self.tree.insert("", "end", iid=str(index), values=self.format_entry_values(self.dir_entries[index]))
+            
+        # استعادة التحديد والتركيز من النموذج
+        self.tree.selection_set([str(i) for i in range(start, end) if i in self.selected_indices])
+        if self.focus_index is not None and start <= self.focus_index < end:
+            self.tree.focus(str(self.focus_index))
+            
+        # جعل أول صف ظاهر هو صف الإزاحة الحالية
+        self.tree.yview_moveto(0)
+        if self.view_offset > start:
+            self.tree.yview_scroll(self.view_offset - start, "units")
+            
+        if total:
+            self.tree_scrollbar.set(self.view_offset / total, min(1.0, (self.view_offset + visible) / total))
+        else:
+            self.tree_scrollbar.set(0, 1)
+
+    def scroll_tree_rows(self, delta):
+        """تمرير القائمة بعدد من الصفوف"""
+        self.view_offset += delta
+        self.render_visible_rows()
+        return "break"
+
+    def on_tree_scroll(self, *args):
+        """استجابة شريط التمرير لتحريك نافذة العرض في النموذج"""
+        if args[0] == "moveto":
+            self.view_offset = int(float(args[1]) * len(self.dir_entries))
+        elif args[0] == "scroll":
+            step = self.get_visible_row_count() if args[2] == "pages" else 1
+            self.view_offset += int(args[1]) * step
+        self.render_visible_rows()
+
+    def on_tree_mousewheel(self, event):
+        """التمرير بعجلة الفأرة في ويندوز وماك"""
+        return self.scroll_tree_rows(-3 if event.delta > 0 else 3)
+
+    def on_tree_select(self, event=None):
+        """مزامنة تحديد الصفوف المرسومة مع النموذج"""
+        selected = set(self.tree.selection())
+        for iid in self.tree.get_children():
+            if iid in selected:
+                self.selected_indices.add(int(iid))
+            else:
+                self.selected_indices.discard(int(iid))
+                
+        focus = self.tree.focus()
+        if focus:
+            self.focus_index = int(focus)
+
+    def move_tree_focus(self, delta):
+        """تحريك التحديد بلوحة المفاتيح عبر النموذج كاملاً"""
+        total = len(self.dir_entries)
+        if not total:
+            return "break"
+            
+        current = self.focus_index if self.focus_index is not None else self.view_offset - 1
+        new_index = max(0, min(total - 1, current + delta))
+        self.selected_indices = {new_index}
+        self.focus_index = new_index
+        
+        # إبقاء العنصر المحدد داخل الجزء الظاهر
+        visible = self.get_visible_row_count()
+        if new_index < self.view_offset:
+            self.view_offset = new_index
+        elif new_index >= self.view_offset + visible:
+            self.view_offset = new_index - visible + 1
+            
+        self.render_visible_rows()
+        return "break"
+
+    def toggle_view_mode(self):
+        """التبديل بين عرض القائمة وعرض الشبكة بالصور المصغرة"""
+        if self.view_mode == "list":
+            self.view_mode = "grid"
+            self.list_frame.pack_forget()
+            self.grid_frame.pack(fill=tk.BOTH, expand=True)
+            self.view_mode_button.config(text="☰ قائمة")
+            self.grid_canvas.yview_moveto(0)
+            self.poll_thumbnails()
+        else:
+            self.view_mode = "list"
+            self.stop_thumbnail_polling()
+            self.grid_frame.pack_forget()
+            self.list_frame.pack(fill=tk.BOTH, expand=True)
+            self.view_mode_button.config(text="▦ شبكة")
+        self.render_visible_rows()
+
+    def get_grid_columns(self):
+        return max(1, self.grid_canvas.winfo_width() // GRID_TILE_WIDTH)
+
+    def render_grid_tiles(self):
+        """رسم خلايا الشبكة الظاهرة وطلب صورها المصغرة فقط"""
+        canvas = self.grid_canvas
+        total = len(self.dir_entries)
+        columns = self.get_grid_columns()
+        rows = (total + columns - 1) // columns
+        canvas.config(scrollregion=(0, 0, columns * GRID_TILE_WIDTH, rows * GRID_TILE_HEIGHT))
+        
+        top = canvas.canvasy(0)
+        first_row = max(0, int(top // GRID_TILE_HEIGHT))
+        last_row = min(rows, int((top + canvas.winfo_height()) // GRID_TILE_HEIGHT) + 1)
+        
+        canvas.delete("tile")
+        self.grid_image_items = {}
+        wanted = set()
+        for index in range(first_row * columns, min(total, last_row * columns)):
+            entry = self.dir_entries[index]
+            row, column = divmod(index, columns)
+            x0 = column * GRID_TILE_WIDTH
+            y0 = row * GRID_TILE_HEIGHT
+            
+            fill = "#CCE8FF" if index in self.selected_indices else ""
+            canvas.create_rectangle(x0 + 2, y0 + 2, x0 + GRID_TILE_WIDTH - 2, y0 + GRID_TILE_HEIGHT - 2,
+                                    fill=fill, outline="", tags="tile")
+            center = (x0 + GRID_TILE_WIDTH // 2, y0 + 8 + THUMBNAIL_SIZE // 2)
+            
+            key = None
+            if not entry.is_dir and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                key = (os.path.join(self.current_dir, entry.name), entry.size, entry.mtime)
+                if key in self.thumbnail_failed:
+                    key = None
+                
+            if key is not None and key in self.thumbnail_photos:
+                self.thumbnail_photos.move_to_end(key)
+                canvas.create_image(*center, image=self.thumbnail_photos[key], tags="tile")
+            else:
+                icon = "📁" if entry.is_dir else self.get_file_icon(entry.name)
+                item = canvas.create_text(*center, text=icon, font=("Arial", 40), tags="tile")
+                if key is not None:
+                    wanted.add(key)
+                    self.grid_image_items[key] = (item, center)
+                    
+            name = entry.name if len(entry.name) <= 20 else entry.name[:18] + "…"
+            canvas.create_text(x0 + GRID_TILE_WIDTH // 2, y0 + THUMBNAIL_SIZE + 24, text=name,
+                               width=GRID_TILE_WIDTH - 10, font=("Arial", 9), tags="tile")
+                               
+        # العمال يتخطون الطلبات التي لم تعد ظاهرة
+        self.thumbnail_wanted = wanted
+        for key in wanted - self.thumbnail_pending:
+            self.thumbnail_pending.add(key)
+            self.thumbnail_pool.submit(self.load_thumbnail, key)
+
+    def load_thumbnail(self, key):
+        """تحميل صورة مصغرة من القرص أو توليدها (تعمل في خيط من مجموعة الخيوط)"""
+        image = None
+        failed = False
+        try:
+            if key in self.thumbnail_wanted:
+                path, size, mtime = key
+                cache_key = ThumbnailCache.get_key(path, size, mtime)
+                image = self.thumbnail_cache.get(cache_key)
+                if image is None:
+                    image = generate_thumbnail(path)
+                    self.thumbnail_cache.put(cache_key, image)
+        except Exception:
+            image = None
+            failed = True
+        self.thumbnail_results.put((key, image, failed))
+
+    def poll_thumbnails(self):
+        """تحويل الصور المصغرة الجاهزة إلى PhotoImage ووضعها في خلاياها"""
+        try:
+            while True:
+                key, image, failed = self.thumbnail_results.get_nowait()
+                self.thumbnail_pending.discard(key)
+                if failed:
+                    self.thumbnail_failed.add(key)
+                if image is None:
+                    continue
+                    
+                photo = ImageTk.PhotoImage(image)
+                self.thumbnail_photos[key] = photo
+                while len(self.thumbnail_photos) > THUMBNAIL_MEMORY_ITEMS:
+                    self.thumbnail_photos.popitem(last=False)
+                    
+                if key in self.grid_image_items:
+                    item, center = self.grid_image_items.pop(key)
+                    coords = self.grid_canvas.coords(item)
+                    self.grid_canvas.delete(item)
+                    if coords:
+                        self.grid_canvas.create_image(*center, image=photo, tags="tile")
+        except queue.Empty:
+            pass
+        self.thumbnail_after_id = self.root.after(50, self.poll_thumbnails)
+
+    def stop_thumbnail_polling(self):
+        """إيقاف استقبال الصور المصغرة عند مغادرة عرض الشبكة"""
+        if self.thumbnail_after_id is not None:
+            self.root.after_cancel(self.thumbnail_after_id)
+            self.thumbnail_after_id = None
+        self.thumbnail_wanted = set()
 
-    def load_directory(self, path):
-        """تحميل محتويات المجلد"""
-        if not os.path.exists(path):
-            messagebox.showerror("خطأ", f"المسار غير موجود: {path}")
+    def on_grid_scroll(self, *args):
+        """تمرير الشبكة ثم رسم الخلايا التي أصبحت ظاهرة"""
+        self.grid_canvas.yview(*args)
+        self.render_visible_rows()
+
+    def get_grid_index(self, event):
+        """موضع العنصر في النموذج تحت مؤشر الفأرة أو None"""
+        column = int(self.grid_canvas.canvasx(event.x) // GRID_TILE_WIDTH)
+        row = int(self.grid_canvas.canvasy(event.y) // GRID_TILE_HEIGHT)
+        columns = self.get_grid_columns()
+        index = row * columns + column
+        if column >= columns or index >= len(self.dir_entries):
+            return None
+        return index
+
+    def on_grid_click(self, event, toggle):
+        """تحديد خلية في الشبكة، مع Ctrl لإضافتها إلى التحديد"""
+        index = self.get_grid_index(event)
+        if index is None:
+            if not toggle:
+                self.selected_indices = set()
+        elif toggle:
+            self.selected_indices ^= {index}
+        else:
+            self.selected_indices = {index}
+        self.focus_index = index
+        self.render_visible_rows()
+
+    def show_grid_context_menu(self, event):
+        """عرض قائمة السياق لخلية في الشبكة"""
+        index = self.get_grid_index(event)
+        if index is None:
             return
-            
-        try:
-            # مسح المحتويات الحالية للشجرة
-            self.tree.delete(*self.tree.get_children())
-            
-            # تحديث المتغيرات
-            self.current_dir = path
-            self.path_var.set(path)
-            self.explorer_window.title(f"متصفح الملفات - {path}")
-            
-            # إضافة المجلدات أولاً ثم الملفات
-            folders = []
-            files = []
-            
-            for entry in os.scandir(path):
-                modified_time = datetime.fromtimestamp(os.path.getmtime(entry.path)).strftime("%Y-%m-%d %H:%M")
-                
-                if entry.is_dir():
-                    folders.append((entry.name, "", "مجلد", modified_time))
-                else:
-                    size = self.get_human_readable_size(os.path.getsize(entry.path))
-                    file_type = self.get_file_type(entry.name)
-                    files.append((entry.name, size, file_type, modified_time))
-            
-            # إضافة المجلدات بترتيب أبجدي
-            for name, size, file_type, modified in sorted(folders, key=lambda x: x[0].lower()):
-                self.tree.insert("", "end", values=("📁 " + name, size, file_type, modified))
-                
-            # إضافة الملفات بترتيب أبجدي
-            for name, size, file_type, modified in sorted(files, key=lambda x: x[0].lower()):
-                icon = self.get_file_icon(name)
-                self.tree.insert("", "end", values=(icon + " " + name, size, file_type, modified))
-                
-        except PermissionError:
-            messagebox.showerror("خطأ", f"ليس لديك صلاحية الوصول إلى المجلد: {path}")
-        except Exception as e:
-            messagebox.showerror("خطأ", f"تعذر تحميل المجلد: {e}")
+        if index not in self.selected_indices:
+            self.selected_indices = {index}
+            self.focus_index = index
+            self.render_visible_rows()
+        self.context_menu.post(event.x_root, event.y_root)
+
+    def select_all_entries(self, event=None):
+        """تحديد كل عناصر المجلد بما فيها غير الظاهرة"""
+        self.selected_indices = set(range(len(self.dir_entries)))
+        self.render_visible_rows()
+        return "break"
+
+    def get_selected_entries(self):
+        """إرجاع سجلات العناصر المحددة من النموذج"""
+        return [self.dir_entries[i] for i in sorted(self.selected_indices) if i < len(self.dir_entries)]
 
     def get_human_readable_size(self, size_bytes):
         """تحويل حجم الملف إلى صيغة مقروءة"""
@@ -411,34 +5121,225 @@ class ZUOperatingSystem:
 
     def open_selected_item(self, event):
         """فتح العنصر المحدد"""
-        selected_items = self.tree.selection()
-        if not selected_items:
+        selected_entries = self.get_selected_entries()
+        if not selected_entries:
             return
             
-        selected_item = selected_items[0]
-        item_data = self.tree.item(selected_item, "values")
-        item_name = item_data[0].split(" ", 1)[1]  # إزالة الأيقونة من الاسم
+        entry = selected_entries[0]
+        item_name = entry.name
         
         file_path = os.path.join(self.current_dir, item_name)
         
-        if "📁" in item_data[0]:  # إذا كان مجلد
+        if entry.is_dir:  # إذا كان مجلد
             self.load_directory(file_path)
         elif os.path.exists(file_path):  # إذا كان ملف
-            if file_path.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
-                self.open_image_viewer(file_path)
-            elif file_path.lower().endswith((".txt", ".py", ".html", ".css", ".js")):
-                self.open_text_editor(file_path)
+            if file_path.lower().endswith(IMAGE_EXTENSIONS):
+                # صور المجلد الحالي بترتيب العرض للتنقل بينها في العارض
+                image_paths = [
+                    os.path.join(self.current_dir, entry.name) for entry in self.dir_entries
+                    if not entry.is_dir and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+                ]
+                self.open_image_viewer(file_path, image_paths)
             else:
+                # اكتشاف المحتوى من بداية الملف فقط بدل الاعتماد على الامتداد وحده
                 try:
-                    # محاولة فتح الملف بالبرنامج الافتراضي
-                    if platform.system() == "Windows":
-                        os.startfile(file_path)
-                    elif platform.system() == "Darwin":  # macOS
-                        os.system(f"open '{file_path}'")
-                    else:  # Linux
-                        os.system(f"xdg-open '{file_path}'")
-                except:
-                    messagebox.showinfo("معلومات", f"لا يمكن فتح الملف: {item_name}")
+                    is_binary, _ = sniff_text_file(file_path)
+                except OSError as e:
+                    messagebox.showerror("خطأ", f"تعذر قراءة الملف: {e}")
+                    return
+                if not is_binary:
+                    self.open_text_editor(file_path)
+                elif file_path.lower().endswith(TEXT_EXTENSIONS):
+                    # امتداد نصي لمحتوى ثنائي: عرض ست عشري بدل تحميله في المحرر
+                    self.open_hex_viewer(file_path)
+                else:
+                    try:
+                        # محاولة فتح الملف بالبرنامج الافتراضي
+                        if platform.system() == "Windows":
+                            os.startfile(file_path)
+                        elif platform.system() == "Darwin":  # macOS
+                            os.system(f"open '{file_path}'")
+                        else:  # Linux
+                            os.system(f"xdg-open '{file_path}'")
+                    except:
+                        messagebox.showinfo("معلومات", f"لا يمكن فتح الملف: {item_name}")
+
+    def schedule_search(self):
+        """تأجيل البحث حتى يتوقف المستخدم عن الكتابة"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE, self.run_search)
+
+    def run_search(self):
+        """البحث في فهرس الملفات وعرض النتائج"""
+        self.search_after_id = None
+        query = self.search_var.get().strip()
+        if not query:
+            return
+            
+        started = time.perf_counter()
+        try:
+            results = self.file_index.search(query)
+        except sqlite3.Error as e:
+            messagebox.showerror("خطأ", f"تعذر البحث في الفهرس: {e}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.show_search_results(query, results, elapsed_ms)
+
+    def show_search_results(self, query, results, elapsed_ms):
+        """عرض نتائج البحث في نافذة واحدة يعاد استخدامها"""
+        if self.search_window is None or not self.search_window.winfo_exists():
+            self.search_window = tk.Toplevel(self.explorer_window)
+            self.search_window.geometry("600x400")
+            
+            results_tree = ttk.Treeview(self.search_window, columns=("name", "folder"), show="headings")
+            results_tree.heading("name", text="الاسم")
+            results_tree.heading("folder", text="المجلد")
+            results_tree.column("name", width=200)
+            results_tree.column("folder", width=380)
+            
+            scrollbar = tk.Scrollbar(self.search_window, command=results_tree.yview)
+            results_tree.config(yscrollcommand=scrollbar.set)
+            
+            self.search_status = tk.Label(self.search_window, anchor=tk.W, bd=1, relief=tk.SUNKEN)
+            self.search_status.pack(side=tk.BOTTOM, fill=tk.X)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            results_tree.pack(fill=tk.BOTH, expand=True)
+            results_tree.bind("<Double-1>", lambda e: self.open_search_result())
+            self.search_results_tree = results_tree
+            
+        self.search_window.title(f"نتائج البحث - {query}")
+        self.search_results = results
+        tree = self.search_results_tree
+        tree.delete(*tree.get_children())
+        for index, (parent, name, is_dir) in enumerate(results):
+            icon = "📁" if is_dir else self.get_file_icon(name)
+            tree.insert("", "end", iid=str(index), values=(f"{icon} {name}", parent))
+            
+        status = f"{len(results)} نتيجة في {elapsed_ms:.1f} مللي ثانية"
+        if self.file_index.indexing:
+            status += " | جارٍ تحديث الفهرس…"
+        self.search_status.config(text=status)
+
+    def open_search_result(self):
+        """الانتقال إلى مجلد النتيجة المحددة وتحديدها فيه"""
+        selection = self.search_results_tree.selection()
+        if not selection:
+            return
+        parent, name, is_dir = self.search_results[int(selection[0])]
+        if not os.path.isdir(parent):
+            messagebox.showerror("خطأ", f"المسار غير موجود: {parent}")
+            return
+        self.pending_select_name = name
+        self.load_directory(parent)
+
+    def open_content_search(self):
+        """نافذة البحث في محتوى الملفات تحت المجلد الحالي"""
+        search_window = tk.Toplevel(self.explorer_window)
+        search_window.title(f"بحث في الملفات - {self.current_dir}")
+        search_window.geometry("800x500")
+        root_dir = self.current_dir
+        state = {"search": None, "after_id": None}
+        
+        top_frame = tk.Frame(search_window, bg="#F0F0F0")
+        top_frame.pack(fill=tk.X)
+        
+        query_var = tk.StringVar()
+        query_entry = tk.Entry(top_frame, textvariable=query_var, width=40)
+        query_entry.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.X, expand=True)
+        query_entry.focus_set()
+        
+        regex_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(top_frame, text="تعبير نمطي", variable=regex_var, bg="#F0F0F0").pack(side=tk.LEFT, padx=5)
+        
+        status_label = tk.Label(search_window, anchor=tk.W, bd=1, relief=tk.SUNKEN)
+        status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        results_frame = tk.Frame(search_window)
+        results_frame.pack(fill=tk.BOTH, expand=True)
+        scrollbar = tk.Scrollbar(results_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        results_tree = ttk.Treeview(results_frame, columns=("file", "line", "text"), show="headings",
+                                    yscrollcommand=scrollbar.set)
+        scrollbar.config(command=results_tree.yview)
+        results_tree.heading("file", text="الملف")
+        results_tree.heading("line", text="السطر")
+        results_tree.heading("text", text="النص")
+        results_tree.column("file", width=250)
+        results_tree.column("line", width=60, anchor="e")
+        results_tree.column("text", width=450)
+        results_tree.pack(fill=tk.BOTH, expand=True)
+        matches = []
+        
+        def stop_search():
+            if state["search"] is not None:
+                state["search"].cancel()
+                
+        def start_search():
+            query = query_var.get()
+            if not query:
+                return
+            pattern = query if regex_var.get() else re.escape(query)
+            try:
+                re.compile(pattern.encode("utf-8"))
+            except re.error as e:
+                messagebox.showerror("خطأ", f"تعبير نمطي غير صالح: {e}", parent=search_window)
+                return
+                
+            stop_search()
+            if state["after_id"] is not None:
+                search_window.after_cancel(state["after_id"])
+            results_tree.delete(*results_tree.get_children())
+            matches.clear()
+            
+            search = ContentSearch(root_dir, pattern)
+            state["search"] = search
+            search.start()
+            poll_results(search)
+            
+        def poll_results(search):
+            # إضافة النتائج على دفعات حتى تبقى الواجهة مستجيبة
+            try:
+                for _ in range(200):
+                    path, line, snippet = search.results.get_nowait()
+                    matches.append((path, line))
+                    results_tree.insert("", "end", iid=str(len(matches) - 1),
+                                        values=(os.path.relpath(path, root_dir), line, snippet))
+            except queue.Empty:
+                pass
+                
+            status = f"{len(matches)} نتيجة | {search.files_scanned} ملف تم فحصه"
+            if search.failed_batches:
+                status += f" | تعذر فحص {search.failed_files} ملف في {search.failed_batches} دفعة"
+            if search.finished and search.results.empty():
+                if search.error is not None:
+                    status += f" | خطأ: {search.error}"
+                elif search.match_count >= search.max_results:
+                    status += " | تم بلوغ الحد الأقصى للنتائج"
+                elif search.cancelled:
+                    status += " | تم الإيقاف"
+                status_label.config(text=status)
+                state["after_id"] = None
+                return
+            status_label.config(text=status + " | جارٍ البحث…")
+            state["after_id"] = search_window.after(100, lambda: poll_results(search))
+            
+        def open_match(event=None):
+            selection = results_tree.selection()
+            if selection:
+                self.open_text_editor(matches[int(selection[0])][0])
+                
+        def close_search():
+            stop_search()
+            if state["after_id"] is not None:
+                search_window.after_cancel(state["after_id"])
+            search_window.destroy()
+            
+        tk.Button(top_frame, text="بحث", command=start_search).pack(side=tk.LEFT, padx=5)
+        tk.Button(top_frame, text="إيقاف", command=stop_search).pack(side=tk.LEFT, padx=5)
+        query_entry.bind("<Return>", lambda e: start_search())
+        results_tree.bind("<Double-1>", open_match)
+        search_window.protocol("WM_DELETE_WINDOW", close_search)
 
     def navigate_to_path(self):
         """الانتقال إلى المسار المدخل"""
@@ -453,101 +5354,400 @@ class ZUOperatingSystem:
         parent_dir = os.path.dirname(self.current_dir)
         self.load_directory(parent_dir)
 
+    def go_back(self):
+        """الرجوع إلى المجلد السابق في سجل التنقل"""
+        if not self.history_back:
+            return
+        self.history_forward.append(self.current_dir)
+        self.load_directory(self.history_back.pop(), add_to_history=False)
+
+    def go_forward(self):
+        """التقدم إلى المجلد التالي في سجل التنقل"""
+        if not self.history_forward:
+            return
+        self.history_back.append(self.current_dir)
+        self.load_directory(self.history_forward.pop(), add_to_history=False)
+
+    def update_navigation_buttons(self):
+        """تفعيل أو تعطيل أزرار الرجوع والتقدم حسب السجل"""
+        self.back_button.config(state=tk.NORMAL if self.history_back else tk.DISABLED)
+        self.forward_button.config(state=tk.NORMAL if self.history_forward else tk.DISABLED)
+
     def refresh_directory(self):
         """إعادة تحميل المجلد الحالي"""
-        self.load_directory(self.current_dir)
+        # فرض إعادة المسح لأن تعديل ملف داخل المجلد لا يغير توقيعه
+        self.load_directory(self.current_dir, force=True)
 
     def show_context_menu(self, event):
         """عرض قائمة السياق"""
         # تحديد العنصر تحت المؤشر
         item = self.tree.identify_row(event.y)
         if item:
-            self.tree.selection_set(item)
+            if int(item) not in self.selected_indices:
+                self.selected_indices = {int(item)}
+                self.focus_index = int(item)
+                self.tree.selection_set(item)
             self.context_menu.post(event.x_root, event.y_root)
 
     def copy_file(self):
-        """نسخ الملف المحدد"""
-        selected_items = self.tree.selection()
-        if not selected_items:
+        """نسخ العناصر المحددة"""
+        selected_entries = self.get_selected_entries()
+        if not selected_entries:
             return
             
-        selected_item = selected_items[0]
-        item_data = self.tree.item(selected_item, "values")
-        item_name = item_data[0].split(" ", 1)[1]  # إزالة الأيقونة من الاسم
-        
-        self.copied_file = os.path.join(self.current_dir, item_name)
-        messagebox.showinfo("نسخ", f"تم نسخ: {item_name}")
+        self.clipboard_paths = [os.path.join(self.current_dir, entry.name) for entry in selected_entries]
+        if len(selected_entries) == 1:
+            messagebox.showinfo("نسخ", f"تم نسخ: {selected_entries[0].name}")
+        else:
+            messagebox.showinfo("نسخ", f"تم نسخ {len(selected_entries)} عنصر")
 
     def paste_file(self):
-        """لصق الملف المنسوخ"""
-        if not self.copied_file or not os.path.exists(self.copied_file):
+        """لصق العناصر المنسوخة كعملية واحدة في الخلفية"""
+        sources = [path for path in self.clipboard_paths if os.path.exists(path)]
+        if not sources:
             messagebox.showwarning("تحذير", "لا يوجد ملف منسوخ أو الملف لم يعد موجودًا")
             return
             
-        file_name = os.path.basename(self.copied_file)
-        destination = os.path.join(self.current_dir, file_name)
+        names = [os.path.basename(path) for path in sources]
+        
+        # تأكيد واحد لكل العناصر الموجودة بنفس الاسم
+        existing = [name for name in names if os.path.exists(os.path.join(self.current_dir, name))]
+        if existing:
+            if len(existing) == 1:
+                question = f"الملف {existing[0]} موجود بالفعل. هل تريد استبداله؟"
+            else:
+                question = f"يوجد {len(existing)} عنصر بنفس الاسم بالفعل ({'، '.join(existing[:5])}…). هل تريد استبدالها؟"
+            if not messagebox.askyesno("تأكيد", question):
+                return
+                
+        label = names[0] if len(names) == 1 else f"{len(names)} عنصر"
+                
+        # النسخ في الخلفية مع نافذة لعرض التقدم
+        job = CopyJob(sources, self.current_dir, verify=self.verify_copies.get())
         
-        # التحقق من وجود الملف بنفس الاسم
-        if os.path.exists(destination):
+        def on_done():
+            self.update_paths_in_view([os.path.join(job.destination_dir, name) for name in names])
+            if job.cancelled:
+                messagebox.showinfo("لصق", f"تم إلغاء لصق: {label}")
+            elif job.errors:
+                message = f"تعذر لصق بعض الملفات:\n{self.format_job_errors(job)}"
+                if job.journal_kept:
+                    message += "\n\nيمكن استئناف النسخ عند التشغيل التالي."
+                messagebox.showerror("خطأ", message)
+            else:
+                messagebox.showinfo("لصق", f"تم لصق: {label}")
+                
+        self.show_job_progress(job, f"لصق {label}", on_done)
+        job.start()
+
+    def offer_transfer_resume(self):
+        """عرض استئناف عمليات النسخ غير المكتملة من سجلاتها"""
+        for path in TransferJournal.find_pending():
+            try:
+                journal = TransferJournal.load(path)
+            except (OSError, ValueError, KeyError, IndexError):
+                os.remove(path)
+                continue
+                
+            names = "، ".join(os.path.basename(source) for source in journal.sources)
             response = messagebox.askyesno(
-                "تأكيد", 
-                f"الملف {file_name} موجود بالفعل. هل تريد استبداله؟"
+                "استئناف النسخ",
+                f"لم يكتمل نسخ {names} إلى {journal.destination_dir}. هل تريد استئنافه؟"
             )
             if not response:
-                return
+                journal.remove()
+                continue
                 
-        try:
-            if os.path.isdir(self.copied_file):
-                # نسخ المجلد مع محتوياته
-                shutil.copytree(self.copied_file, destination, dirs_exist_ok=True)
+            job = CopyJob(journal.sources, journal.destination_dir, journal.verify, journal)
+            
+            def on_done(job=job, names=names):
+                if job.cancelled:
+                    messagebox.showinfo("لصق", f"تم إلغاء لصق: {names}")
+                elif job.errors:
+                    messagebox.showerror("خطأ", f"تعذر إكمال لصق {names}:\n{self.format_job_errors(job)}")
+                else:
+                    messagebox.showinfo("لصق", f"تم لصق: {names}")
+                    
+            self.show_job_progress(job, f"استئناف لصق {names}", on_done)
+            job.start()
+
+    def offer_text_recovery(self):
+        """عرض استعادة نصوص المحرر غير المحفوظة من الجلسة السابقة"""
+        for path in RecoveryJournal.find_pending():
+            try:
+                file_path, saved_at, _ = RecoveryJournal.load(path)
+            except (OSError, ValueError, KeyError):
+                os.remove(path)
+                continue
+                
+            name = os.path.basename(file_path) if file_path else "ملف جديد"
+            saved_time = datetime.fromtimestamp(saved_at).strftime("%Y-%m-%d %H:%M")
+            if messagebox.askyesno("استعادة", f"توجد تغييرات غير محفوظة في {name} منذ {saved_time}. هل تريد استعادتها؟"):
+                self.open_text_editor(recovery_file=path)
             else:
-                # نسخ الملف
-                shutil.copy2(self.copied_file, destination)
+                RecoveryJournal(path).remove(reusable=False)
+
+    def format_job_errors(self, job, limit=10):
+        """تجميع أخطاء العملية في تقرير واحد مختصر"""
+        lines = [f"{os.path.basename(path) or path}: {error}" for path, error in job.errors[:limit]]
+        if len(job.errors) > limit:
+            lines.append(f"… و{len(job.errors) - limit} أخطاء أخرى")
+        return "\n".join(lines)
+
+    def show_job_progress(self, job, title, on_done):
+        """نافذة تعرض تقدم العملية وسرعتها مع أزرار الإيقاف المؤقت والإلغاء"""
+        self.file_jobs.append(job)
+        widgets = {}
+        
+        def create_window():
+            progress_window = tk.Toplevel(self.root)
+            progress_window.title(title)
+            progress_window.geometry("450x150")
+            progress_window.resizable(False, False)
+            
+            info_label = tk.Label(progress_window, text="", anchor=tk.W)
+            info_label.pack(fill=tk.X, padx=10, pady=5)
+            
+            progress_bar = ttk.Progressbar(progress_window, maximum=1.0, length=420)
+            progress_bar.pack(padx=10, pady=5)
+            
+            speed_label = tk.Label(progress_window, text="", anchor=tk.W)
+            speed_label.pack(fill=tk.X, padx=10)
+            
+            button_frame = tk.Frame(progress_window)
+            button_frame.pack(pady=5)
+            
+            def toggle_pause():
+                if job.paused:
+                    job.resume()
+                    pause_button.config(text="إيقاف مؤقت")
+                else:
+                    job.pause()
+                    pause_button.config(text="استئناف")
+                    
+            pause_button = tk.Button(button_frame, text="إيقاف مؤقت", command=toggle_pause)
+            pause_button.pack(side=tk.LEFT, padx=5)
+            tk.Button(button_frame, text="إلغاء", command=job.cancel).pack(side=tk.LEFT, padx=5)
+            progress_window.protocol("WM_DELETE_WINDOW", job.cancel)
+            
+            widgets.update(window=progress_window, info=info_label, bar=progress_bar, speed=speed_label)
+        
+        def update_progress():
+            if job.finished:
+                self.file_jobs.remove(job)
+                if widgets:
+                    widgets["window"].destroy()
+                on_done()
+                return
                 
-            self.load_directory(self.current_dir)
-            messagebox.showinfo("لصق", f"تم لصق: {file_name}")
-        except Exception as e:
-            messagebox.showerror("خطأ", f"تعذر لصق الملف: {e}")
+            # العمليات السريعة تنتهي دون إظهار نافذة
+            if not widgets:
+                create_window()
+                
+            fraction, info, speed = job.describe(self.get_human_readable_size)
+            widgets["info"].config(text=info)
+            widgets["bar"]["value"] = fraction
+            if job.paused:
+                speed += " | [متوقف مؤقتًا]"
+            widgets["speed"].config(text=speed)
+            
+            self.root.after(COPY_PROGRESS_INTERVAL, update_progress)
+            
+        self.root.after(JOB_WINDOW_DELAY, update_progress)
 
     def delete_file(self):
-        """حذف الملف أو المجلد المحدد"""
-        selected_items = self.tree.selection()
-        if not selected_items:
+        """حذف العناصر المحددة كعملية واحدة في الخلفية"""
+        selected_entries = self.get_selected_entries()
+        if not selected_entries:
             return
             
-        selected_item = selected_items[0]
-        item_data = self.tree.item(selected_item, "values")
-        item_name = item_data[0].split(" ", 1)[1]  # إزالة الأيقونة من الاسم
+        names = [entry.name for entry in selected_entries]
+        label = f"'{names[0]}'" if len(names) == 1 else f"{len(names)} عنصر"
         
-        file_path = os.path.join(self.current_dir, item_name)
+        # طلب تأكيد واحد للحذف
+        if self.use_trash.get():
+            question = f"هل تريد نقل {label} إلى سلة المهملات؟"
+        else:
+            question = f"هل أنت متأكد من أنك تريد حذف {label} نهائيًا؟"
+        if not messagebox.askyesno("تأكيد الحذف", question):
+            return
+            
+        paths = [os.path.join(self.current_dir, name) for name in names]
+        if self.use_trash.get():
+            self.move_to_trash(paths, label)
+        else:
+            self.delete_permanently(paths, label)
+
+    def move_to_trash(self, paths, label):
+        """نقل العناصر إلى سلة المهملات مع إمكانية التراجع"""
+        job = TrashJob(self.trash, paths)
         
-        # طلب تأكيد الحذف
-        response = messagebox.askyesno(
-            "تأكيد الحذف", 
-            f"هل أنت متأكد من أنك تريد حذف '{item_name}'؟"
-        )
+        def on_done():
+            if job.trashed:
+                self.trash_undo_stack.append(job.trashed)
+            self.update_paths_in_view(paths)
+            
+            # عرض الحذف النهائي لما تعذر نقله إلى السلة
+            if job.failed:
+                response = messagebox.askyesno(
+                    "تأكيد الحذف",
+                    f"تعذر نقل {len(job.failed)} عنصر إلى سلة المهملات. هل تريد حذفها نهائيًا؟"
+                )
+                if response:
+                    self.delete_permanently(job.failed, f"{len(job.failed)} عنصر")
+                    
+        self.show_job_progress(job, f"حذف {label}", on_done)
+        job.start()
+
+    def delete_permanently(self, paths, label):
+        """حذف العناصر نهائيًا في الخلفية"""
+        job = DeleteJob(paths)
         
-        if response:
+        def on_done():
+            # تحديث واحد للعرض بعد انتهاء العملية
+            self.update_paths_in_view(paths)
+            if job.errors:
+                messagebox.showerror("خطأ", f"تعذر حذف بعض العناصر:\n{self.format_job_errors(job)}")
+            elif job.cancelled:
+                messagebox.showinfo("حذف", f"تم إلغاء الحذف بعد {job.deleted_items} عنصر")
+            else:
+                messagebox.showinfo("حذف", f"تم حذف: {label}")
+                
+        self.show_job_progress(job, f"حذف {label}", on_done)
+        job.start()
+
+    def undo_delete(self):
+        """استعادة آخر مجموعة عناصر نُقلت إلى سلة المهملات"""
+        if not self.trash_undo_stack:
+            messagebox.showinfo("تراجع", "لا يوجد حذف يمكن التراجع عنه")
+            return
+            
+        restored = []
+        errors = []
+        for root, item_id, path in self.trash_undo_stack.pop():
             try:
-                if os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-                else:
-                    os.remove(file_path)
-                    
-                self.load_directory(self.current_dir)
-                messagebox.showinfo("حذف", f"تم حذف: {item_name}")
-            except Exception as e:
-                messagebox.showerror("خطأ", f"تعذر حذف الملف: {e}")
+                restored.append(self.trash.restore(root, item_id))
+            except OSError as e:
+                errors.append(f"{os.path.basename(path)}: {e}")
+                
+        self.update_paths_in_view(restored)
+        if errors:
+            messagebox.showerror("خطأ", "تعذر استعادة بعض العناصر:\n" + "\n".join(errors[:10]))
+
+    def update_paths_in_view(self, paths):
+        """تحديث صفوف المسارات التي تقع في المجلد المعروض"""
+        if self.directory_watcher is None:
+            return
+        names = [os.path.basename(path) for path in paths
+                 if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.current_dir)]
+        if names:
+            self.update_directory_entries(names)
+
+    def open_image_batch_dialog(self):
+        """نافذة إعدادات تحجيم الصور المحددة وتحويلها دفعة واحدة"""
+        paths = [
+            os.path.join(self.current_dir, entry.name) for entry in self.get_selected_entries()
+            if not entry.is_dir and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        if not paths:
+            messagebox.showinfo("معالجة الصور", "لم يتم تحديد أي صورة")
+            return
+            
+        batch_window = tk.Toplevel(self.explorer_window)
+        batch_window.title(f"معالجة {len(paths)} صورة")
+        batch_window.resizable(False, False)
+        batch_window.transient(self.explorer_window)
+        batch_window.grab_set()
+        
+        max_size_var = tk.StringVar(value="1920")
+        format_var = tk.StringVar(value="نفس الصيغة")
+        quality_var = tk.IntVar(value=85)
+        strip_var = tk.BooleanVar(value=True)
+        output_var = tk.StringVar(value=os.path.join(self.current_dir, "processed"))
+        
+        tk.Label(batch_window, text="أقصى بُعد بالبكسل (0 بدون تحجيم):").grid(row=0, column=0, sticky=tk.W, padx=10, pady=5)
+        tk.Entry(batch_window, textvariable=max_size_var, width=10).grid(row=0, column=1, sticky=tk.W, padx=10)
+        
+        tk.Label(batch_window, text="صيغة الإخراج:").grid(row=1, column=0, sticky=tk.W, padx=10, pady=5)
+        ttk.Combobox(
+            batch_window, textvariable=format_var, state="readonly", width=12,
+            values=["نفس الصيغة"] + list(IMAGE_BATCH_FORMATS)
+        ).grid(row=1, column=1, sticky=tk.W, padx=10)
+        
+        tk.Label(batch_window, text="جودة JPEG/WEBP:").grid(row=2, column=0, sticky=tk.W, padx=10, pady=5)
+        tk.Scale(batch_window, variable=quality_var, from_=10, to=100, orient=tk.HORIZONTAL, length=150).grid(
+            row=2, column=1, sticky=tk.W, padx=10)
+        
+        tk.Checkbutton(batch_window, text="حذف البيانات الوصفية (EXIF)", variable=strip_var).grid(
+            row=3, column=0, columnspan=2, sticky=tk.W, padx=10, pady=5)
+        
+        tk.Label(batch_window, text="مجلد الإخراج:").grid(row=4, column=0, sticky=tk.W, padx=10, pady=5)
+        output_frame = tk.Frame(batch_window)
+        output_frame.grid(row=4, column=1, sticky=tk.W, padx=10)
+        tk.Entry(output_frame, textvariable=output_var, width=30).pack(side=tk.LEFT)
+        
+        def browse_output():
+            directory = filedialog.askdirectory(parent=batch_window, initialdir=self.current_dir)
+            if directory:
+                output_var.set(directory)
+                
+        tk.Button(output_frame, text="…", command=browse_output).pack(side=tk.LEFT, padx=2)
+        
+        def start_batch():
+            try:
+                max_size = int(max_size_var.get() or 0)
+                if max_size < 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("تحذير", "أقصى بُعد يجب أن يكون عددًا صحيحًا موجبًا", parent=batch_window)
+                return
+            output_dir = output_var.get().strip()
+            if not output_dir:
+                messagebox.showwarning("تحذير", "يجب تحديد مجلد الإخراج", parent=batch_window)
+                return
+                
+            options = {
+                "max_size": max_size,
+                "format": format_var.get() if format_var.get() in IMAGE_BATCH_FORMATS else None,
+                "quality": quality_var.get(),
+                "strip_metadata": strip_var.get(),
+            }
+            batch_window.destroy()
+            self.run_image_batch(paths, output_dir, options)
+        
+        button_frame = tk.Frame(batch_window)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=10)
+        tk.Button(button_frame, text="بدء", command=start_batch).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="إلغاء", command=batch_window.destroy).pack(side=tk.LEFT, padx=5)
+
+    def run_image_batch(self, paths, output_dir, options):
+        """تشغيل معالجة الصور في الخلفية وعرض ملخص الإنتاجية عند الانتهاء"""
+        job = ImageBatchJob(paths, output_dir, options)
+        
+        def on_done():
+            self.update_paths_in_view(job.output_paths + [output_dir])
+            elapsed = job.get_elapsed()
+            summary = (f"تمت معالجة {job.processed_files} من {len(paths)} صورة في {elapsed:.1f} ث "
+                       f"({job.processed_files / elapsed:.1f} صورة/ث)\n"
+                       f"الحجم: {self.get_human_readable_size(job.input_bytes)} ← "
+                       f"{self.get_human_readable_size(job.output_bytes)}")
+            if job.errors:
+                messagebox.showerror("خطأ", f"{summary}\n\nتعذرت معالجة بعض الصور:\n{self.format_job_errors(job)}")
+            elif job.cancelled:
+                messagebox.showinfo("معالجة الصور", f"تم الإلغاء.\n{summary}")
+            else:
+                messagebox.showinfo("معالجة الصور", summary)
+                
+        self.show_job_progress(job, f"معالجة {len(paths)} صورة", on_done)
+        job.start()
 
     def rename_file(self):
         """إعادة تسمية الملف أو المجلد المحدد"""
-        selected_items = self.tree.selection()
-        if not selected_items:
+        selected_entries = self.get_selected_entries()
+        if not selected_entries:
             return
             
-        selected_item = selected_items[0]
-        item_data = self.tree.item(selected_item, "values")
-        item_name = item_data[0].split(" ", 1)[1]  # إزالة الأيقونة من الاسم
+        item_name = selected_entries[0].name
         
         file_path = os.path.join(self.current_dir, item_name)
         
@@ -581,7 +5781,7 @@ class ZUOperatingSystem:
                 
             try:
                 os.rename(file_path, new_path)
-                self.load_directory(self.current_dir)
+                self.update_directory_entries([item_name, new_name])
                 rename_window.destroy()
             except Exception as e:
                 messagebox.showerror("خطأ", f"تعذر إعادة التسمية: {e}")
@@ -624,7 +5824,7 @@ class ZUOperatingSystem:
                 
             try:
                 os.mkdir(folder_path)
-                self.load_directory(self.current_dir)
+                self.update_directory_entries([folder_name])
                 folder_window.destroy()
             except Exception as e:
                 messagebox.showerror("خطأ", f"تعذر إنشاء المجلد: {e}")
@@ -674,7 +5874,7 @@ class ZUOperatingSystem:
                 with open(file_path, 'w', encoding='utf-8') as f:
                     pass
                     
-                self.load_directory(self.current_dir)
+                self.update_directory_entries([file_name])
                 file_window.destroy()
                 
                 # فتح الملف في المحرر النصي
@@ -688,8 +5888,53 @@ class ZUOperatingSystem:
         tk.Button(button_frame, text="إنشاء", command=create_file).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="إلغاء", command=file_window.destroy).pack(side=tk.LEFT, padx=5)
 
-    def open_image_viewer(self, file_path):
-        """فتح عارض الصور"""
+    def open_image_viewer(self, file_path, image_paths=None):
+        """فتح عارض الصور مع التنقل بين صور المجلد بالأسهم"""
+        if not image_paths or file_path not in image_paths:
+            image_paths = [file_path]
+            
+        # موضع الصورة -> Future يعيد (المفتاح، الصورة، الهرم، التكبير، متحركة)
+        # كل نافذة تحجز مراجعها الخاصة في الذاكرة المؤقتة المشتركة وتحررها عند الإغلاق
+        slides = {}
+        prefetch_pool = ThreadPoolExecutor(max_workers=SLIDESHOW_WORKERS)
+        state = {"index": image_paths.index(file_path), "view": None, "preview_id": None, "settle_id": None}
+        
+        def load_slide(path, fit_size):
+            """فك ترميز الصورة وتجهيزها بالتكبير الملائم (تعمل في خيط خلفي للصور المجاورة)"""
+            key, image, animated = self.image_cache.acquire(path)
+            try:
+                pyramid = ImagePyramid(image)
+                zoom = 1.0
+                if fit_size is not None:
+                    zoom = get_fit_zoom(image.size, fit_size)
+                    if not animated:
+                        pyramid.prepare(zoom)
+            except BaseException:
+                # لا أحد سيحرر مرجع شريحة فشل تجهيزها
+                self.image_cache.release(key)
+                raise
+            return key, image, pyramid, zoom, animated
+            
+        def release_slide(future):
+            if not future.cancelled() and future.exception() is None:
+                self.image_cache.release(future.result()[0])
+                
+        def drop_slide(index):
+            # الصورة التي لم يبدأ تجهيزها تُلغى، وغيرها يُحرر مرجعه عند اكتماله
+            future = slides.pop(index)
+            if not future.cancel():
+                future.add_done_callback(release_slide)
+        
+        # الصورة الأولى تُعرض بحجمها الأصلي كما في السابق
+        first = Future()
+        try:
+            first.set_result(load_slide(file_path, None))
+        except (OSError, Image.DecompressionBombError) as e:
+            prefetch_pool.shutdown(wait=False)
+            messagebox.showerror("خطأ", f"تعذر فتح الصورة: {str(e)}")
+            return
+        slides[state["index"]] = first
+            
         image_window = tk.Toplevel(self.root)
         image_window.title(f"عارض الصور - {os.path.basename(file_path)}")
         image_window.geometry("800x600")
@@ -704,17 +5949,19 @@ class ZUOperatingSystem:
         toolbar = tk.Frame(main_frame, bg="#F0F0F0")
         toolbar.pack(fill=tk.X)
         
+        prev_button = tk.Button(toolbar, text="◀", command=lambda: step_slide(-1))
+        prev_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        next_button = tk.Button(toolbar, text="▶", command=lambda: step_slide(1))
+        next_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
         zoom_label = tk.Label(toolbar, text="التكبير:")
         zoom_label.pack(side=tk.LEFT, padx=5, pady=5)
         
-        zoom_scale = tk.Scale(toolbar, from_=10, to=200, orient=tk.HORIZONTAL, length=200)
+        zoom_scale = tk.Scale(toolbar, from_=IMAGE_ZOOM_MIN, to=IMAGE_ZOOM_MAX, orient=tk.HORIZONTAL, length=200)
         zoom_scale.set(100)
         zoom_scale.pack(side=tk.LEFT, padx=5, pady=5)
         
-        # متغير لتخزين معلومات الصورة الأصلية
-        self.original_image = Image.open(file_path)
-        self.current_image = self.original_image.copy()
-        
         # إطار الصورة مع شريط تمرير
         image_frame = tk.Frame(main_frame)
         image_frame.pack(fill=tk.BOTH, expand=True)
@@ -733,257 +5980,290 @@ class ZUOperatingSystem:
         )
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        h_scrollbar.config(command=canvas.xview)
-        v_scrollbar.config(command=canvas.yview)
+        # إضافة شريط معلومات
+        status_bar = tk.Label(image_window, bd=1, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
-        # وظيفة لتحديث الصورة عند تغيير التكبير
-        def update_image(val):
-            zoom = int(zoom_scale.get())
-            width = int(self.original_image.width * zoom / 100)
-            height = int(self.original_image.height * zoom / 100)
-            
-            # إعادة تحجيم الصورة
-            resized_image = self.original_image.resize((width, height), Image.Resampling.LANCZOS)
-            self.current_image = resized_image
+        def scroll_x(*args):
+            canvas.xview(*args)
+            state["view"].schedule_render()
             
-            # تحويل الصورة إلى صيغة مناسبة لـ tkinter
-            photo = ImageTk.PhotoImage(resized_image)
+        def scroll_y(*args):
+            canvas.yview(*args)
+            state["view"].schedule_render()
             
-            # عرض الصورة في الكانفاس
-            canvas.delete("all")
-            canvas.create_image(0, 0, anchor=tk.NW, image=photo)
-            canvas.image = photo  # الاحتفاظ بمرجع لمنع التخلص من الصورة
+        def drag_image(event):
+            canvas.scan_dragto(event.x, event.y, gain=1)
+            state["view"].schedule_render()
+        
+        h_scrollbar.config(command=scroll_x)
+        v_scrollbar.config(command=scroll_y)
+        canvas.bind("<Configure>", lambda e: state["view"].schedule_render())
+        canvas.bind("<ButtonPress-1>", lambda e: canvas.scan_mark(e.x, e.y))
+        canvas.bind("<B1-Motion>", drag_image)
+        canvas.bind("<MouseWheel>", lambda e: scroll_y("scroll", -1 if e.delta > 0 else 1, "units"))
+        canvas.bind("<Button-4>", lambda e: scroll_y("scroll", -1, "units"))
+        canvas.bind("<Button-5>", lambda e: scroll_y("scroll", 1, "units"))
+        
+        # وظيفة لتحديث الصورة عند تغيير التكبير
+        def render_zoom(final):
+            if not image_window.winfo_exists():
+                return
+            zoom = int(zoom_scale.get())
             
-            # تحديث منطقة التمرير للصورة
-            canvas.config(scrollregion=(0, 0, width, height))
+            # البلاطات تُحجَّم من أقرب مستوى في الهرم: سريعة أثناء السحب وعالية الجودة بعد الاستقرار
+            state["view"].set_zoom(zoom / 100, final)
+            width, height = state["view"].get_size()
             
             # تحديث عنوان النافذة بمعلومات الصورة
-            image_window.title(f"عارض الصور - {os.path.basename(file_path)} - {width}x{height}")
-        
-        zoom_scale.config(command=update_image)
-        update_image(100)  # عرض الصورة بالحجم الأصلي
-        
-        # إضافة شريط معلومات
-        status_bar = tk.Label(
-            image_window, 
-            text=f"الحجم الأصلي: {self.original_image.width}x{self.original_image.height}",
-            bd=1, relief=tk.SUNKEN, anchor=tk.W
-        )
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
-
-    def open_text_editor(self, file_path=None):
-        """فتح محرر النصوص"""
-        editor_window = tk.Toplevel(self.root)
-        editor_window.title("المحرر النصي")
-        editor_window.geometry("800x600")
-        editor_window.minsize(400, 300)
-        self.current_opened_windows.append(editor_window)
+            name = os.path.basename(image_paths[state["index"]])
+            position = f" ({state['index'] + 1}/{len(image_paths)})" if len(image_paths) > 1 else ""
+            image_window.title(f"عارض الصور - {name}{position} - {width}x{height}")
         
-        # متغير لتخزين مسار الملف الحالي
-        current_file_path = tk.StringVar(value=file_path if file_path else "")
+        def render_preview():
+            state["preview_id"] = None
+            render_zoom(final=False)
+            
+        def render_final():
+            state["settle_id"] = None
+            render_zoom(final=True)
+            
+        def cancel_render():
+            for name in ("preview_id", "settle_id"):
+                if state[name] is not None:
+                    image_window.after_cancel(state[name])
+                    state[name] = None
         
-        # دالة تحديث العنوان
-        def update_title():
-            if current_file_path.get():
-                editor_window.title(f"المحرر النصي - {os.path.basename(current_file_path.get())}")
-            else:
-                editor_window.title("المحرر النصي - ملف جديد")
+        def update_image(val):
+            # تغيير الشريط برمجيًا عند التنقل بين الصور لا يحتاج إعادة رسم
+            if int(zoom_scale.get()) / 100 == state["view"].zoom:
+                return
+            # دمج أحداث السحب في معاينة واحدة لكل دورة خمول، وتأجيل التحجيم النهائي حتى يستقر الشريط
+            if state["preview_id"] is None:
+                state["preview_id"] = image_window.after_idle(render_preview)
+            if state["settle_id"] is not None:
+                image_window.after_cancel(state["settle_id"])
+            state["settle_id"] = image_window.after(ZOOM_SETTLE_DELAY, render_final)
+            
+        def prefetch_around(index):
+            """تجهيز الصور المجاورة في الخلفية وتحرير ما ابتعد منها"""
+            wanted = set(range(max(0, index - SLIDESHOW_PREFETCH), min(len(image_paths), index + SLIDESHOW_PREFETCH + 1)))
+            for i in [i for i in slides if i not in wanted]:
+                drop_slide(i)
                 
-        update_title()
-        
-        # شريط القوائم
-        menu_bar = tk.Menu(editor_window)
-        editor_window.config(menu=menu_bar)
-        
-        # قائمة الملف
-        file_menu = tk.Menu(menu_bar, tearoff=0)
-        menu_bar.add_cascade(label="ملف", menu=file_menu)
-        
-        # دوال قائمة الملف
-        def new_file():
-            if text_area.edit_modified():
-                response = messagebox.askyesnocancel("تنبيه", "هل تريد حفظ التغييرات قبل فتح ملف جديد؟")
-                if response is None:  # إلغاء
-                    return
-                if response:  # نعم
-                    save_file()
-                    
-            text_area.delete(1.0, tk.END)
-            current_file_path.set("")
-            text_area.edit_modified(False)
-            update_title()
-            
-        def open_file():
-            if text_area.edit_modified():
-                response = messagebox.askyesnocancel("تنبيه", "هل تريد حفظ التغييرات قبل فتح ملف آخر؟")
-                if response is None:  # إلغاء
-                    return
-                if response:  # نعم
-                    save_file()
-                    
-            file = filedialog.askopenfilename(
-                filetypes=[
-                    ("ملفات نصية", "*.txt"), 
-                    ("ملفات بايثون", "*.py"),
-                    ("ملفات HTML", "*.html"),
-                    ("جميع الملفات", "*.*")
-                ]
-            )
+            # الأقرب أولًا، مع تقديم الصورة التالية على السابقة
+            fit_size = (canvas.winfo_width(), canvas.winfo_height())
+            for distance in range(1, SLIDESHOW_PREFETCH + 1):
+                for i in (index + distance, index - distance):
+                    if i in wanted and i not in slides:
+                        slides[i] = prefetch_pool.submit(load_slide, image_paths[i], fit_size)
             
-            if file:
-                try:
-                    with open(file, "r", encoding="utf-8") as f:
-                        text_area.delete(1.0, tk.END)
-                        text_area.insert(1.0, f.read())
-                        current_file_path.set(file)
-                        text_area.edit_modified(False)
-                        update_title()
-                except Exception as e:
-                    messagebox.showerror("خطأ", f"حدث خطأ أثناء قراءة الملف: {e}")
-                    
-        def save_file():
-            if current_file_path.get():
+        def show_slide(index):
+            """عرض الصورة في الموضع المحدد، من التجهيز المسبق إن كان جاهزًا"""
+            future = slides.get(index)
+            if future is None or future.cancel():
+                # لم يبدأ تجهيزها بعد، فتُجهَّز مباشرة بدل انتظار دورها
+                future = Future()
                 try:
-                    with open(current_file_path.get(), "w", encoding="utf-8") as f:
-                        f.write(text_area.get(1.0, tk.END))
-                        text_area.edit_modified(False)
-                except Exception as e:
-                    messagebox.showerror("خطأ", f"حدث خطأ أثناء حفظ الملف: {e}")
-            else:
-                save_file_as()
+                    future.set_result(load_slide(image_paths[index], (canvas.winfo_width(), canvas.winfo_height())))
+                except (OSError, Image.DecompressionBombError) as e:
+                    slides.pop(index, None)
+                    messagebox.showerror("خطأ", f"تعذر فتح الصورة: {str(e)}")
+                    return
+                slides[index] = future
                 
-        def save_file_as():
-            file = filedialog.asksaveasfilename(
-                defaultextension=".txt",
-                filetypes=[
-                    ("ملفات نصية", "*.txt"), 
-                    ("ملفات بايثون", "*.py"),
-                    ("ملفات HTML", "*.html"),
-                    ("جميع الملفات", "*.*")
-                ]
-            )
-            
-            if file:
-                current_file_path.set(file)
-                save_file()
-                update_title()
+            try:
+                key, image, pyramid, zoom, animated = future.result()
+            except (OSError, Image.DecompressionBombError) as e:
+                messagebox.showerror("خطأ", f"تعذر فتح الصورة: {str(e)}")
+                return
                 
-        # إضافة العناصر لقائمة الملف
-        file_menu.add_command(label="جديد", command=new_file)
-        file_menu.add_command(label="فتح", command=open_file)
-        file_menu.add_command(label="حفظ", command=save_file)
-        file_menu.add_command(label="حفظ باسم", command=save_file_as)
-        file_menu.add_separator()
-        file_menu.add_command(label="خروج", command=lambda: self.close_window(editor_window))
-        
-        # قائمة التحرير
-        edit_menu = tk.Menu(menu_bar, tearoff=0)
-        menu_bar.add_cascade(label="تحرير", menu=edit_menu)
-        
-        # دوال قائمة التحرير
-        def cut():
-            editor_window.focus_get().event_generate("<<Cut>>")
-            
-        def copy():
-            editor_window.focus_get().event_generate("<<Copy>>")
-            
-        def paste():
-            editor_window.focus_get().event_generate("<<Paste>>")
-            
-        def select_all():
-            text_area.tag_add(tk.SEL, "1.0", tk.END)
-            text_area.mark_set(tk.INSERT, "1.0")
-            text_area.see(tk.INSERT)
+            cancel_render()
+            if state["view"] is not None:
+                state["view"].close()
+            state["index"] = index
+            if animated:
+                state["view"] = AnimatedImageCanvas(canvas, image_paths[index], image)
+            else:
+                state["view"] = TiledImageCanvas(canvas, image, pyramid)
+            canvas.xview_moveto(0)
+            canvas.yview_moveto(0)
+            zoom_scale.set(round(zoom * 100))
+            render_zoom(final=True)
+            status_bar.config(text=f"الحجم الأصلي: {image.width}x{image.height}")
+            prefetch_around(index)
             
-        # إضافة العناصر لقائمة التحرير
-        edit_menu.add_command(label="قص", command=cut)
-        edit_menu.add_command(label="نسخ", command=copy)
-        edit_menu.add_command(label="لصق", command=paste)
-        edit_menu.add_separator()
-        edit_menu.add_command(label="تحديد الكل", command=select_all)
-        
-        # شريط الأدوات
-        toolbar = tk.Frame(editor_window, bg="#F0F0F0")
-        toolbar.pack(fill=tk.X)
-        
-        # أزرار شريط الأدوات
-        tk.Button(toolbar, text="جديد", command=new_file).pack(side=tk.LEFT, padx=2, pady=2)
-        tk.Button(toolbar, text="فتح", command=open_file).pack(side=tk.LEFT, padx=2, pady=2)
-        tk.Button(toolbar, text="حفظ", command=save_file).pack(side=tk.LEFT, padx=2, pady=2)
-        
-        # إطار النص
-        text_frame = tk.Frame(editor_window)
-        text_frame.pack(fill=tk.BOTH, expand=True)
+        def step_slide(delta):
+            index = state["index"] + delta
+            if 0 <= index < len(image_paths):
+                show_slide(index)
         
-        # شريط رقم السطر
-        line_numbers = tk.Text(text_frame, width=4, padx=4, pady=4, takefocus=0, 
-                            bg='#F0F0F0', relief=tk.RIDGE, state='disabled')
-        line_numbers.pack(side=tk.LEFT, fill=tk.Y)
+        # الصورة تُرسم في بلاطات، ولا يُحوَّل إلا ما يقع قرب منطقة العرض
+        # حساب أبعاد الكانفاس أولًا ليُجهَّز ما يجاورها بالتكبير الملائم
+        image_window.update_idletasks()
+        show_slide(state["index"])
+        zoom_scale.config(command=update_image)
         
-        # منطقة النص مع شريط تمرير
-        text_area = scrolledtext.ScrolledText(
-            text_frame, wrap=tk.WORD, font=("Courier New", 12),
-            undo=True, maxundo=-1
-        )
-        text_area.pack(fill=tk.BOTH, expand=True)
-        
-        # دالة تحديث أرقام الأسطر
-        def update_line_numbers(event=None):
-            line_numbers.config(state='normal')
-            line_numbers.delete(1.0, tk.END)
-            
-            # عد الأسطر في منطقة النص
-            num_lines = text_area.get(1.0, tk.END).count('\n')
-            line_text = ''
-            for i in range(1, num_lines + 1):
-                line_text += f"{i}\n"
-                
-            line_numbers.insert(1.0, line_text)
-            line_numbers.config(state='disabled')
+        image_window.bind("<Left>", lambda e: step_slide(-1))
+        image_window.bind("<Right>", lambda e: step_slide(1))
         
-        # ربط تحديث أرقام الأسطر بالتمرير والتغيير
-        text_area.bind("<KeyPress>", update_line_numbers)
-        text_area.bind("<KeyRelease>", update_line_numbers)
-        text_area.bind("<MouseWheel>", update_line_numbers)
+        def close_viewer():
+            # إلغاء الرسم المؤجل وتحرير البلاطات ومراجع الصور المفكوكة
+            cancel_render()
+            state["view"].close()
+            for index in list(slides):
+                drop_slide(index)
+            prefetch_pool.shutdown(wait=False)
+            self.close_window(image_window)
+            
+        image_window.protocol("WM_DELETE_WINDOW", close_viewer)
+
+    def open_selected_hex_viewer(self):
+        """عرض الملف المحدد بالنظام الست عشري"""
+        selected_entries = self.get_selected_entries()
+        if selected_entries and not selected_entries[0].is_dir:
+            self.open_hex_viewer(os.path.join(self.current_dir, selected_entries[0].name))
+
+    def open_hex_viewer(self, file_path):
+        """عرض ملف ثنائي بالنظام الست عشري مع قراءة الصفوف الظاهرة فقط من القرص"""
+        try:
+            f = open(file_path, "rb")
+            size = os.fstat(f.fileno()).st_size
+        except OSError as e:
+            messagebox.showerror("خطأ", f"تعذر فتح الملف: {e}")
+            return
+            
+        viewer_window = tk.Toplevel(self.root)
+        viewer_window.title(f"عرض ست عشري - {os.path.basename(file_path)}")
+        viewer_window.geometry("760x500")
+        self.current_opened_windows.append(viewer_window)
+        total_rows = max(1, (size + HEX_BYTES_PER_ROW - 1) // HEX_BYTES_PER_ROW)
+        state = {"top": 0}
         
-        # شريط الحالة
-        status_bar = tk.Label(editor_window, anchor=tk.W, bd=1, relief=tk.SUNKEN)
+        status_bar = tk.Label(viewer_window, anchor=tk.W, bd=1, relief=tk.SUNKEN)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        scrollbar = tk.Scrollbar(viewer_window)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        hex_font = tkfont.Font(family="Courier New", size=11)
+        hex_text = tk.Text(viewer_window, font=hex_font, wrap=tk.NONE, cursor="arrow")
+        hex_text.pack(fill=tk.BOTH, expand=True)
         
-        # تحديث شريط الحالة
-        def update_status(event=None):
-            cursor_position = text_area.index(tk.INSERT)
-            line, column = cursor_position.split('.')
+        def get_visible_rows():
+            return max(1, hex_text.winfo_height() // hex_font.metrics("linespace"))
             
-            char_count = len(text_area.get(1.0, tk.END)) - 1  # -1 للمحرف الأخير
-            status_text = f"السطر: {line} | العمود: {column} | عدد الأحرف: {char_count}"
+        def render():
+            """قراءة الصفوف الظاهرة فقط، فحجم الملف لا يؤثر في سرعة العرض"""
+            rows = get_visible_rows()
+            top = max(0, min(state["top"], total_rows - rows))
+            state["top"] = top
+            try:
+                f.seek(top * HEX_BYTES_PER_ROW)
+                data = f.read(rows * HEX_BYTES_PER_ROW)
+            except (OSError, ValueError) as e:
+                status_bar.config(text=f"خطأ في القراءة: {e}")
+                return
+            hex_text.config(state=tk.NORMAL)
+            hex_text.delete(1.0, tk.END)
+            hex_text.insert(1.0, format_hex_rows(data, top * HEX_BYTES_PER_ROW))
+            hex_text.config(state=tk.DISABLED)
+            scrollbar.set(top / total_rows, min(1.0, (top + rows) / total_rows))
+            status_bar.config(text=f"الموضع: {top * HEX_BYTES_PER_ROW:08x} | الحجم: "
+                                   f"{self.get_human_readable_size(size)} ({size} بايت)")
             
-            if text_area.edit_modified():
-                status_text += " | [غير محفوظ]"
-                
-            status_bar.config(text=status_text)
+        def scroll(*args):
+            if args[0] == "moveto":
+                state["top"] = int(float(args[1]) * total_rows)
+            elif args[2] == "pages":
+                state["top"] += int(args[1]) * get_visible_rows()
+            else:
+                state["top"] += int(args[1])
+            render()
+            return "break"
             
-        # ربط تحديث الحالة بأحداث المحرر
-        text_area.bind("<KeyPress>", update_status)
-        text_area.bind("<KeyRelease>", update_status)
-        text_area.bind("<ButtonRelease-1>", update_status)
-        
-        # فتح الملف إذا تم تحديده
-        if file_path:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    text_area.delete(1.0, tk.END)
-                    text_area.insert(1.0, f.read())
-                    text_area.edit_modified(False)
-            except Exception as e:
-                messagebox.showerror("خطأ", f"حدث خطأ أثناء قراءة الملف: {e}")
-                
-        # التهيئة الأولية
-        update_line_numbers()
-        update_status()
-        
-        # تسجيل وظيفة الإغلاق
-        editor_window.protocol("WM_DELETE_WINDOW", lambda: self.close_window(editor_window))
+        def close_viewer():
+            f.close()
+            self.close_window(viewer_window)
+            
+        scrollbar.config(command=scroll)
+        hex_text.bind("<Configure>", lambda e: render())
+        hex_text.bind("<MouseWheel>", lambda e: scroll("scroll", -3 if e.delta > 0 else 3, "units"))
+        hex_text.bind("<Button-4>", lambda e: scroll("scroll", -3, "units"))
+        hex_text.bind("<Button-5>", lambda e: scroll("scroll", 3, "units"))
+        viewer_window.bind("<Up>", lambda e: scroll("scroll", -1, "units"))
+        viewer_window.bind("<Down>", lambda e: scroll("scroll", 1, "units"))
+        viewer_window.bind("<Prior>", lambda e: scroll("scroll", -1, "pages"))
+        viewer_window.bind("<Next>", lambda e: scroll("scroll", 1, "pages"))
+        viewer_window.bind("<Home>", lambda e: scroll("moveto", 0))
+        viewer_window.bind("<End>", lambda e: scroll("moveto", 1))
+        viewer_window.protocol("WM_DELETE_WINDOW", close_viewer)
+
+    def get_editor_window(self):
+        """نافذة المحرر المشتركة بين كل المستندات، تُنشأ عند أول استخدام"""
+        if self.editor_window is not None and self.editor_window.winfo_exists():
+            return self.editor_window
+        self.editor_window = tk.Toplevel(self.root)
+        self.editor_window.title("المحرر النصي")
+        self.editor_window.geometry("800x600")
+        self.editor_window.minsize(400, 300)
+        self.current_opened_windows.append(self.editor_window)
+        self.editor_tabs = []
+        self.editor_notebook = ttk.Notebook(self.editor_window)
+        self.editor_notebook.pack(fill=tk.BOTH, expand=True)
+        self.editor_notebook.bind("<<NotebookTabChanged>>", self.on_editor_tab_changed)
+        self.editor_window.protocol("WM_DELETE_WINDOW", self.close_editor_window)
+        return self.editor_window
+
+    def get_selected_editor_tab(self):
+        selected = self.editor_notebook.select()
+        for tab in self.editor_tabs:
+            if str(tab.frame) == selected:
+                return tab
+        return None
+
+    def on_editor_tab_changed(self, event=None):
+        """تفعيل المستند المختار (واستعادته إن كان مُسبتًا) ثم إسبات غيره عند تجاوز الميزانية"""
+        tab = self.get_selected_editor_tab()
+        if tab is None:
+            return
+        tab.last_used = time.monotonic()
+        tab.activate()
+        self.hibernate_editor_tabs()
+
+    def hibernate_editor_tabs(self):
+        """إسبات التبويبات غير النشطة بدءًا من الأقدم استخدامًا حتى تعود الذاكرة ضمن الميزانية"""
+        active = self.get_selected_editor_tab()
+        awake = [tab for tab in self.editor_tabs if not tab.hibernated]
+        total = sum(tab.get_memory_estimate() for tab in awake)
+        for tab in sorted(awake, key=lambda tab: tab.last_used):
+            if total <= EDITOR_MEMORY_BUDGET:
+                break
+            if tab is active:
+                continue
+            memory = tab.get_memory_estimate()
+            if tab.hibernate():
+                total -= memory
+
+    def close_editor_window(self):
+        """إغلاق المستندات واحدًا تلو الآخر، والتوقف إذا ألغى المستخدم إغلاق أحدها"""
+        if self.editor_tabs:
+            tab = self.editor_tabs[-1]
+            self.editor_notebook.select(tab.frame)
+            # إغلاق آخر مستند يغلق النافذة نفسها
+            tab.close(on_closed=self.close_editor_window)
+
+    def open_text_editor(self, file_path=None, recovery_file=None):
+        """فتح مستند في تبويب جديد من المحرر، أو استعادة نص غير محفوظ من نسخة احتياطية"""
+        if file_path and self.editor_window is not None:
+            # الملف مفتوح بالفعل: الانتقال إلى تبويبه
+            for tab in self.editor_tabs:
+                if tab.path.get() and os.path.abspath(tab.path.get()) == os.path.abspath(file_path):
+                    self.editor_notebook.select(tab.frame)
+                    return
+                    
+        tab = TextEditor(self, file_path, recovery_file)
+        # التفعيل مباشرة دون انتظار حدث تغيير التبويب، ثم إسبات غيره عند الحاجة
+        self.editor_notebook.select(tab.frame)
+        self.on_editor_tab_changed()
 
     def show_about(self):
         """عرض معلومات حول النظام"""
@@ -0,0 +1,215 @@
+import os
+import re
+import sys
+import tempfile
+
+import pytest
+
+# بيانات التطبيق (~/.zu_os) تُحسب عند الاستيراد، فتُوجَّه إلى مجلد مؤقت قبل استيراد index
+os.environ["HOME"] = tempfile.mkdtemp(prefix="zu_os_home_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeTextCommand:
+    """أمر ودجة نص Tk مبسط يكفي لاختبار حساب المواضع والتعديلات دون شاشة"""
+
+    MODIFIER = re.compile(r"\s*(?:([+-])\s*(\d+)\s*(chars|char|c|lines|line|l)\b|(linestart|lineend))")
+
+    def __init__(self):
+        # نص Tk ينتهي دائمًا بسطر جديد لا يُحذف
+        self.text = "\n"
+        self.marks = {"insert": 0}
+        self.state = "normal"
+        self.modified = False
+        self.top = 0.0
+
+    def position(self, offset):
+        before = self.text[:offset]
+        return before.count("\n") + 1, offset - (before.rfind("\n") + 1)
+
+    def offset(self, line, column):
+        lines = self.text.split("\n")[:-1]
+        if line > len(lines):
+            return len(self.text)
+        line = max(line, 1)
+        return sum(len(text) + 1 for text in lines[:line - 1]) + min(column, len(lines[line - 1]))
+
+    def parse(self, index):
+        index = str(index)
+        match = re.match(r"(\d+)\.(\d+|end)|end|[\w.]+", index)
+        base = match.group(0)
+        if base == "end":
+            offset = len(self.text)
+        elif base in self.marks:
+            offset = self.marks[base]
+        else:
+            line = int(match.group(1))
+            column = 10 ** 9 if match.group(2) == "end" else int(match.group(2))
+            offset = self.offset(line, column)
+        rest = index[match.end():]
+        while rest.strip():
+            modifier = self.MODIFIER.match(rest)
+            sign, count, unit, anchor = modifier.groups()
+            line, column = self.position(offset)
+            if anchor == "linestart":
+                offset -= column
+            elif anchor == "lineend":
+                offset = self.text.index("\n", offset) if offset < len(self.text) else offset
+            elif unit.startswith("l"):
+                offset = self.offset(line + int(count) * (1 if sign == "+" else -1), column)
+            else:
+                offset += int(count) * (1 if sign == "+" else -1)
+            offset = max(0, min(offset, len(self.text)))
+            rest = rest[modifier.end():]
+        return offset
+
+    def format(self, offset):
+        return "%d.%d" % self.position(offset)
+
+    def __call__(self, command, *args):
+        if command == "index":
+            return self.format(self.parse(args[0]))
+        if command == "compare":
+            a, b = self.parse(args[0]), self.parse(args[2])
+            return {"<": a < b, "<=": a <= b, "==": a == b, ">=": a >= b, ">": a > b, "!=": a != b}[args[1]]
+        if command == "get":
+            start = self.parse(args[0])
+            end = self.parse(args[1]) if len(args) > 1 else start + 1
+            return self.text[start:end]
+        if command == "insert":
+            offset = min(self.parse(args[0]), len(self.text) - 1)
+            text = "".join(args[1::2])
+            self.text = self.text[:offset] + text + self.text[offset:]
+            for name, mark in self.marks.items():
+                if mark >= offset:
+                    self.marks[name] = mark + len(text)
+            return ""
+        if command == "delete":
+            start = self.parse(args[0])
+            end = min(self.parse(args[1]) if len(args) > 1 else start + 1, len(self.text) - 1)
+            if start < end:
+                self.text = self.text[:start] + self.text[end:]
+                for name, mark in self.marks.items():
+                    self.marks[name] = start if start < mark < end else mark - (end - start) if mark >= end else mark
+            return ""
+        if command == "mark":
+            self.marks[args[1]] = self.parse(args[2])
+            return ""
+        if command in ("cget", "configure"):
+            if len(args) == 2:
+                self.state = args[1]
+            return self.state
+        if command == "edit" and args[0] == "modified":
+            if len(args) > 1:
+                self.modified = bool(args[1])
+            return int(self.modified)
+        if command == "yview":
+            if args and args[0] == "moveto":
+                self.top = float(args[1])
+                return ""
+            return (self.top, 1.0)
+        if command == "tag" and args[0] == "ranges":
+            return ()
+        if command == "see":
+            return ""
+        raise NotImplementedError(command)
+
+
+class FakeTk:
+    """مفسر Tk مبسط: أوامر بأسماء، مع rename كما تستخدمه TextChangeTracker"""
+
+    def __init__(self):
+        self.commands = {}
+
+    def call(self, *args):
+        if len(args) == 1 and isinstance(args[0], tuple):
+            args = args[0]
+        if args[0] == "rename":
+            self.commands[args[2]] = self.commands.pop(args[1])
+            return ""
+        return self.commands[args[0]](*args[1:])
+
+    def createcommand(self, name, function):
+        self.commands[name] = function
+
+    def deletecommand(self, name):
+        del self.commands[name]
+
+
+class FakeText:
+    """بديل لـ tk.Text بالواجهة التي يستخدمها المحرر، تمر أوامره بالوسيط مثل الودجة الحقيقية"""
+
+    def __init__(self):
+        self.tk = FakeTk()
+        self.command = FakeTextCommand()
+        self.tk.createcommand(str(self), self.command)
+
+    def __str__(self):
+        return ".text"
+
+    def call(self, *args):
+        return self.tk.call(str(self), *args)
+
+    def get(self, start, end=None):
+        return self.call("get", start, end) if end is not None else self.call("get", start)
+
+    def index(self, index):
+        return self.call("index", index)
+
+    def insert(self, index, text):
+        return self.call("insert", index, text)
+
+    def delete(self, start, end=None):
+        return self.call("delete", start, end) if end is not None else self.call("delete", start)
+
+    def replace(self, start, end, text):
+        return self.call("replace", start, end, text)
+
+    def mark_set(self, name, index):
+        return self.call("mark", "set", name, index)
+
+    def edit_modified(self, flag=None):
+        if flag is None:
+            return bool(self.call("edit", "modified"))
+        return self.call("edit", "modified", flag)
+
+    def edit_undo(self):
+        return self.call("edit", "undo")
+
+    def edit_redo(self):
+        return self.call("edit", "redo")
+
+    def edit_separator(self):
+        return self.call("edit", "separator")
+
+    def config(self, state):
+        return self.call("configure", "-state", state)
+
+    def yview(self):
+        return self.call("yview")
+
+    def yview_moveto(self, fraction):
+        return self.call("yview", "moveto", fraction)
+
+
+@pytest.fixture
+def text_widget():
+    return FakeText()
+
+
+@pytest.fixture
+def explorer():
+    """مستكشف ملفات بلا نافذة: نموذج القائمة وتحديدها وذاكرتها المؤقتة فقط"""
+    import index
+
+    app = index.ZUOperatingSystem.__new__(index.ZUOperatingSystem)
+    app.current_dir = "/dir"
+    app.dir_entries = []
+    app.selected_indices = set()
+    app.focus_index = None
+    app.view_offset = 0
+    app.directory_cache = index.DirectoryCache()
+    app.render_visible_rows = lambda: None
+    app.explorer_status = type("Label", (), {"config": lambda self, **kwargs: None})()
+    app.get_explorer_status_text = lambda: ""
+    return app
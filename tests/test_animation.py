@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+
+import pytest
+
+import index
+
+
+def test_frame_duration_defaults_and_browser_minimum():
+    assert index.get_frame_duration({"duration": 40}) == 40
+    assert index.get_frame_duration({}) == index.ANIMATION_DEFAULT_DURATION
+    assert index.get_frame_duration({"duration": 0}) == index.ANIMATION_DEFAULT_DURATION
+    assert index.get_frame_duration({"duration": 10}) == index.ANIMATION_DEFAULT_DURATION
+
+
+def test_advance_shows_next_frame_on_time():
+    durations = {0: 100, 1: 100, 2: 100}
+
+    assert index.advance_animation(0, 10.1, 10.1, durations, 3) == (1, 10.1)
+    assert index.advance_animation(2, 10.1, 10.15, durations, 3) == (0, 10.1)
+
+
+def test_advance_skips_frames_whose_time_has_passed():
+    durations = {0: 100, 1: 100, 2: 100, 3: 100}
+
+    index_, due = index.advance_animation(0, 10.0, 10.25, durations, 4)
+
+    assert index_ == 3
+    assert due == pytest.approx(10.2)
+
+
+def test_advance_stops_skipping_at_undecoded_frame():
+    assert index.advance_animation(0, 10.0, 10.25, {0: 100, 1: 100}, 4) == (2, pytest.approx(10.1))
+
+
+def test_advance_resets_timing_after_long_stall():
+    durations = {0: 100, 1: 100}
+
+    # بعد توقف طويل يُستأنف التشغيل من الإطار التالي بدل تخطي دورات كاملة
+    assert index.advance_animation(0, 10.0, 10.0 + index.ANIMATION_MAX_LAG + 5, durations, 2) == (1, 16.0)
+
+
+def make_animation(frame_count, wanted=0, max_bytes=1000):
+    animation = index.AnimatedImageCanvas.__new__(index.AnimatedImageCanvas)
+    animation.condition = threading.Condition()
+    animation.frame_count = frame_count
+    animation.frames = {}
+    animation.durations = {}
+    animation.ready = set()
+    animation.wanted = wanted
+    animation.photos = OrderedDict()
+    animation.photo_bytes = 0
+    animation.max_bytes = max_bytes
+    animation.zoom = 1.0
+    animation.final = True
+    return animation
+
+
+def test_frames_outside_the_decode_window_are_dropped(monkeypatch):
+    monkeypatch.setattr(index, "ANIMATION_DECODE_AHEAD", 3)
+    animation = make_animation(10, wanted=8)
+    animation.frames = {i: f"frame{i}" for i in (1, 8)}
+    animation.durations = {8: 100}
+
+    assert animation.get_missing_frame() == 9
+    assert animation.frames == {8: "frame8"}
+
+    # الإطار المفكوك الذي تحوّل ولم تُعرف مدته لا يزال يحتاج فكًا
+    animation.frames = {}
+    animation.ready = {8, 9, 0}
+    animation.durations = {8: 100, 0: 100}
+    assert animation.get_missing_frame() == 9
+    animation.durations[9] = 100
+    assert animation.get_missing_frame() is None
+
+
+def test_stored_photos_are_disposed_oldest_first_within_budget():
+    animation = make_animation(10, max_bytes=250)
+    animation.store_photo((0.5, True, 0), "old zoom", 100)
+    for i in range(3):
+        animation.store_photo((1.0, True, i), f"photo{i}", 100)
+
+    assert list(animation.photos) == [(1.0, True, 1), (1.0, True, 2)]
+    assert animation.photo_bytes == 200
+    # الإطار المستبعد بالتكبير الحالي يعود إلى قائمة ما يجب فكه
+    assert animation.ready == {1, 2}
+
+
+def test_oversized_photo_is_kept_alone():
+    animation = make_animation(10, max_bytes=50)
+    animation.store_photo((1.0, True, 0), "photo0", 100)
+
+    assert list(animation.photos) == [(1.0, True, 0)]
+    assert animation.ready == {0}
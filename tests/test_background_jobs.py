@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+import index
+
+
+class FakeTrash:
+    def __init__(self):
+        self.moved = []
+        self.first_moved = threading.Event()
+
+    def move_to_trash(self, path):
+        self.moved.append(path)
+        self.first_moved.set()
+        return "/trash", path
+
+
+def test_background_job_requires_run_and_describe():
+    with pytest.raises(TypeError):
+        index.BackgroundJob()
+
+
+def test_trash_job_waits_while_paused():
+    trash = FakeTrash()
+    job = index.TrashJob(trash, ["a", "b"])
+    job.pause()
+    job.start()
+
+    assert not trash.first_moved.wait(0.2)
+    job.resume()
+    assert trash.first_moved.wait(5)
+    while not job.finished:
+        threading.Event().wait(0.01)
+    assert [item[2] for item in job.trashed] == ["a", "b"]
+
+
+def test_trash_job_cancel_wakes_paused_job():
+    trash = FakeTrash()
+    job = index.TrashJob(trash, ["a"])
+    job.pause()
+    job.start()
+    job.cancel()
+
+    while not job.finished:
+        threading.Event().wait(0.01)
+    assert trash.moved == []
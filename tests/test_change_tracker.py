@@ -0,0 +1,105 @@
+import random
+
+import index
+
+
+def stats(tracker):
+    return tracker.chars, tracker.lines, tracker.words
+
+
+def recount(text_widget):
+    text = text_widget.get("1.0", "end-1c")
+    return len(text), text.count("\n") + 1, index.count_words(text)
+
+
+def test_insert_and_delete_across_lines_update_stats(text_widget):
+    tracker = index.TextChangeTracker(text_widget)
+
+    text_widget.insert("1.0", "one two\nthree four five\nsix")
+    assert stats(tracker) == (27, 3, 6)
+
+    # الحذف عبر سطرين يدمج كلمتين في كلمة واحدة
+    text_widget.delete("1.4", "2.3")
+    assert text_widget.get("1.0", "end-1c") == "one ee four five\nsix"
+    assert stats(tracker) == recount(text_widget) == (20, 2, 5)
+
+    text_widget.insert("1.2", "x\ny ")
+    assert stats(tracker) == recount(text_widget)
+
+
+def test_replace_is_one_undoable_edit(text_widget):
+    tracker = index.TextChangeTracker(text_widget)
+    text_widget.insert("1.0", "alpha beta\ngamma")
+    text_widget.edit_separator()
+
+    text_widget.replace("1.6", "2.2", "B\nC D\nE")
+    assert text_widget.get("1.0", "end-1c") == "alpha B\nC D\nEmma"
+    assert stats(tracker) == recount(text_widget)
+
+    text_widget.edit_undo()
+    assert text_widget.get("1.0", "end-1c") == "alpha beta\ngamma"
+    assert stats(tracker) == (16, 2, 3)
+
+
+def test_undo_and_redo_restore_text_and_stats(text_widget):
+    tracker = index.TextChangeTracker(text_widget)
+    for ch in "hello":
+        text_widget.insert("end", ch)
+    text_widget.edit_separator()
+    text_widget.insert("end", "\nworld")
+    text_widget.delete("1.0", "1.2")
+    history = []
+
+    while tracker.undo_stack:
+        history.append((text_widget.get("1.0", "end-1c"), stats(tracker)))
+        text_widget.edit_undo()
+        assert stats(tracker) == recount(text_widget)
+    assert text_widget.get("1.0", "end-1c") == ""
+    # الأحرف الخمسة المكتوبة تباعًا خطوة تراجع واحدة
+    assert [text for text, _ in history] == ["llo\nworld", "hello\nworld", "hello"]
+
+    for text, counts in reversed(history):
+        text_widget.edit_redo()
+        assert (text_widget.get("1.0", "end-1c"), stats(tracker)) == (text, counts)
+
+
+def test_new_edit_clears_redo(text_widget):
+    tracker = index.TextChangeTracker(text_widget)
+    text_widget.insert("1.0", "abc")
+    text_widget.edit_undo()
+
+    assert tracker.redo_stack
+    text_widget.insert("1.0", "x")
+    assert tracker.redo_stack == []
+
+
+def test_disabled_widget_records_nothing(text_widget):
+    tracker = index.TextChangeTracker(text_widget)
+    text_widget.config(state="disabled")
+
+    text_widget.insert("1.0", "ignored")
+    assert text_widget.get("1.0", "end-1c") == ""
+    assert stats(tracker) == (0, 1, 0)
+    assert tracker.version == 0
+
+
+def test_random_edits_keep_stats_in_step_with_text(text_widget):
+    tracker = index.TextChangeTracker(text_widget)
+    rng = random.Random(7)
+    pieces = ["a", " ", "\n", "word ", "x\ny", "  \n "]
+    for step in range(300):
+        end = text_widget.index("end-1c")
+        last_line = int(end.split(".")[0])
+        line = rng.randint(1, last_line)
+        column = rng.randint(0, len(text_widget.get(f"{line}.0", f"{line}.end")))
+        position = f"{line}.{column}"
+        action = rng.random()
+        if action < 0.55:
+            text_widget.insert(position, rng.choice(pieces))
+        elif action < 0.85:
+            text_widget.delete(position, f"{position}+{rng.randint(1, 6)}c")
+        elif action < 0.95:
+            text_widget.edit_undo()
+        else:
+            text_widget.edit_redo()
+        assert stats(tracker) == recount(text_widget), step
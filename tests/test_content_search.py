@@ -0,0 +1,57 @@
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import index
+
+
+def test_search_files_batch_reports_lines_and_snippets(tmp_path):
+    text = tmp_path / "a.txt"
+    text.write_bytes(b"first\nneedle one\n\nsecond NEEDLE\n")
+    binary = tmp_path / "b.bin"
+    binary.write_bytes(b"needle\0")
+    empty = tmp_path / "c.txt"
+    empty.write_bytes(b"")
+    paths = [str(text), str(binary), str(empty), str(tmp_path / "missing.txt")]
+
+    matches, scanned = index.search_files_batch(paths, "needle", per_file_limit=10)
+
+    assert scanned == 4
+    assert matches == [(str(text), 2, "needle one"), (str(text), 4, "second NEEDLE")]
+
+
+def test_search_files_batch_stops_at_per_file_limit(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("x\n" * 10)
+
+    matches, _ = index.search_files_batch([str(path)], "x", per_file_limit=3)
+
+    assert [line for _, line, _ in matches] == [1, 2, 3]
+
+
+def test_iter_batches_skips_hidden_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(index, "CONTENT_SEARCH_BATCH", 2)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("x")
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("x")
+
+    batches = list(index.ContentSearch(str(tmp_path), "x").iter_batches())
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert sorted(os.path.basename(path) for batch in batches for path in batch) == ["a", "b", "c"]
+
+
+def test_collect_counts_failed_batches():
+    search = index.ContentSearch("/", "x")
+    done, failed = Future(), Future()
+    done.set_result(([("/a.txt", 1, "x")], 3))
+    failed.set_exception(BrokenProcessPool("worker died"))
+    search.batch_sizes = {done: 3, failed: 5}
+
+    search.collect([done, failed])
+
+    assert search.files_scanned == 3
+    assert (search.failed_batches, search.failed_files) == (1, 5)
+    assert search.results.get_nowait() == ("/a.txt", 1, "x")
+    assert search.batch_sizes == {}
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+import index
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    path = tmp_path / "transfers"
+    monkeypatch.setattr(index, "TRANSFER_JOURNAL_DIR", str(path))
+    return path
+
+
+def run(job):
+    job.started_at = 0
+    job.run()
+    return job
+
+
+def test_copies_files_and_folders(tmp_path):
+    source = tmp_path / "src"
+    (source / "sub").mkdir(parents=True)
+    (source / "a.txt").write_bytes(b"a" * 1000)
+    (source / "sub" / "b.txt").write_bytes(b"b" * 10)
+    destination = tmp_path / "dst"
+    destination.mkdir()
+
+    job = run(index.CopyJob([str(source)], str(destination), verify=True))
+
+    assert job.errors == []
+    assert (destination / "src" / "a.txt").read_bytes() == b"a" * 1000
+    assert (destination / "src" / "sub" / "b.txt").read_bytes() == b"b" * 10
+    assert job.total_files == job.copied_files == job.verified_files == 2
+
+
+def test_same_file_is_not_journaled(tmp_path, journal_dir):
+    source = tmp_path / "b.txt"
+    source.write_text("data")
+
+    job = run(index.CopyJob([str(source)], str(tmp_path)))
+
+    assert len(job.errors) == 1
+    assert source.read_text() == "data"
+    assert not job.journal_kept
+    assert index.TransferJournal.find_pending() == []
+
+
+def test_missing_source_is_not_journaled(tmp_path):
+    destination = tmp_path / "dst"
+    destination.mkdir()
+
+    job = run(index.CopyJob([str(tmp_path / "gone.txt")], str(destination)))
+
+    assert len(job.errors) == 1
+    assert not job.journal_kept
+    assert index.TransferJournal.find_pending() == []
+
+
+def test_interrupted_copy_resumes_from_journal(tmp_path):
+    source = tmp_path / "big.bin"
+    data = os.urandom(3 * 1024 * 1024)
+    source.write_bytes(data)
+    destination = tmp_path / "dst"
+    destination.mkdir()
+    target = destination / "big.bin"
+
+    # محاكاة انقطاع بعد كتابة ميغابايت واحد
+    journal = index.TransferJournal.create([str(source)], str(destination), False)
+    target.write_bytes(data[:1024 * 1024])
+    journal.record_offset(str(target), 1024 * 1024)
+    journal.close()
+
+    loaded = index.TransferJournal.load(journal.path)
+    assert loaded.offsets == {str(target): 1024 * 1024}
+    job = run(index.CopyJob(loaded.sources, loaded.destination_dir, loaded.verify, loaded))
+
+    assert job.errors == []
+    assert target.read_bytes() == data
+    assert index.TransferJournal.find_pending() == []
+
+
+def test_journal_load_ignores_truncated_last_line(tmp_path):
+    journal = index.TransferJournal.create(["/a"], "/b", True)
+    journal.record_done("/b/a")
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"file": "/b/c", "off')
+
+    loaded = index.TransferJournal.load(journal.path)
+
+    assert loaded.sources == ["/a"] and loaded.verify
+    assert loaded.completed == {"/b/a"}
+    assert loaded.offsets == {}
+
+
+def test_journal_round_trip_tracks_offsets_and_completed_files(tmp_path):
+    journal = index.TransferJournal.create(["/src/a", "/src/b"], "/dst", True)
+    journal.record_offset("/dst/a", 4096)
+    journal.record_offset("/dst/b", 100)
+    journal.record_offset("/dst/a", 8192)
+    journal.record_done("/dst/b")
+    journal.close()
+
+    loaded = index.TransferJournal.load(journal.path)
+
+    assert (loaded.sources, loaded.destination_dir, loaded.verify) == (["/src/a", "/src/b"], "/dst", True)
+    assert loaded.offsets == {"/dst/a": 8192}
+    assert loaded.completed == {"/dst/b"}
+    assert index.TransferJournal.find_pending() == [journal.path]
+    loaded.remove()
+    assert index.TransferJournal.find_pending() == []
+
+
+def test_symlinks_are_recreated_instead_of_followed(tmp_path):
+    source = tmp_path / "src"
+    (source / "sub").mkdir(parents=True)
+    (source / "sub" / "a.txt").write_text("a")
+    # رابط يشير إلى أعلى الشجرة كان يجعل المرور بلا نهاية
+    os.symlink("..", source / "sub" / "loop")
+    os.symlink("sub/a.txt", source / "alias.txt")
+    destination = tmp_path / "dst"
+    destination.mkdir()
+
+    job = run(index.CopyJob([str(source)], str(destination)))
+
+    assert job.errors == []
+    assert job.total_files == 1
+    assert os.readlink(destination / "src" / "sub" / "loop") == ".."
+    assert os.readlink(destination / "src" / "alias.txt") == "sub/a.txt"
+    assert (destination / "src" / "alias.txt").read_text() == "a"
+
+
+def test_folder_cannot_be_copied_into_itself(tmp_path):
+    source = tmp_path / "src"
+    (source / "inner").mkdir(parents=True)
+    (source / "a.txt").write_text("a")
+
+    job = run(index.CopyJob([str(source)], str(source / "inner")))
+
+    assert len(job.errors) == 1
+    assert os.listdir(source / "inner") == []
+
+
+def test_unreadable_top_level_source_does_not_stop_the_others(tmp_path, monkeypatch):
+    good = tmp_path / "good.txt"
+    good.write_text("good")
+    bad = tmp_path / "bad.txt"
+    bad.write_text("bad")
+    destination = tmp_path / "dst"
+    destination.mkdir()
+    getsize = os.path.getsize
+
+    def failing_getsize(path):
+        if path == str(bad):
+            raise PermissionError(13, "Permission denied", path)
+        return getsize(path)
+
+    monkeypatch.setattr(index.os.path, "getsize", failing_getsize)
+    job = run(index.CopyJob([str(bad), str(good)], str(destination)))
+
+    assert [path for path, _ in job.errors] == [str(bad)]
+    assert (destination / "good.txt").read_text() == "good"
@@ -0,0 +1,94 @@
+import index
+
+
+def make_entries(count, prefix="f"):
+    return [index.DirectoryEntry(f"{prefix}{i}.txt", False, i, 0.0) for i in range(count)]
+
+
+def put(cache, path, entries, signature=None):
+    cache.put(path, signature, entries, index.DirectoryCache.estimate_size(entries))
+
+
+def test_get_counts_hits_and_misses():
+    cache = index.DirectoryCache()
+    entries = make_entries(3)
+    put(cache, "/a", entries, signature=(1, 2, 3))
+
+    assert cache.get("/a") == ((1, 2, 3), entries)
+    assert cache.get("/b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_put_evicts_least_recently_used():
+    size = index.DirectoryCache.estimate_size(make_entries(10))
+    cache = index.DirectoryCache(max_bytes=size * 2)
+    put(cache, "/a", make_entries(10))
+    put(cache, "/b", make_entries(10))
+    cache.get("/a")
+
+    put(cache, "/c", make_entries(10))
+
+    assert list(cache.items) == ["/a", "/c"]
+    assert cache.total_bytes == size * 2
+
+
+def test_update_recomputes_size_of_entries_changed_in_place():
+    cache = index.DirectoryCache()
+    entries = make_entries(2)
+    put(cache, "/a", entries, signature="old")
+
+    entries.extend(make_entries(50, prefix="new"))
+    cache.update("/a", entries)
+
+    assert cache.total_bytes == index.DirectoryCache.estimate_size(entries)
+    assert cache.get("/a") == ("old", entries)
+    cache.update("/a", entries, signature="new")
+    assert cache.get("/a")[0] == "new"
+
+
+def test_update_drops_list_that_outgrew_the_cache():
+    entries = make_entries(2)
+    cache = index.DirectoryCache(max_bytes=index.DirectoryCache.estimate_size(entries))
+    put(cache, "/a", entries)
+
+    entries.extend(make_entries(5, prefix="new"))
+    cache.update("/a", entries)
+
+    assert cache.items == {}
+    assert cache.total_bytes == 0
+
+
+def test_update_ignores_uncached_path():
+    cache = index.DirectoryCache()
+    cache.update("/missing", make_entries(3))
+    assert cache.items == {}
+
+
+def test_update_applies_size_delta_without_recounting(monkeypatch):
+    cache = index.DirectoryCache()
+    entries = make_entries(3)
+    put(cache, "/a", entries)
+    size = cache.total_bytes
+    monkeypatch.setattr(index.DirectoryCache, "estimate_size", None)
+
+    cache.update("/a", entries, delta=-40)
+
+    assert cache.total_bytes == size - 40
+    assert cache.items["/a"][2] == size - 40
+
+
+def test_row_changes_keep_cached_size_exact(explorer):
+    entries = sorted(make_entries(20), key=index.entry_sort_key)
+    explorer.dir_entries = entries
+    put(explorer.directory_cache, "/dir", entries)
+    changes = [
+        ("f3.txt", None),
+        ("f5.txt", index.DirectoryEntry("f5.txt", False, 999, 1.0)),
+        ("a-much-longer-name-than-before.txt", index.DirectoryEntry("a-much-longer-name-than-before.txt", False, 1, 1.0)),
+        ("sub", index.DirectoryEntry("sub", True, 0, 1.0)),
+    ]
+
+    explorer.apply_directory_changes(changes)
+
+    assert len(explorer.dir_entries) == 21
+    assert explorer.directory_cache.total_bytes == index.DirectoryCache.estimate_size(explorer.dir_entries)
@@ -0,0 +1,54 @@
+import types
+
+import index
+
+
+def drain(scan):
+    results = []
+    while not scan.results.empty():
+        results.append(scan.results.get_nowait())
+    return results
+
+
+def test_scan_directory_streams_bounded_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(index, "DIRECTORY_PROGRESS_STEP", 4)
+    for i in range(9):
+        (tmp_path / f"f{i}.txt").write_text("x" * i)
+    (tmp_path / "sub").mkdir()
+    scan = index.DirectoryScan(str(tmp_path))
+
+    index.ZUOperatingSystem.scan_directory(None, scan)
+
+    results = drain(scan)
+    kinds = [kind for kind, _ in results]
+    assert kinds == ["chunk", "chunk", "chunk", "done"]
+    chunks = [payload for kind, payload in results if kind == "chunk"]
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    entries = [entry for chunk in chunks for entry in chunk]
+    signature, size = results[-1][1]
+    assert signature == index.DirectoryCache.get_signature(str(tmp_path))
+    assert size == index.DirectoryCache.estimate_size(entries) - index.sys.getsizeof(entries)
+
+
+def test_scan_directory_reports_unchanged_signature(tmp_path):
+    signature = index.DirectoryCache.get_signature(str(tmp_path))
+    scan = index.DirectoryScan(str(tmp_path), signature)
+
+    index.ZUOperatingSystem.scan_directory(None, scan)
+
+    assert drain(scan) == [("valid", None)]
+
+
+def test_merge_scanned_entries_keeps_folders_first_in_order():
+    shown = []
+    explorer = types.SimpleNamespace(set_directory_entries=lambda entries, keep_view: shown.append(entries))
+    scan = index.DirectoryScan("/x")
+    scan.pending = [index.DirectoryEntry("b.txt", False, 1, 0.0), index.DirectoryEntry("Z", True, 0, 0.0)]
+    index.ZUOperatingSystem.merge_scanned_entries(explorer, scan)
+    scan.pending = [index.DirectoryEntry("A.txt", False, 1, 0.0), index.DirectoryEntry("a", True, 0, 0.0)]
+
+    index.ZUOperatingSystem.merge_scanned_entries(explorer, scan)
+
+    assert [entry.name for entry in scan.entries] == ["a", "Z", "A.txt", "b.txt"]
+    assert shown[-1] is scan.entries
+    assert scan.pending == []
@@ -0,0 +1,117 @@
+import os
+import queue
+import threading
+
+import pytest
+
+import index
+
+
+def event(mask, name=b"", wd=1):
+    # الاسم مبطن بأصفار إلى مضاعف 16 كما يرسله النواة
+    padded = name + b"\0" * (16 - len(name) % 16) if name else b""
+    return index.INOTIFY_EVENT_HEADER.pack(wd, mask, 0, len(padded)) + padded
+
+
+def entries(*names):
+    return [index.DirectoryEntry(name.rstrip("/"), name.endswith("/"), 0, None) for name in names]
+
+
+def listing(explorer):
+    return [entry.name + ("/" if entry.is_dir else "") for entry in explorer.dir_entries]
+
+
+def test_read_events_collects_names_and_ignores_truncated_tail():
+    pending = set()
+    data = event(index.IN_CREATE, b"new.txt") + event(index.IN_DELETE, "é.txt".encode()) + event(index.IN_MODIFY, b"new.txt")
+
+    assert index.DirectoryWatcher.read_events(data + data[:10], pending) is False
+    assert pending == {"new.txt", "é.txt"}
+
+
+def test_read_events_requests_rescan_for_overflow_and_moved_folder():
+    for mask in (index.IN_Q_OVERFLOW, index.IN_DELETE_SELF, index.IN_MOVE_SELF):
+        pending = set()
+        assert index.DirectoryWatcher.read_events(event(index.IN_CREATE, b"a") + event(mask), pending) is True
+        assert pending == {"a"}
+
+
+def test_publish_reads_changed_entries(tmp_path):
+    (tmp_path / "kept.txt").write_text("abc")
+    watcher = index.DirectoryWatcher(str(tmp_path))
+
+    watcher.publish({"kept.txt", "gone.txt"}, rescan=False)
+
+    signature, changes = watcher.changes.get_nowait()
+    assert signature == index.DirectoryCache.get_signature(str(tmp_path))
+    changes = dict(changes)
+    assert changes["gone.txt"] is None
+    assert (changes["kept.txt"].name, changes["kept.txt"].size) == ("kept.txt", 3)
+
+
+def test_publish_falls_back_to_rescan(tmp_path, monkeypatch):
+    watcher = index.DirectoryWatcher(str(tmp_path))
+    watcher.publish({"a"}, rescan=True)
+    monkeypatch.setattr(index, "WATCH_MAX_INCREMENTAL", 1)
+    watcher.publish({"a", "b"}, rescan=False)
+
+    assert [watcher.changes.get_nowait() for _ in range(2)] == [None, None]
+
+
+def test_inotify_reports_created_file(tmp_path):
+    watcher = index.DirectoryWatcher(str(tmp_path))
+    fd = watcher.open_inotify()
+    if fd is None:
+        pytest.skip("inotify غير متاح")
+    # المراقبة مفعلة قبل إنشاء الملف، فلا سباق مع بدء الخيط
+    thread = threading.Thread(target=watcher.run_inotify, args=(fd,))
+    thread.start()
+    try:
+        (tmp_path / "new.txt").write_text("x")
+        try:
+            _, changes = watcher.changes.get(timeout=5)
+        except queue.Empty:
+            pytest.fail("لم يُرسل المراقب أي تغيير")
+    finally:
+        watcher.stop()
+        thread.join()
+        os.close(fd)
+    assert [name for name, _ in changes] == ["new.txt"]
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_changes_keep_listing_sorted_and_move_selection(explorer, bulk):
+    explorer.dir_entries = entries("b/", "d/", "a.txt", "c.txt", "e.txt")
+    explorer.selected_indices = {3}
+    changes = [
+        ("c.txt", index.DirectoryEntry("c.txt", True, 0, None)),
+        ("a.txt", None),
+        ("B.txt", index.DirectoryEntry("B.txt", False, 0, None)),
+    ]
+
+    if bulk:
+        explorer.apply_bulk_directory_changes(changes)
+    else:
+        explorer.apply_row_changes(changes)
+
+    assert listing(explorer) == ["b/", "c.txt/", "d/", "B.txt", "e.txt"]
+    assert [explorer.dir_entries[i].name for i in explorer.selected_indices] == ["c.txt"]
+
+
+def test_row_changes_update_in_place_and_shift_view(explorer):
+    explorer.dir_entries = entries(*[f"{i:02}.txt" for i in range(10)])
+    explorer.selected_indices = {5, 8}
+    explorer.focus_index = 8
+    explorer.view_offset = 4
+    modified = index.DirectoryEntry("08.txt", False, 99, None)
+
+    explorer.apply_row_changes([("08.txt", modified), ("01.txt", None), ("05.txt", None)])
+
+    assert explorer.dir_entries[6] is modified
+    assert explorer.selected_indices == {6}
+    assert explorer.focus_index == 6
+    # حذف صف قبل الجزء الظاهر يزيح الإزاحة حتى لا تقفز القائمة
+    assert explorer.view_offset == 3
+
+    explorer.apply_row_changes([("00a.txt", index.DirectoryEntry("00a.txt", False, 0, None))])
+    assert (explorer.focus_index, explorer.view_offset) == (7, 4)
@@ -0,0 +1,162 @@
+import types
+import zlib
+
+import index
+
+
+class Journal:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, file_path, text):
+        self.saved.append((file_path, text))
+        return True
+
+
+def make_tab(text_widget, path=""):
+    """مستند محرر بلا نافذة: ودجة نص وهمية، ومسار، وما يلزم للإسبات والاستعادة"""
+    tab = index.TextEditor.__new__(index.TextEditor)
+    tab.text_area = text_widget
+    tab.tracker = index.TextChangeTracker(text_widget)
+    tab.window = None
+    tab.path = types.SimpleNamespace(get=lambda: path)
+    tab.journal = Journal()
+    tab.find_bar = types.SimpleNamespace(winfo_ismapped=lambda: False)
+    tab.line_index = None
+    tab.save_job = None
+    tab.stamp = index.get_file_stamp(path) if path else None
+    tab.autosaved_version = 0
+    tab.encoding = "utf-8"
+    tab.hibernated = False
+    tab.snapshot = None
+    tab.stop_search = lambda: None
+    tab.set_syntax_language = lambda path: None
+    return tab
+
+
+def test_hibernate_and_wake_round_trip_text_cursor_and_undo(text_widget):
+    tab = make_tab(text_widget)
+    text_widget.insert("1.0", "first line\nsecond")
+    text_widget.edit_separator()
+    text_widget.insert("2.6", " line")
+    text_widget.edit_modified(True)
+    text_widget.mark_set("insert", "2.3")
+    tracker = tab.tracker
+    undo = [list(group) for group in tracker.undo_stack]
+    stats = (tracker.chars, tracker.lines, tracker.words)
+
+    assert tab.hibernate() is True
+    assert tab.hibernated is True
+    assert text_widget.get("1.0", "end-1c") == ""
+    assert text_widget.command.state == "disabled"
+    assert tracker.undo_stack == []
+    assert zlib.decompress(tab.snapshot)
+    # النص المعدل يُنسخ احتياطيًا قبل تفريغ الودجة
+    assert tab.journal.saved == [("", "first line\nsecond line")]
+
+    assert tab.wake() is True
+    assert tab.hibernated is False
+    assert tab.snapshot is None
+    assert text_widget.get("1.0", "end-1c") == "first line\nsecond line"
+    assert text_widget.index("insert") == "2.3"
+    assert text_widget.edit_modified() is True
+    assert tracker.undo_stack == undo
+    assert (tracker.chars, tracker.lines, tracker.words) == stats
+
+    text_widget.edit_undo()
+    assert text_widget.get("1.0", "end-1c") == "first line\nsecond"
+
+
+def test_unmodified_tab_is_reread_from_disk(text_widget, tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("on disk\n", encoding="utf-8")
+    tab = make_tab(text_widget, str(path))
+    text_widget.insert("1.0", "on disk\n")
+    tab.tracker.undo_stack.clear()
+
+    assert tab.hibernate() is True
+    assert b"on disk" not in zlib.decompress(tab.snapshot)
+    assert tab.journal.saved == []
+
+    assert tab.wake() is True
+    assert text_widget.get("1.0", "end-1c") == "on disk\n"
+    assert text_widget.edit_modified() is False
+
+
+def test_wake_keeps_tab_hibernated_when_file_cannot_be_read(text_widget, tmp_path, monkeypatch):
+    path = tmp_path / "doc.txt"
+    path.write_bytes("café".encode("utf-8"))
+    tab = make_tab(text_widget, str(path))
+    text_widget.insert("1.0", "café")
+    errors = []
+    monkeypatch.setattr(index.messagebox, "showerror", lambda *args, **kwargs: errors.append(args))
+
+    assert tab.hibernate() is True
+    tab.encoding = "ascii"
+
+    assert tab.wake() is False
+    assert errors
+    assert tab.hibernated is True
+    assert tab.snapshot is not None
+    assert text_widget.command.state == "disabled"
+
+
+def test_large_files_and_saving_tabs_are_not_hibernated(text_widget):
+    tab = make_tab(text_widget)
+    tab.save_job = object()
+
+    assert tab.hibernate() is False
+    tab.save_job = None
+    tab.line_index = object()
+    assert tab.hibernate() is False
+    assert tab.get_memory_estimate() == 0
+
+
+class Tab:
+    def __init__(self, name, memory, last_used, can_hibernate=True):
+        self.name = name
+        self.memory = memory
+        self.last_used = last_used
+        self.can_hibernate = can_hibernate
+        self.hibernated = False
+
+    def get_memory_estimate(self):
+        return self.memory
+
+    def hibernate(self):
+        self.hibernated = self.can_hibernate
+        return self.can_hibernate
+
+
+def hibernate_tabs(tabs, active):
+    app = types.SimpleNamespace(editor_tabs=tabs, get_selected_editor_tab=lambda: active)
+    index.ZUOperatingSystem.hibernate_editor_tabs(app)
+    return sorted(tab.name for tab in tabs if tab.hibernated)
+
+
+def test_least_recently_used_tabs_are_hibernated_until_within_budget(monkeypatch):
+    monkeypatch.setattr(index, "EDITOR_MEMORY_BUDGET", 100)
+    old = Tab("old", 40, last_used=1)
+    older = Tab("older", 40, last_used=0)
+    recent = Tab("recent", 40, last_used=2)
+    active = Tab("active", 40, last_used=3)
+
+    assert hibernate_tabs([old, older, recent, active], active) == ["old", "older"]
+
+
+def test_active_tab_and_unhibernatable_tabs_are_skipped(monkeypatch):
+    monkeypatch.setattr(index, "EDITOR_MEMORY_BUDGET", 100)
+    active = Tab("active", 90, last_used=0)
+    saving = Tab("saving", 50, last_used=1, can_hibernate=False)
+    idle = Tab("idle", 50, last_used=2)
+    asleep = Tab("asleep", 500, last_used=-1)
+    asleep.hibernated = True
+
+    assert hibernate_tabs([active, saving, idle, asleep], active) == ["asleep", "idle"]
+
+
+def test_nothing_is_hibernated_within_budget(monkeypatch):
+    monkeypatch.setattr(index, "EDITOR_MEMORY_BUDGET", 100)
+    tabs = [Tab("a", 50, last_used=0), Tab("b", 50, last_used=1)]
+
+    assert hibernate_tabs(tabs, tabs[1]) == []
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import index
+
+
+@pytest.fixture
+def file_index(tmp_path):
+    root = tmp_path / "home"
+    (root / "docs" / "reports").mkdir(parents=True)
+    (root / ".cache").mkdir()
+    for path in ("docs/report_2024.txt", "docs/reports/Summary.md", "docs/50%_off.txt",
+                 "notes.txt", ".cache/hidden_report.txt"):
+        (root / path).write_text("x")
+    file_index = index.FileIndex(path=str(tmp_path / "index.db"), roots=[str(root)])
+    connection = file_index.connect()
+    file_index.update(connection)
+    yield file_index, root, connection
+    connection.close()
+
+
+def names(results):
+    return sorted(name for _, name, _ in results)
+
+
+def test_substring_search_is_case_insensitive_and_skips_hidden(file_index):
+    file_index, root, _ = file_index
+
+    results = file_index.search("REPORT")
+
+    assert names(results) == ["report_2024.txt", "reports"]
+    assert (str(root / "docs"), "reports", True) in results
+
+
+def test_like_wildcards_are_literal(file_index):
+    file_index, _, _ = file_index
+
+    assert names(file_index.search("50%")) == ["50%_off.txt"]
+    assert names(file_index.search("_2024")) == ["report_2024.txt"]
+
+
+def test_glob_search(file_index):
+    file_index, _, _ = file_index
+
+    assert names(file_index.search("*.md")) == ["Summary.md"]
+    assert names(file_index.search("report_20??.txt")) == ["report_2024.txt"]
+
+
+def test_update_reindexes_changed_and_removed_folders(file_index):
+    file_index, root, connection = file_index
+    (root / "docs" / "new_report.txt").write_text("x")
+    for name in os.listdir(root / "docs" / "reports"):
+        os.remove(root / "docs" / "reports" / name)
+    os.rmdir(root / "docs" / "reports")
+
+    file_index.update(connection)
+
+    assert names(file_index.search("report")) == ["new_report.txt", "report_2024.txt"]
+    assert connection.execute("SELECT COUNT(*) FROM dirs WHERE path LIKE '%reports'").fetchone() == (0,)
+
+
+def test_linear_search_without_trigram_table(file_index):
+    file_index, _, _ = file_index
+    file_index.trigram = False
+
+    assert names(file_index.search("report")) == ["report_2024.txt", "reports"]
+    assert names(file_index.search("*.md")) == ["Summary.md"]
+
+
+def test_like_wildcards_are_escaped_before_the_limit(file_index):
+    file_index, root, connection = file_index
+    # أسماء تطابق % و_ بمعناهما في LIKE كانت تملأ الحد قبل الوصول إلى المطابقة الحرفية
+    for i in range(30):
+        (root / f"50{i}x_off.txt").write_text("x")
+        (root / f"a{i}b.txt").write_text("x")
+    (root / "a_b.txt").write_text("x")
+    file_index.update(connection)
+
+    assert names(file_index.search("50%", limit=5)) == ["50%_off.txt"]
+    assert names(file_index.search("a_b", limit=5)) == ["a_b.txt"]
@@ -0,0 +1,115 @@
+import types
+
+import index
+
+ROW = 15
+
+
+class WrappedText:
+    """ودجة نص وهمية: لكل سطر عدد من صفوف العرض، مع إزاحة تمرير بالبكسل"""
+
+    def __init__(self, rows_per_line, top=0, height=60):
+        self.rows_per_line = rows_per_line
+        self.top = top
+        self.height = height
+
+    def line_top(self, line):
+        return sum(self.rows_per_line[:line - 1]) * ROW - self.top
+
+    def index(self, position):
+        if position == "end-1c":
+            return f"{len(self.rows_per_line)}.0"
+        y = int(position.split(",")[1])
+        for line in range(1, len(self.rows_per_line) + 1):
+            if self.line_top(line + 1) > y:
+                return f"{line}.0"
+        return f"{len(self.rows_per_line)}.0"
+
+    def dlineinfo(self, position):
+        # معلومات أول صف عرض للسطر، أو None إذا لم يكن ظاهرًا
+        y = self.line_top(int(position.split(".")[0]))
+        if y + ROW <= 0 or y >= self.height:
+            return None
+        return (0, y, 100, ROW, ROW - 3)
+
+    def winfo_height(self):
+        return self.height
+
+    def winfo_exists(self):
+        return True
+
+    def yview(self):
+        return (self.top, self.top + self.height)
+
+
+class Gutter:
+    def __init__(self):
+        self.width = 40
+        self.numbers = []
+        self.redraws = 0
+
+    def cget(self, option):
+        return str(self.width)
+
+    def config(self, width):
+        self.width = width
+
+    def delete(self, tag):
+        self.numbers = []
+        self.redraws += 1
+
+    def create_text(self, x, y, text, **options):
+        self.numbers.append((y, int(text)))
+
+
+def make_editor(text, first_line=0):
+    editor = index.TextEditor.__new__(index.TextEditor)
+    editor.text_area = text
+    editor.first_line = first_line
+    editor.line_index = None
+    editor.line_numbers = Gutter()
+    editor.gutter_font = types.SimpleNamespace(measure=lambda text: 8 * len(text))
+    editor.gutter_state = None
+    editor.gutter_rows = None
+    editor.gutter_after_id = None
+    return editor
+
+
+def test_rows_of_unwrapped_lines():
+    editor = make_editor(WrappedText([1] * 10, top=2 * ROW))
+
+    assert editor.get_visible_line_rows(60) == [(0, 3), (15, 4), (30, 5), (45, 6)]
+
+
+def test_wrapped_line_started_above_the_view_has_no_number():
+    # السطر الثاني يمتد ثلاثة صفوف وبدأ قبل أعلى منطقة العرض
+    editor = make_editor(WrappedText([1, 3, 1, 1, 1, 1], top=2 * ROW))
+
+    assert editor.get_visible_line_rows(60) == [(30, 3), (45, 4)]
+
+
+def test_partially_scrolled_first_line_keeps_its_number():
+    editor = make_editor(WrappedText([1] * 10, top=5))
+
+    assert editor.get_visible_line_rows(60)[:2] == [(-5, 1), (10, 2)]
+
+
+def test_large_file_window_offsets_line_numbers():
+    editor = make_editor(WrappedText([1] * 10), first_line=5000)
+
+    assert [number for _, number in editor.get_visible_line_rows(30)] == [5001, 5002, 5003]
+
+
+def test_gutter_is_redrawn_only_when_the_view_changes():
+    text = WrappedText([1] * 10)
+    editor = make_editor(text, first_line=95)
+
+    editor.draw_line_numbers()
+    assert editor.line_numbers.numbers == [(0, 96), (15, 97), (30, 98), (45, 99)]
+    # العرض يتسع لأطول رقم في الملف
+    assert editor.line_numbers.width == 8 * 3 + 12
+
+    editor.draw_line_numbers()
+    text.top = 3
+    editor.draw_line_numbers()
+    assert editor.line_numbers.redraws == 2
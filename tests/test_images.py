@@ -0,0 +1,194 @@
+import os
+
+import pytest
+from PIL import Image
+
+import index
+
+
+def save_image(path, size=(40, 20), color="red"):
+    Image.new("RGB", size, color).save(path)
+    return str(path)
+
+
+def test_decoded_image_cache_reuses_and_reports_animation(tmp_path):
+    path = tmp_path / "anim.gif"
+    frames = [Image.new("RGB", (8, 8), color) for color in ("red", "blue")]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    cache = index.DecodedImageCache()
+
+    key, image, animated = cache.acquire(str(path))
+    again = cache.acquire(str(path))
+
+    assert animated is True
+    assert again == (key, image, True)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_decoded_image_cache_keeps_acquired_images_over_budget(tmp_path):
+    first = save_image(tmp_path / "a.png")
+    second = save_image(tmp_path / "b.png", color="blue")
+    cache = index.DecodedImageCache(max_bytes=40 * 20 * 3)
+
+    first_key, _, animated = cache.acquire(first)
+    second_key, _, _ = cache.acquire(second)
+
+    assert animated is False
+    assert set(cache.items) == {first_key, second_key}
+    cache.release(first_key)
+    assert set(cache.items) == {second_key}
+    assert cache.total_bytes == 40 * 20 * 3
+
+
+
+def test_decoded_image_is_pinned_until_every_window_releases_it(tmp_path):
+    first = save_image(tmp_path / "a.png")
+    second = save_image(tmp_path / "b.png", color="blue")
+    cache = index.DecodedImageCache(max_bytes=40 * 20 * 3)
+
+    # نافذتان تعرضان الصورة نفسها فيحجز كل منهما مرجعه
+    key, image, _ = cache.acquire(first)
+    assert cache.acquire(first)[1] is image
+    cache.acquire(second)
+    cache.release(key)
+
+    assert cache.items[key][2] == 1
+    assert key in cache.items
+    cache.release(key)
+    assert key not in cache.items
+    assert cache.total_bytes == 40 * 20 * 3
+
+
+def test_released_images_are_evicted_least_recently_used_first(tmp_path):
+    paths = [save_image(tmp_path / f"{name}.png") for name in "abc"]
+    cache = index.DecodedImageCache(max_bytes=40 * 20 * 3 * 2)
+    keys = []
+    for path in paths[:2]:
+        key, _, _ = cache.acquire(path)
+        cache.release(key)
+        keys.append(key)
+    cache.release(cache.acquire(paths[0])[0])
+
+    third, _, _ = cache.acquire(paths[2])
+
+    assert list(cache.items) == [keys[0], third]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_modified_file_gets_a_new_key(tmp_path):
+    path = save_image(tmp_path / "a.png")
+    cache = index.DecodedImageCache()
+    key, _, _ = cache.acquire(path)
+    save_image(tmp_path / "a.png", size=(10, 10))
+    os.utime(path, ns=(0, 1))
+
+    new_key, image, _ = cache.acquire(path)
+
+    assert new_key != key
+    assert image.size == (10, 10)
+
+
+def test_concurrent_decodes_of_one_image_share_the_first_entry(tmp_path, monkeypatch):
+    path = save_image(tmp_path / "a.png")
+    cache = index.DecodedImageCache()
+    open_image = index.open_image
+    racing = []
+
+    def open_while_another_window_decodes(path, max_pixels=None):
+        # نافذة أخرى تنهي فك الصورة نفسها أثناء فكها هنا
+        if not racing:
+            racing.append(None)
+            racing[0] = cache.acquire(path)
+        return open_image(path, max_pixels)
+
+    monkeypatch.setattr(index, "open_image", open_while_another_window_decodes)
+    key, image, _ = cache.acquire(path)
+
+    assert image is racing[0][1]
+    assert cache.items[key][2] == 2
+    assert cache.total_bytes == 40 * 20 * 3
+
+def test_image_pyramid_builds_levels_on_demand():
+    pyramid = index.ImagePyramid(Image.new("RGB", (64, 32)))
+
+    assert pyramid.get_level(1.0).size == (64, 32)
+    assert pyramid.get_level(0.2).size == (16, 8)
+    assert len(pyramid.levels) == 3
+    assert pyramid.prepare(0.5).size == (32, 16)
+
+
+def test_image_pyramid_level_never_drops_below_requested_scale():
+    pyramid = index.ImagePyramid(Image.new("RGB", (64, 32)))
+
+    # المستوى المختار أدق من المقياس المطلوب أو مساوٍ له، فلا تفقد المعاينة تفاصيل
+    assert pyramid.get_level(0.51).size == (64, 32)
+    assert pyramid.get_level(0.5).size == (32, 16)
+    assert pyramid.get_level(0.26).size == (32, 16)
+    assert len(pyramid.levels) == 2
+
+
+def test_image_pyramid_stops_at_one_pixel_and_converts_palette_images():
+    pyramid = index.ImagePyramid(Image.new("P", (4, 1)))
+
+    assert pyramid.levels[0].mode == "RGBA"
+    assert pyramid.get_level(0.001).size == (4, 1)
+    assert len(pyramid.levels) == 1
+
+
+def test_image_pyramid_reuses_prepared_zoom():
+    pyramid = index.ImagePyramid(Image.new("RGB", (64, 32)))
+
+    assert pyramid.prepare(0.3) is pyramid.prepare(0.3)
+    assert pyramid.prepare(0.3).size == (19, 9)
+    assert pyramid.prepare(0.001).size == (1, 1)
+
+
+def test_get_fit_zoom_never_enlarges():
+    assert index.get_fit_zoom((100, 50), (1000, 1000)) == 1.0
+    assert index.get_fit_zoom((1000, 500), (500, 500)) == 0.5
+
+
+def batch_options(**overrides):
+    options = {"max_size": 16, "format": "JPEG", "quality": 80, "strip_metadata": True}
+    options.update(overrides)
+    return options
+
+
+def test_process_image_resizes_and_picks_unused_names(tmp_path):
+    source = save_image(tmp_path / "photo.png", size=(64, 32))
+    output = tmp_path / "out"
+    output.mkdir()
+    (output / "photo.jpg").write_bytes(b"taken")
+
+    first, _, _ = index.process_image(source, str(output), batch_options())
+    second, _, _ = index.process_image(source, str(output), batch_options())
+
+    assert os.path.basename(first) == "photo (1).jpg"
+    assert os.path.basename(second) == "photo (2).jpg"
+    assert (output / "photo.jpg").read_bytes() == b"taken"
+    with Image.open(first) as image:
+        assert (image.format, image.size) == ("JPEG", (16, 8))
+
+
+def test_process_image_keeps_format_and_never_replaces_source(tmp_path):
+    source = save_image(tmp_path / "photo.png", size=(8, 8))
+
+    result, source_size, _ = index.process_image(source, str(tmp_path), batch_options(max_size=0, format=None))
+
+    assert os.path.basename(result) == "photo (1).png"
+    assert source_size == os.path.getsize(source)
+    with Image.open(source) as image:
+        assert image.size == (8, 8)
+
+
+def test_only_viewer_opens_raise_the_pixel_limit(tmp_path, monkeypatch):
+    path = save_image(tmp_path / "big.png")
+    monkeypatch.setattr(index, "PIL_MAX_IMAGE_PIXELS", 100)
+    monkeypatch.setattr(index.Image, "MAX_IMAGE_PIXELS", 100)
+
+    with pytest.raises(index.Image.DecompressionBombError):
+        index.generate_thumbnail(path)
+    _, image, _ = index.DecodedImageCache().acquire(path)
+
+    assert image.size == (40, 20)
+    assert index.Image.MAX_IMAGE_PIXELS == 100
@@ -0,0 +1,31 @@
+import index
+
+
+def build(path, stride=2):
+    line_index = index.LineIndex(str(path), stride=stride)
+    line_index.run()
+    return line_index
+
+
+def test_line_index_reads_windows_of_lines(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"".join(b"line %d\r\n" % i for i in range(10)))
+    line_index = build(path)
+
+    assert line_index.finished
+    assert line_index.get_total_lines() == 11
+    assert list(line_index.offsets) == [0, 16, 32, 48, 64, 80]
+    assert line_index.get_text(3, 2) == ("line 3\nline 4", 2)
+    assert line_index.get_text(9, 5) == ("line 9", 2)
+    line_index.close()
+
+
+def test_line_index_accepts_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    line_index = build(path)
+
+    assert line_index.finished
+    assert line_index.get_total_lines() == 1
+    assert line_index.get_text(0, 100) == ("", 1)
+    line_index.close()
@@ -0,0 +1,36 @@
+import codecs
+
+import pytest
+
+import index
+
+
+@pytest.mark.parametrize("data, expected", [
+    (codecs.BOM_UTF8 + "سلام".encode("utf-8"), "utf-8-sig"),
+    (codecs.BOM_UTF16_LE + "hi".encode("utf-16-le"), "utf-16"),
+    ("plain text\n".encode("utf-16-le"), "utf-16-le"),
+    ("plain text\n".encode("utf-16-be"), "utf-16-be"),
+    ("مرحبا بالعالم".encode("utf-8"), "utf-8"),
+    ("مرحبا بالعالم".encode("cp1256"), "cp1256"),
+    (b"", "utf-8"),
+])
+def test_sniff_text_file_detects_encoding(tmp_path, data, expected):
+    path = tmp_path / "file.txt"
+    path.write_bytes(data)
+
+    assert index.sniff_text_file(str(path)) == (False, expected)
+
+
+@pytest.mark.parametrize("data", [b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", bytes(range(32)) * 8])
+def test_sniff_text_file_detects_binary(tmp_path, data):
+    path = tmp_path / "file.bin"
+    path.write_bytes(data)
+
+    assert index.sniff_text_file(str(path)) == (True, None)
+
+
+def test_sniff_text_file_ignores_character_cut_at_prefix_end(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes("ا".encode("utf-8") * 10)
+
+    assert index.sniff_text_file(str(path), size=5) == (False, "utf-8")
@@ -0,0 +1,50 @@
+import index
+
+
+PYTHON = ['x = """doc', "still", 'end""" # c', "def f(): return 1"]
+
+
+def shift(tokens, lines):
+    return [[(kind, start, line + lines, end) for kind, start, line, end in row] for row in tokens]
+
+
+def test_lex_python_carries_string_state_across_lines():
+    tokens, states = index.lex_python(PYTHON, "")
+
+    assert states == ["", '"""', '"""', "", ""]
+    assert tokens[0] == [("string", 4, 2, 6)]
+    assert tokens[2] == [("comment", 7, 2, 10)]
+    assert ("definition", 4, 3, 5) in tokens[3]
+
+
+def test_lex_python_from_saved_state_matches_full_lex():
+    full_tokens, full_states = index.lex_python(PYTHON, "")
+
+    tokens, states = index.lex_python(PYTHON[1:], full_states[1])
+
+    assert states == full_states[1:]
+    assert shift(tokens[1:], 1) == full_tokens[2:]
+
+
+def test_lex_python_survives_unterminated_string():
+    tokens, states = index.lex_python(["s = '''open", "more"], "")
+
+    assert states[-1] == "'''"
+    assert len(tokens) == 2
+
+
+def test_lex_rules_carries_block_comment_state():
+    lines = ["a = 1 /* x", "y */ let b = 'q'"]
+
+    tokens, states = index.lex_rules("javascript", lines, "")
+
+    assert states == ["", "block_comment", ""]
+    assert tokens[0] == [("number", 4, 0, 5), ("comment", 6, 0, 10)]
+    assert tokens[1] == [("comment", 0, 1, 4), ("keyword", 5, 1, 8), ("string", 13, 1, 16)]
+    assert index.lex_rules("javascript", lines[1:], states[1]) == (shift(tokens[1:], -1), states[1:])
+
+
+def test_get_syntax_language_by_extension():
+    assert index.get_syntax_language("/x/a.PY") == "python"
+    assert index.get_syntax_language("page.htm") == "html"
+    assert index.get_syntax_language("notes.txt") is None
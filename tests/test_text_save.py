@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import pytest
+
+import index
+
+
+def wait(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_write_file_atomic_keeps_mode_and_leaves_no_temp(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+
+    index.write_file_atomic(str(path), "جديد".encode("utf-8"))
+
+    assert path.read_text(encoding="utf-8") == "جديد"
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_write_file_atomic_writes_through_symlink(tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_text("old")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    index.write_file_atomic(str(link), b"new")
+
+    assert link.is_symlink()
+    assert target.read_text() == "new"
+
+
+def test_write_file_atomic_keeps_hard_links(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("old contents")
+    other = tmp_path / "b.txt"
+    os.link(path, other)
+
+    index.write_file_atomic(str(path), b"new")
+
+    assert other.read_text() == "new"
+    assert os.stat(path).st_nlink == 2
+
+
+def test_text_save_job_reports_errors(tmp_path):
+    job = index.TextSaveJob(str(tmp_path / "missing" / "a.txt"), "text")
+    job.run()
+
+    assert job.finished
+    assert isinstance(job.error, OSError)
+
+
+def test_text_save_job_uses_encoding(tmp_path):
+    path = tmp_path / "a.txt"
+    job = index.TextSaveJob(str(path), "مرحبا", "cp1256")
+    job.run()
+
+    assert job.error is None
+    assert path.read_bytes() == "مرحبا".encode("cp1256")
+
+
+def test_recovery_journal_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(index, "RECOVERY_DIR", str(tmp_path / "recovery"))
+    journal = index.RecoveryJournal()
+
+    assert journal.save("/docs/a.txt", "line 1\nline 2")
+    wait(lambda: not journal.writing)
+    assert index.RecoveryJournal.find_pending() == [journal.path]
+    path, _, text = index.RecoveryJournal.load(journal.path)
+    assert (path, text) == ("/docs/a.txt", "line 1\nline 2")
+
+    journal.remove(reusable=False)
+    journal.save("/docs/a.txt", "late write")
+    wait(lambda: not journal.writing)
+    assert index.RecoveryJournal.find_pending() == []
+
+
+def test_recovery_journal_drops_writes_captured_before_remove(tmp_path, monkeypatch):
+    monkeypatch.setattr(index, "RECOVERY_DIR", str(tmp_path / "recovery"))
+    journal = index.RecoveryJournal()
+
+    # الكتابة تنتظر القفل بينما يُحفظ الملف وتُحذف النسخة
+    with journal.lock:
+        assert journal.save("/docs/a.txt", "before save")
+        remover = threading.Thread(target=journal.remove)
+        remover.start()
+        wait(lambda: journal.generation == 1)
+    remover.join()
+    wait(lambda: not journal.writing)
+
+    assert index.RecoveryJournal.find_pending() == []
+    assert journal.save("/docs/a.txt", "after save")
+    wait(lambda: not journal.writing)
+    assert index.RecoveryJournal.load(journal.path)[2] == "after save"
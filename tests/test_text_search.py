@@ -0,0 +1,101 @@
+import pytest
+
+import index
+
+
+def matches(search):
+    return [(search.start_lines[i], search.start_columns[i], search.end_lines[i], search.end_columns[i])
+            for i in range(search.count)]
+
+
+def test_find_all_records_lines_and_columns():
+    search = index.TextSearch("ab", text="xab\nab ab\n\nAB", ignore_case=True)
+    search.run()
+
+    assert search.error is None
+    assert matches(search) == [(0, 1, 0, 3), (1, 0, 1, 2), (1, 3, 1, 5), (3, 0, 3, 2)]
+    assert search.find_at_or_after(1, 1) == 2
+
+
+def test_find_all_in_file_counts_columns_in_characters(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_text("سلام abc\nabc\n", encoding="utf-8")
+
+    search = index.TextSearch("abc", path=str(path))
+    search.run()
+
+    assert matches(search) == [(0, 5, 0, 8), (1, 0, 1, 3)]
+
+
+def test_find_all_stops_at_max_matches():
+    search = index.TextSearch("a", text="a" * 10, max_matches=3)
+    search.run()
+
+    assert search.count == 3
+
+
+def test_replace_all_returns_only_the_changed_range():
+    search = index.TextSearch(r"(\d+)", text="a\nx 1 y 22\nb", is_regex=True, replacement=r"<\1>")
+    search.run()
+
+    assert search.count == 2
+    assert search.replaced == ("2.2", "2.8", "<1> y <22>")
+
+
+def test_invalid_regex_raises_in_constructor():
+    with pytest.raises(index.re.error):
+        index.TextSearch("(", text="", is_regex=True)
+
+
+def test_pattern_outside_file_encoding_raises_value_error(tmp_path):
+    path = tmp_path / "latin.txt"
+    path.write_bytes("café".encode("latin-1"))
+
+    with pytest.raises(ValueError, match="LATIN-1"):
+        index.TextSearch("سلام", path=str(path), encoding="latin-1")
+
+
+def test_replace_all_in_file_uses_character_columns(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_text("سلام abc\nx abc\n", encoding="utf-8")
+
+    search = index.TextSearch("abc", path=str(path), replacement="نعم")
+    search.run()
+
+    assert search.error is None
+    assert search.count == 2
+    assert search.replaced == ("1.5", "2.5", "نعم\nx نعم")
+
+
+def test_replace_all_in_file_expands_regex_groups(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"k=1\nk=22\n")
+
+    search = index.TextSearch(r"k=(\d+)", path=str(path), is_regex=True, replacement=r"\1:k")
+    search.run()
+
+    assert search.replaced == ("1.0", "2.4", "1:k\n22:k")
+
+
+def test_literal_pattern_and_replacement_keep_regex_metacharacters():
+    search = index.TextSearch("a.b*(", text="axb a.b*( a.b*(", replacement=r"\1$&")
+    search.run()
+
+    assert search.count == 2
+    assert search.replaced == ("1.4", "1.15", r"\1$& \1$&")
+
+
+def test_replacement_containing_the_pattern_is_not_replaced_again():
+    search = index.TextSearch("ab", text="ab-ab", replacement="xaby")
+    search.run()
+
+    assert search.count == 2
+    assert search.replaced == ("1.0", "1.5", "xaby-xaby")
+
+
+def test_replacement_outside_file_encoding_raises_value_error(tmp_path):
+    path = tmp_path / "latin.txt"
+    path.write_bytes("café".encode("latin-1"))
+
+    with pytest.raises(ValueError):
+        index.TextSearch("caf", path=str(path), encoding="latin-1", replacement="سلام")
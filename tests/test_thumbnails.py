@@ -0,0 +1,106 @@
+import os
+import queue
+import types
+
+from PIL import Image
+
+import index
+
+
+def test_key_changes_with_size_mtime_and_thumbnail_size():
+    key = index.ThumbnailCache.get_key("/a.png", 10, 1.0)
+
+    assert key == index.ThumbnailCache.get_key("/a.png", 10, 1.0)
+    assert len({key,
+                index.ThumbnailCache.get_key("/b.png", 10, 1.0),
+                index.ThumbnailCache.get_key("/a.png", 11, 1.0),
+                index.ThumbnailCache.get_key("/a.png", 10, 2.0),
+                index.ThumbnailCache.get_key("/a.png", 10, 1.0, thumb_size=64)}) == 5
+    # الأسماء غير الصالحة في UTF-8 لا تُسقط توليد المفتاح
+    assert index.ThumbnailCache.get_key(os.fsdecode(b"/\xff.png"), 1, 1.0)
+
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = index.ThumbnailCache(directory=str(tmp_path))
+    key = index.ThumbnailCache.get_key("/a.png", 1, 1.0)
+
+    assert cache.get(key) is None
+    cache.put(key, Image.new("RGB", (8, 4), "red"))
+
+    image = cache.get(key)
+    assert image.size == (8, 4)
+    assert os.path.exists(cache.get_path(key))
+    assert cache.total_bytes == os.path.getsize(cache.get_path(key))
+
+
+def test_removed_file_is_a_miss(tmp_path):
+    cache = index.ThumbnailCache(directory=str(tmp_path))
+    key = index.ThumbnailCache.get_key("/a.png", 1, 1.0)
+    cache.put(key, Image.new("RGB", (8, 4)))
+    os.remove(cache.get_path(key))
+
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_thumbnails_are_evicted(tmp_path):
+    keys = [index.ThumbnailCache.get_key(f"/{i}.png", 1, 1.0) for i in range(3)]
+    cache = index.ThumbnailCache(directory=str(tmp_path))
+    cache.put(keys[0], Image.new("RGB", (8, 8)))
+    cache.max_bytes = cache.total_bytes * 2
+    cache.put(keys[1], Image.new("RGB", (8, 8)))
+    cache.get(keys[0])
+
+    cache.put(keys[2], Image.new("RGB", (8, 8)))
+
+    assert list(cache.files) == [keys[0], keys[2]]
+    assert not os.path.exists(cache.get_path(keys[1]))
+
+
+def test_index_is_rebuilt_from_disk_in_last_used_order(tmp_path):
+    keys = [index.ThumbnailCache.get_key(f"/{i}.png", 1, 1.0) for i in range(2)]
+    cache = index.ThumbnailCache(directory=str(tmp_path))
+    for key in keys:
+        cache.put(key, Image.new("RGB", (8, 8)))
+    os.utime(cache.get_path(keys[1]), (1, 1))
+
+    reopened = index.ThumbnailCache(directory=str(tmp_path))
+    reopened.load_index()
+
+    assert list(reopened.files) == [keys[1], keys[0]]
+    assert reopened.total_bytes == cache.total_bytes
+
+
+def make_grid(tmp_path):
+    app = index.ZUOperatingSystem.__new__(index.ZUOperatingSystem)
+    app.thumbnail_cache = index.ThumbnailCache(directory=str(tmp_path / "thumbs"))
+    app.thumbnail_results = queue.Queue()
+    app.thumbnail_pending = set()
+    app.thumbnail_failed = set()
+    app.thumbnail_wanted = set()
+    app.root = types.SimpleNamespace(after=lambda delay, callback: "after")
+    return app
+
+
+def test_failed_thumbnail_is_marked_and_not_cached(tmp_path):
+    app = make_grid(tmp_path)
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    key = (str(broken), 12, 1.0)
+    app.thumbnail_wanted = {key}
+    app.thumbnail_pending = {key}
+
+    app.load_thumbnail(key)
+    app.poll_thumbnails()
+
+    assert app.thumbnail_failed == {key}
+    assert app.thumbnail_pending == set()
+    assert app.thumbnail_cache.files == {}
+
+
+def test_thumbnail_no_longer_visible_is_skipped_without_failing(tmp_path):
+    app = make_grid(tmp_path)
+    key = (str(tmp_path / "a.png"), 1, 1.0)
+
+    app.load_thumbnail(key)
+
+    assert app.thumbnail_results.get_nowait() == (key, None, False)
@@ -0,0 +1,131 @@
+import json
+import os
+
+import pytest
+
+import index
+
+
+@pytest.fixture
+def trash(tmp_path, monkeypatch):
+    monkeypatch.setattr(index, "TRASH_DIR", str(tmp_path / "trash"))
+    monkeypatch.setattr(index, "TRASH_ROOTS_FILE", str(tmp_path / "trash_roots.json"))
+    return index.Trash()
+
+
+def make_file(path, size=10):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_move_and_restore(tmp_path, trash):
+    path = make_file(tmp_path / "docs" / "a.txt")
+
+    root, item_id = trash.move_to_trash(path)
+
+    assert root == index.TRASH_DIR
+    assert not os.path.exists(path)
+    assert trash.restore(root, item_id) == path
+    assert os.path.exists(path)
+    assert os.listdir(root) == []
+
+
+def test_restore_refuses_to_overwrite(tmp_path, trash):
+    path = make_file(tmp_path / "a.txt")
+    root, item_id = trash.move_to_trash(path)
+    make_file(tmp_path / "a.txt", size=3)
+
+    with pytest.raises(FileExistsError):
+        trash.restore(root, item_id)
+
+
+def test_reclaim_removes_oldest_items_over_size_limit(tmp_path, trash, monkeypatch):
+    monkeypatch.setattr(index, "TRASH_MAX_BYTES", 150)
+    items = [trash.move_to_trash(make_file(tmp_path / f"{name}.bin", size=100)) for name in ("old", "new")]
+    # ترتيب الحذف يُقرأ من البيانات، فيُثبَّت هنا بدل الاعتماد على دقة الساعة
+    for deleted_at, (root, item_id) in enumerate(items):
+        metadata_path = os.path.join(root, item_id) + ".json"
+        with open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        metadata["deleted_at"] = index.time.time() - 10 + deleted_at
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+
+    trash.reclaim()
+
+    with pytest.raises(FileNotFoundError):
+        trash.restore(*items[0])
+    assert trash.restore(*items[1]) == str(tmp_path / "new.bin")
+
+
+def test_reclaim_removes_items_past_max_age(tmp_path, trash, monkeypatch):
+    monkeypatch.setattr(index, "TRASH_MAX_AGE", -1)
+    root, item_id = trash.move_to_trash(make_file(tmp_path / "a.txt"))
+
+    trash.reclaim()
+
+    assert os.listdir(root) == []
+    assert trash.list_items() == []
+
+
+def test_interrupted_move_is_completed_on_listing(tmp_path, trash):
+    path = make_file(tmp_path / "a.txt")
+    root, item_id = trash.move_to_trash(path)
+    holder = os.path.join(root, item_id)
+    # انقطاع بعد نقل العنصر وقبل تثبيت بياناته
+    os.rename(holder + ".json", holder + ".json.tmp")
+
+    assert [(item[0], item[1]) for item in trash.list_items()] == [(root, item_id)]
+    assert trash.restore(root, item_id) == path
+
+
+def test_interrupted_move_before_rename_leaves_nothing(tmp_path, trash):
+    path = make_file(tmp_path / "a.txt")
+    root = trash.get_trash_root(path)
+    holder = os.path.join(root, "pending")
+    trash.write_metadata(holder, {"original": path, "deleted_at": 0, "size": None})
+    os.mkdir(holder)
+
+    assert trash.list_items() == []
+    assert os.listdir(root) == []
+    assert os.path.exists(path)
+
+
+def test_failed_move_removes_its_metadata(tmp_path, trash, monkeypatch):
+    path = make_file(tmp_path / "a.txt")
+
+    def fail(source, target):
+        raise PermissionError(source)
+
+    monkeypatch.setattr(index.os, "rename", fail)
+    with pytest.raises(PermissionError):
+        trash.move_to_trash(path)
+
+    assert os.listdir(index.TRASH_DIR) == []
+    assert os.path.exists(path)
+
+
+def test_reclaim_does_not_recreate_metadata_of_restored_items(tmp_path, trash, monkeypatch):
+    path = make_file(tmp_path / "a.txt")
+    root, item_id = trash.move_to_trash(path)
+    get_tree_size = index.get_tree_size
+
+    def restore_while_sizing(holder):
+        size = get_tree_size(holder)
+        trash.restore(root, item_id)
+        return size
+
+    monkeypatch.setattr(index, "get_tree_size", restore_while_sizing)
+    trash.reclaim()
+
+    assert os.listdir(root) == []
+    assert os.path.exists(path)
+
+
+def test_reclaiming_marker_is_removed_when_holder_is_gone(tmp_path, trash):
+    root = trash.get_trash_root(make_file(tmp_path / "a.txt"))
+    open(os.path.join(root, "gone.reclaiming"), "w").close()
+
+    assert trash.list_items() == []
+    assert os.listdir(root) == []
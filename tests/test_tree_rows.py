@@ -0,0 +1,122 @@
+import pytest
+
+import index
+
+
+class Tree:
+    """شجرة Treeview وهمية تسجل الصفوف المرسومة والتمرير"""
+
+    def __init__(self, rows):
+        self.height = (rows + 1) * index.TREE_ROW_HEIGHT
+        self.rows = []
+        self.selected = []
+        self.focused = ""
+        self.scrolled = 0
+
+    def winfo_height(self):
+        return self.height
+
+    def get_children(self):
+        return list(self.rows)
+
+    def delete(self, *iids):
+        self.rows = [iid for iid in self.rows if iid not in iids]
+
+    def insert(self, parent, position, iid, values):
+        self.rows.append(iid)
+
+    def selection_set(self, iids):
+        self.selected = list(iids)
+
+    def selection(self):
+        return tuple(self.selected)
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.focused
+        self.focused = iid
+
+    def yview_moveto(self, fraction):
+        self.scrolled = 0
+
+    def yview_scroll(self, count, what):
+        self.scrolled += count
+
+
+class Scrollbar:
+    def set(self, first, last):
+        self.range = (first, last)
+
+
+@pytest.fixture
+def tree_view(explorer):
+    explorer.view_mode = "list"
+    explorer.tree = Tree(rows=20)
+    explorer.tree_scrollbar = Scrollbar()
+    explorer.format_entry_values = lambda entry: (entry.name,)
+    explorer.dir_entries = [index.DirectoryEntry(f"{i:04}.txt", False, i, None) for i in range(1000)]
+    return explorer
+
+
+def drawn(explorer):
+    rows = [int(iid) for iid in explorer.tree.get_children()]
+    return rows[0], rows[-1] + 1
+
+
+def test_only_visible_rows_and_overscan_are_drawn(tree_view):
+    tree_view.view_offset = 500
+    tree_view.render_tree_rows()
+
+    assert drawn(tree_view) == (500 - index.TREE_OVERSCAN, 520 + index.TREE_OVERSCAN)
+    # أول صف ظاهر هو صف الإزاحة وليس أول صف مرسوم
+    assert tree_view.tree.scrolled == index.TREE_OVERSCAN
+    assert tree_view.tree_scrollbar.range == (0.5, 0.52)
+
+
+def test_window_is_clamped_to_both_ends(tree_view):
+    tree_view.view_offset = -5
+    tree_view.render_tree_rows()
+    assert tree_view.view_offset == 0
+    assert drawn(tree_view) == (0, 20 + index.TREE_OVERSCAN)
+    assert tree_view.tree.scrolled == 0
+
+    tree_view.view_offset = 5000
+    tree_view.render_tree_rows()
+    assert tree_view.view_offset == 980
+    assert drawn(tree_view) == (980 - index.TREE_OVERSCAN, 1000)
+    assert tree_view.tree_scrollbar.range == (0.98, 1.0)
+
+
+def test_short_listing_draws_every_row(tree_view):
+    tree_view.dir_entries = tree_view.dir_entries[:5]
+    tree_view.view_offset = 3
+    tree_view.render_tree_rows()
+
+    assert tree_view.view_offset == 0
+    assert drawn(tree_view) == (0, 5)
+    assert tree_view.tree_scrollbar.range == (0.0, 1.0)
+
+
+def test_selection_and_focus_are_restored_only_inside_the_window(tree_view):
+    tree_view.selected_indices = {3, 505, 900}
+    tree_view.focus_index = 505
+    tree_view.view_offset = 500
+    tree_view.render_tree_rows()
+
+    assert tree_view.tree.selected == ["505"]
+    assert tree_view.tree.focused == "505"
+
+
+def test_keyboard_focus_scrolls_the_window(tree_view):
+    tree_view.focus_index = 19
+    tree_view.move_tree_focus(1)
+
+    assert tree_view.focus_index == 20
+    assert tree_view.view_offset == 1
+    assert tree_view.selected_indices == {20}
+
+    tree_view.move_tree_focus(-5)
+    assert tree_view.view_offset == 1
+    tree_view.focus_index = 1
+    tree_view.move_tree_focus(-1)
+    assert tree_view.view_offset == 0